@@ -0,0 +1,3 @@
+"""
+External or vendor files
+"""
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+
+'''
+Measure the decoding of amounts and timestamps of models.
+
+Usage::
+
+    python benchmarks/bench_amounts.py [--models N] [--reads N]
+
+Compares parsing the string attributes on every read, as done by
+consumers before, with the cached accessors of the models and with the
+bulk array helpers of hyperwallet.frames.
+'''
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hyperwallet.frames import toDatetimeArray, toMinorUnitsArray  # noqa
+from hyperwallet.models import Receipt  # noqa
+
+
+def measure(function, models):
+    started = time.time()
+    function(models)
+
+    return (time.time() - started) / len(models) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', type=int, default=20000)
+    parser.add_argument('--reads', type=int, default=3)
+    args = parser.parse_args()
+
+    def build():
+        return [Receipt({
+            'journalId': str(i),
+            'amount': '{}.{:02d}'.format(i, i % 100),
+            'fee': '0.25',
+            'currency': 'USD',
+            'createdOn': '2017-10-31T22:32:57'
+        }) for i in range(args.models)]
+
+    def parseEveryRead(models):
+        for i in range(args.reads):
+            for model in models:
+                int(Decimal(model.amount).scaleb(2))
+                datetime.datetime.strptime(model.createdOn, '%Y-%m-%dT%H:%M:%S').replace(tzinfo=datetime.timezone.utc)
+
+    def accessors(models):
+        for i in range(args.reads):
+            for model in models:
+                model.getMinorUnits('amount')
+                model.getDatetime('createdOn')
+
+    def arrays(models):
+        for i in range(args.reads):
+            toMinorUnitsArray(models)
+            toDatetimeArray(models)
+
+    print('{} reads of amount and createdOn per model'.format(args.reads))
+
+    for (name, function) in (('parse every read', parseEveryRead), ('cached accessors', accessors), ('bulk arrays', arrays)):
+        print('{:<18} {:8.2f} us/model'.format(name, measure(function, build())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+'''
+Measure the time spent in Encryption.decrypt.
+
+Usage::
+
+    python benchmarks/bench_decrypt.py [--messages N]
+
+Reports a cold decrypt (key sets loaded and keys imported) and warm decrypts
+(cached keys). When python-jose is installed, the former verification path
+(jwcrypto to decrypt, python-jose to parse the header and verify the
+signature from the JSON key) is measured as a reference.
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jwcrypto import jwk, jwe  # noqa
+from hyperwallet.utils.encryption import Encryption  # noqa
+
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hyperwallet', 'tests', 'resources')
+
+
+def findKey(location, algorithm):
+    with open(location) as f:
+        return [x for x in json.load(f)['keys'] if x['alg'] == algorithm][0]
+
+
+def legacyDecrypt(body):
+    '''
+    The verification path used before keys were cached and the JWS was parsed once.
+    '''
+
+    from jose import jws
+
+    jweToken = jwe.JWE()
+    jweToken.deserialize(body, key=jwk.JWK(**findKey(os.path.join(RESOURCES, 'private-jwkset1'), 'RSA-OAEP-256')))
+    payload = jweToken.payload
+
+    jws.get_unverified_header(payload)
+    return jws.verify(payload, json.dumps(findKey(os.path.join(RESOURCES, 'public-jwkset1'), 'RS256')), algorithms='RS256')
+
+
+def measure(function, messages):
+    started = time.time()
+
+    for message in messages:
+        function(message)
+
+    return (time.time() - started) * 1000.0 / len(messages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=50)
+    args = parser.parse_args()
+
+    encryption = Encryption(os.path.join(RESOURCES, 'private-jwkset1'), os.path.join(RESOURCES, 'public-jwkset1'))
+    messages = [encryption.encrypt(json.dumps({'token': 'usr-{}'.format(i)})) for i in range(args.messages)]
+
+    cold = Encryption(os.path.join(RESOURCES, 'private-jwkset1'), os.path.join(RESOURCES, 'public-jwkset1'))
+    results = [
+        ('cold', measure(cold.decrypt, messages[:1])),
+        ('warm', measure(cold.decrypt, messages))
+    ]
+
+    try:
+        import jose  # noqa
+        results.append(('legacy', measure(legacyDecrypt, messages)))
+    except ImportError:
+        pass
+
+    for (name, result) in results:
+        print('{:<8} {:8.3f} ms/decrypt'.format(name, result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+'''
+Measure appends and replays of the WebhookEventStore.
+
+Usage::
+
+    python benchmarks/bench_eventstore.py [--events N] [--objects N]
+
+Reports the append rate, the rate of a full replay and the time to replay
+the events of a single object and of a one day range through the index.
+'''
+
+import argparse
+import datetime
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hyperwallet.eventstore import WebhookEventStore  # noqa
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--events', type=int, default=100000)
+    parser.add_argument('--objects', type=int, default=1000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+
+    try:
+        started = datetime.datetime(2017, 1, 1)
+        notifications = [{
+            'token': 'wbh-{}'.format(i),
+            'type': 'USERS.UPDATED',
+            'createdOn': (started + datetime.timedelta(minutes=i)).strftime('%Y-%m-%dT%H:%M:%S'),
+            'object': {'token': 'usr-{}'.format(i % args.objects), 'status': 'ACTIVATED'}
+        } for i in range(args.events)]
+
+        with WebhookEventStore(directory, segmentSize=16 * 1024 * 1024) as store:
+            started = time.time()
+            store.appendMany(notifications)
+            store.flush()
+            elapsed = time.time() - started
+
+            print('append         {:10.0f} events/s'.format(args.events / elapsed))
+
+            started = time.time()
+            count = sum(1 for x in store.replay(raw=True))
+            elapsed = time.time() - started
+
+            print('replay all     {:10.0f} events/s'.format(count / elapsed))
+
+            started = time.time()
+            count = sum(1 for x in store.replay(objectToken='usr-{}'.format(args.objects // 2)))
+            elapsed = time.time() - started
+
+            print('replay object  {:10.3f} ms ({} events)'.format(elapsed * 1000, count))
+
+            started = time.time()
+            count = sum(1 for x in store.replay('2017-02-01T00:00:00', '2017-02-02T00:00:00'))
+            elapsed = time.time() - started
+
+            print('replay range   {:10.3f} ms ({} events)'.format(elapsed * 1000, count))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
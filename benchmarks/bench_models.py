@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+'''
+Measure asDict and asJsonString of the models.
+
+Usage::
+
+    python benchmarks/bench_models.py [--models N] [--repeat N]
+
+Compares the current implementation with the previous one for Users as
+returned by the API, for the first call and for repeated calls on
+unchanged models as done by logging and caching layers.
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hyperwallet.models import User  # noqa
+
+
+def legacyAsDict(model):
+    data = {}
+
+    for (key, value) in model._raw_json.items():
+        if isinstance(model._raw_json.get(key, None), (list, tuple, set)):
+            data[key] = list()
+            for subobj in model._raw_json.get(key, None):
+                data[key].append(subobj)
+
+        elif model._raw_json.get(key, None):
+            data[key] = model._raw_json.get(key, None)
+
+    return data
+
+
+def legacyAsJsonString(model):
+    return json.dumps(legacyAsDict(model), sort_keys=True, separators=(',', ':'), indent=4)
+
+
+def measure(function, models, repeat):
+    started = time.time()
+
+    for i in range(repeat):
+        for model in models:
+            function(model)
+
+    return (time.time() - started) / (repeat * len(models)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    def build():
+        return [User({
+            'token': 'usr-{}'.format(i),
+            'status': 'ACTIVATED',
+            'createdOn': '2017-10-31T22:32:57',
+            'clientUserId': str(i),
+            'profileType': 'INDIVIDUAL',
+            'firstName': 'John',
+            'lastName': 'Smith',
+            'middleName': None,
+            'email': 'john.smith{}@company.com'.format(i),
+            'addressLine1': '123 Main Street',
+            'city': 'New York',
+            'stateProvince': 'NY',
+            'country': 'US',
+            'postalCode': '10016',
+            'programToken': 'prg-83836cdf-2ce2-4696-8bc5-f1b86077238c',
+            'documents': [],
+            'links': [{'params': {'rel': 'self'}, 'href': 'https://api.sandbox.hyperwallet.com/rest/v4/users/usr-{}'.format(i)}]
+        }) for i in range(args.models)]
+
+    cases = (
+        ('legacy asDict', legacyAsDict, 1),
+        ('asDict', lambda model: model.asDict(), 1),
+        ('asDict view', lambda model: model.asDict(view=True), args.repeat),
+        ('legacy asJsonString', legacyAsJsonString, 1),
+        ('asJsonString first', lambda model: model.asJsonString(), 1),
+        ('asJsonString cached', lambda model: model.asJsonString(), args.repeat),
+        ('compact first', lambda model: model.asJsonString(compact=True), 1),
+        ('compact cached', lambda model: model.asJsonString(compact=True), args.repeat)
+    )
+    models = build()
+
+    for (name, function, repeat) in cases:
+        if name.endswith('first'):
+            models = build()
+
+        print('{:<22} {:8.2f} us/model'.format(name, measure(function, models, repeat)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+'''
+Measure the delivery rate of the WebhookReceiver.
+
+Usage::
+
+    python benchmarks/bench_receiver.py [--deliveries N] [--workers N]
+
+Reports how fast deliveries are acknowledged by the WSGI application and
+how fast they are processed, for plain and encrypted deliveries.
+'''
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hyperwallet.receiver import WebhookReceiver  # noqa
+from hyperwallet.utils.encryption import Encryption  # noqa
+
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hyperwallet', 'tests', 'resources')
+
+
+def measure(bodies, workers, encryptionData=None):
+    receiver = WebhookReceiver(lambda webhook: webhook.object, encryptionData, workers=workers, maxQueued=len(bodies))
+
+    def startResponse(status, headers):
+        pass
+
+    started = time.time()
+
+    for body in bodies:
+        receiver({
+            'REQUEST_METHOD': 'POST',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body)
+        }, startResponse)
+
+    acknowledged = time.time()
+
+    receiver.start()
+    receiver.stop()
+
+    processed = time.time()
+
+    assert receiver.processed == len(bodies)
+
+    return (len(bodies) / (acknowledged - started), len(bodies) / (processed - acknowledged))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--deliveries', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    encryptionData = {
+        'clientPrivateKeySetLocation': os.path.join(RESOURCES, 'private-jwkset1'),
+        'hyperwalletKeySetLocation': os.path.join(RESOURCES, 'public-jwkset1')
+    }
+    encryption = Encryption(**encryptionData)
+
+    plain = [json.dumps({
+        'token': 'wbh-{}'.format(i),
+        'type': 'PAYMENTS.UPDATED.STATUS.COMPLETED',
+        'createdOn': '2017-10-31T22:32:57',
+        'object': {'token': 'pmt-{}'.format(i), 'amount': '10.00', 'currency': 'USD'}
+    }).encode('utf-8') for i in range(args.deliveries)]
+    encrypted = [encryption.encrypt(x.decode('utf-8')).encode('ascii') for x in plain[:max(args.deliveries // 10, 1)]]
+
+    for (name, bodies, data) in (('plain', plain, None), ('encrypted', encrypted, encryptionData)):
+        (acknowledgeRate, processRate) = measure(bodies, args.workers, data)
+        print('{:<10} {:10.0f} acknowledged/s {:10.0f} processed/s'.format(name, acknowledgeRate, processRate))
+
+
+if __name__ == '__main__':
+    main()
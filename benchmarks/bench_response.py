@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+'''
+Measure the time and the memory allocated to decode an API response.
+
+Usage::
+
+    python benchmarks/bench_response.py [--requests N] [--items N]
+
+The HTTP layer is replaced by a canned response so only the work done by
+ApiClient._makeRequest is measured, for plain and encrypted responses.
+Memory is traced with tracemalloc and requires Python 3.9 or later.
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hyperwallet.utils import ApiClient  # noqa
+from hyperwallet.utils.encryption import Encryption  # noqa
+
+
+RESOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'hyperwallet', 'tests', 'resources')
+
+
+def buildBody(items):
+    return {
+        'count': items,
+        'offset': 0,
+        'limit': items,
+        'data': [{
+            'token': 'trf-{}'.format(i),
+            'status': 'COMPLETED',
+            'createdOn': '2017-10-31T22:32:57',
+            'clientPaymentId': 'payment-{}'.format(i),
+            'amount': '{}.99'.format(i),
+            'currency': 'USD',
+            'purpose': 'OTHER',
+            'destinationToken': 'usr-{}'.format(i)
+        } for i in range(items)]
+    }
+
+
+class _Response(object):
+    '''
+    A canned HTTP response, a plain object so nothing records the calls.
+    '''
+
+    def __init__(self, content, contentType):
+        self.status_code = 200
+        self.content = content
+        self.headers = {'Content-Type': contentType}
+
+
+def measure(client, content, contentType, requests, memoryRequests=20):
+    response = _Response(content, contentType)
+    ignored = (tracemalloc.Filter(False, tracemalloc.__file__),)
+
+    with mock.patch.object(client.session, 'request', new=lambda **kwargs: response):
+        client._makeRequest(method='GET', url='payments')
+
+        started = time.time()
+
+        for _ in range(requests):
+            client._makeRequest(method='GET', url='payments')
+
+        elapsed = time.time() - started
+
+        # Allocations are traced request by request: the peak is the memory
+        # used while decoding, the retained blocks and bytes are those of the
+        # decoded response still referenced after the request.
+        peaks = []
+        retainedBlocks = []
+        retainedBytes = []
+
+        tracemalloc.start()
+
+        for _ in range(memoryRequests):
+            before = tracemalloc.take_snapshot().filter_traces(ignored)
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+
+            decoded = client._makeRequest(method='GET', url='payments')
+
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            after = tracemalloc.take_snapshot().filter_traces(ignored)
+
+            statistics = after.compare_to(before, 'traceback')
+            retainedBlocks.append(sum(max(x.count_diff, 0) for x in statistics))
+            retainedBytes.append(sum(max(x.size_diff, 0) for x in statistics))
+
+            del decoded
+
+        tracemalloc.stop()
+
+    return {
+        'msPerRequest': elapsed * 1000.0 / requests,
+        'peakBytesPerRequest': sum(peaks) // len(peaks),
+        'retainedBlocksPerRequest': sum(retainedBlocks) // len(retainedBlocks),
+        'retainedBytesPerRequest': sum(retainedBytes) // len(retainedBytes)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--items', type=int, default=100)
+    args = parser.parse_args()
+
+    body = json.dumps(buildBody(args.items))
+
+    plain = ApiClient('user', 'pass', 'https://localhost')
+    encryption = Encryption(
+        os.path.join(RESOURCES, 'private-jwkset1'),
+        os.path.join(RESOURCES, 'public-jwkset1')
+    )
+    encrypted = ApiClient('user', 'pass', 'https://localhost', {
+        'clientPrivateKeySetLocation': os.path.join(RESOURCES, 'private-jwkset1'),
+        'hyperwalletKeySetLocation': os.path.join(RESOURCES, 'public-jwkset1')
+    })
+
+    results = [
+        ('plain', measure(plain, body.encode('utf-8'), 'application/json', args.requests)),
+        ('encrypted', measure(
+            encrypted,
+            encryption.encrypt(body).encode('ascii'),
+            'application/jose+json',
+            max(args.requests // 10, 1)
+        ))
+    ]
+
+    print('response body: {} bytes, {} items'.format(len(body), args.items))
+
+    for (name, result) in results:
+        print('{:<10} {msPerRequest:8.3f} ms/request {peakBytesPerRequest:10d} peak bytes/request '
+              '{retainedBlocksPerRequest:8d} retained blocks/request {retainedBytesPerRequest:10d} retained bytes/request'.format(
+                  name, **result))
+
+
+if __name__ == '__main__':
+    main()
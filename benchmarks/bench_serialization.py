@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+'''
+Measure the size and speed of the binary serialization of models.
+
+Usage::
+
+    python benchmarks/bench_serialization.py [--models N] [--repeat N]
+
+Compares pickle with dumps/loads for a page of Receipts and with
+toBytes/fromBytes for a single User, for each available codec.
+'''
+
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from hyperwallet.models import Receipt, User  # noqa
+from hyperwallet.utils import serialization  # noqa
+
+
+def measure(function, repeat):
+    started = time.time()
+
+    for i in range(repeat):
+        result = function()
+
+    return (result, (time.time() - started) / repeat * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    # Decoded as a page returned by the API.
+    receipts = [Receipt(x) for x in json.loads(json.dumps([{
+        'journalId': str(i),
+        'type': 'PAYMENT',
+        'entry': 'CREDIT',
+        'amount': '{}.50'.format(i),
+        'fee': '0.00',
+        'currency': 'USD',
+        'sourceToken': 'act-4b5a2d1c-9e6a-4c56-9e4d-6d1c1b0b4c2e',
+        'destinationToken': 'usr-{}'.format(i),
+        'details': {'clientPaymentId': 'pmt-{}'.format(i), 'payeeName': 'John Smith'},
+        'createdOn': '2017-10-31T22:32:57'
+    } for i in range(args.models)]))]
+    user = User(json.loads(json.dumps({
+        'token': 'usr-f9154016-94e8-4686-a840-075688ac07b5',
+        'status': 'PRE_ACTIVATED',
+        'createdOn': '2017-10-30T22:15:45',
+        'clientUserId': 'CSK7b8Ffch',
+        'profileType': 'INDIVIDUAL',
+        'firstName': 'John',
+        'lastName': 'Smith',
+        'email': 'john.smith@company.com',
+        'addressLine1': '123 Main Street',
+        'city': 'New York',
+        'stateProvince': 'NY',
+        'country': 'US',
+        'postalCode': '10016',
+        'programToken': 'prg-83836cdf-2ce2-4696-8bc5-f1b86077238c'
+    })))
+
+    cases = [('pickle', pickle.dumps, pickle.loads, pickle.dumps, pickle.loads)]
+
+    for codec in ('msgpack', 'json'):
+        try:
+            serialization.getCodec(codec)
+        except Exception:
+            continue
+
+        cases.append((
+            codec,
+            lambda models, codec=codec: serialization.dumps(models, codec),
+            serialization.loads,
+            lambda model, codec=codec: serialization.toBytes(model, codec),
+            serialization.fromBytes
+        ))
+
+    for (name, dumps, loads, toBytes, fromBytes) in cases:
+        (data, dumpTime) = measure(lambda: dumps(receipts), args.repeat)
+        (models, loadTime) = measure(lambda: loads(data), args.repeat)
+        (single, toTime) = measure(lambda: toBytes(user), args.repeat * 10)
+        (model, fromTime) = measure(lambda: fromBytes(single), args.repeat * 10)
+
+        print('{:<8} batch {:7d} bytes {:8.1f} us dump {:8.1f} us load   single {:5d} bytes {:6.1f} us dump {:6.1f} us load'.format(
+            name, len(data), dumpTime, loadTime, len(single), toTime, fromTime
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -31,6 +31,7 @@ from .models import (
     Account,                                                             # noqa
     StatusTransition,                                                    # noqa
     TransferMethodConfiguration,                                         # noqa
+    TransferMethodConfigurationList,                                     # noqa
     Webhook,                                                             # noqa
     TransferRefunds,                                                     # naqa
     HyperwalletVerificationDocument,
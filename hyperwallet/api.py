@@ -1,8 +1,13 @@
 #!/usr/bin/env python
 
+from collections import OrderedDict
+
 from .config import SERVER
-from .exceptions import HyperwalletException
+from .exceptions import HyperwalletException, HyperwalletAPIException
+from .frames import ReceiptFrame
 from .utils import ApiClient
+from .utils.cache import TTLCache
+from .utils.concurrency import boundedMap
 
 from hyperwallet import (
     User,
@@ -22,6 +27,7 @@ from hyperwallet import (
     Account,
     StatusTransition,
     TransferMethodConfiguration,
+    TransferMethodConfigurationList,
     Webhook,
     TransferRefunds,
     HyperwalletVerificationDocument,
@@ -44,10 +50,27 @@ class Api(object):
         Your UAT or Production API URL if applicable.
     :param encryptionData:
         Dictionary with params for encrypted requests (keys: clientPrivateKeySetLocation, hyperwalletKeySetLocation, etc).
+    :param configurationCacheData:
+        Dictionary enabling the Transfer Method Configuration cache (keys: maxSize, ttl, ignoreUserToken).
+    :param coalesceRequests:
+        Collapse identical concurrent GET requests into a single API call.
+    :param poolSize:
+        The maximum number of pooled connections, should be at least the concurrency of batch calls.
+    :param apiClient:
+        An ApiClient to share with other Api instances, see ClientRegistry. The
+        encryptionData, coalesceRequests and poolSize parameters are then ignored.
+    :param idempotencyLedger:
+        An IdempotencyLedger recording createPayment and createTransfer requests
+        by client id, so they can be retried safely.
 
     .. note::
         **server** defaults to the Hyperwallet Sandbox URL if not provided.
 
+    .. note::
+        Set **ignoreUserToken** only when the program returns the same
+        configurations for every User, the cached entries are then shared
+        between Users.
+
     '''
 
     def __init__(self,
@@ -55,7 +78,12 @@ class Api(object):
                  password=None,
                  programToken=None,
                  server=SERVER,
-                 encryptionData=None):
+                 encryptionData=None,
+                 configurationCacheData=None,
+                 coalesceRequests=False,
+                 poolSize=10,
+                 apiClient=None,
+                 idempotencyLedger=None):
         '''
         Create an instance of the API interface.
         This is the main interface the user will call to interact with the API.
@@ -75,7 +103,20 @@ class Api(object):
         self.programToken = programToken
         self.server = server
 
-        self.apiClient = ApiClient(self.username, self.password, self.server, encryptionData)
+        if apiClient is None:
+            apiClient = ApiClient(self.username, self.password, self.server, encryptionData, coalesceRequests, poolSize)
+
+        self.apiClient = apiClient
+        self.idempotencyLedger = idempotencyLedger
+
+        # Optional cache for the rarely changing Transfer Method Configurations.
+        self.configurationCache = None
+        self.configurationCacheIgnoreUserToken = False
+
+        if configurationCacheData is not None:
+            cacheData = dict(configurationCacheData)
+            self.configurationCacheIgnoreUserToken = cacheData.pop('ignoreUserToken', False)
+            self.configurationCache = TTLCache(**cacheData)
 
     '''
 
@@ -122,6 +163,25 @@ class Api(object):
 
         return User(response)
 
+    def getUsers(self,
+                 userTokens=None,
+                 concurrency=8):
+        '''
+        Retrieve many Users concurrently.
+
+        :param userTokens:
+            An iterable of tokens identifying the Users. **REQUIRED**
+        :param concurrency:
+            The number of concurrent requests.
+        :returns:
+            A dictionary of token to User, or to the exception raised for that token.
+        '''
+
+        if userTokens is None:
+            raise HyperwalletException('userTokens is required')
+
+        return self.__getMany(self.getUser, userTokens, concurrency)
+
     def updateUser(self,
                    userToken=None,
                    data=None):
@@ -294,6 +354,35 @@ class Api(object):
 
         return BankAccount(response)
 
+    def getBankAccounts(self,
+                        userToken=None,
+                        bankAccountTokens=None,
+                        concurrency=8):
+        '''
+        Retrieve many Bank Accounts of a User concurrently.
+
+        :param userToken:
+            A token identifying the User. **REQUIRED**
+        :param bankAccountTokens:
+            An iterable of tokens identifying the Bank Accounts. **REQUIRED**
+        :param concurrency:
+            The number of concurrent requests.
+        :returns:
+            A dictionary of token to Bank Account, or to the exception raised for that token.
+        '''
+
+        if not userToken:
+            raise HyperwalletException('userToken is required')
+
+        if bankAccountTokens is None:
+            raise HyperwalletException('bankAccountTokens is required')
+
+        return self.__getMany(
+            lambda bankAccountToken: self.getBankAccount(userToken, bankAccountToken),
+            bankAccountTokens,
+            concurrency
+        )
+
     def updateBankAccount(self,
                           userToken=None,
                           bankAccountToken=None,
@@ -1444,6 +1533,15 @@ class Api(object):
         if not ('clientTransferId' in data) or not (data['clientTransferId']):
             raise HyperwalletException('clientTransferId is required')
 
+        if self.idempotencyLedger is not None:
+            return self.__createIdempotent(
+                'transfers',
+                data['clientTransferId'],
+                lambda: self.apiClient.doPost(self.__buildUrl('transfers'), data),
+                lambda: self.listTransfers({'clientTransferId': data['clientTransferId']}),
+                Transfer
+            )
+
         response = self.apiClient.doPost(
             self.__buildUrl('transfers'),
             data
@@ -1473,6 +1571,25 @@ class Api(object):
 
         return Transfer(response)
 
+    def getTransfers(self,
+                     transferTokens=None,
+                     concurrency=8):
+        '''
+        Retrieve many Transfers concurrently.
+
+        :param transferTokens:
+            An iterable of tokens identifying the Transfers. **REQUIRED**
+        :param concurrency:
+            The number of concurrent requests.
+        :returns:
+            A dictionary of token to Transfer, or to the exception raised for that token.
+        '''
+
+        if transferTokens is None:
+            raise HyperwalletException('transferTokens is required')
+
+        return self.__getMany(self.getTransfer, transferTokens, concurrency)
+
     def listTransfers(self,
                       params=None):
         '''
@@ -2098,6 +2215,15 @@ class Api(object):
         if not data:
             raise HyperwalletException('data is required')
 
+        if self.idempotencyLedger is not None and data.get('clientPaymentId'):
+            return self.__createIdempotent(
+                'payments',
+                data['clientPaymentId'],
+                lambda: self.apiClient.doPost('payments', data),
+                lambda: self.listPayments({'clientPaymentId': data['clientPaymentId']}),
+                Payment
+            )
+
         response = self.apiClient.doPost('payments', data)
 
         return Payment(response)
@@ -2122,6 +2248,25 @@ class Api(object):
 
         return Payment(response)
 
+    def getPayments(self,
+                    paymentTokens=None,
+                    concurrency=8):
+        '''
+        Retrieve many Payments concurrently.
+
+        :param paymentTokens:
+            An iterable of tokens identifying the Payments. **REQUIRED**
+        :param concurrency:
+            The number of concurrent requests.
+        :returns:
+            A dictionary of token to Payment, or to the exception raised for that token.
+        '''
+
+        if paymentTokens is None:
+            raise HyperwalletException('paymentTokens is required')
+
+        return self.__getMany(self.getPayment, paymentTokens, concurrency)
+
     def listPayments(self,
                      params=None):
         '''
@@ -2242,7 +2387,8 @@ class Api(object):
 
     def listBalancesForUser(self,
                             userToken=None,
-                            params=None):
+                            params=None,
+                            asFrame=False):
         '''
         List User Balances.
 
@@ -2250,8 +2396,10 @@ class Api(object):
             A token identifying the User. **REQUIRED**
         :param params:
             A dictionary containing query parameters.
+        :param asFrame:
+            Return a columnar ReceiptFrame instead of a list, requires numpy.
         :returns:
-            An array of Balances.
+            An array of Balances or a ReceiptFrame.
         '''
 
         if not userToken:
@@ -2265,6 +2413,9 @@ class Api(object):
             params
         )
 
+        if asFrame:
+            return ReceiptFrame.fromRecords(response.get('data', []))
+
         return [Balance(x) for x in response.get('data', [])]
 
     def listBalancesForPrepaidCard(self,
@@ -2354,7 +2505,8 @@ class Api(object):
 
     def listReceiptsForUser(self,
                             userToken=None,
-                            params=None):
+                            params=None,
+                            asFrame=False):
         '''
         List User Receipts.
 
@@ -2362,8 +2514,10 @@ class Api(object):
             A token identifying the User. **REQUIRED**
         :param params:
             A dictionary containing query parameters.
+        :param asFrame:
+            Return a columnar ReceiptFrame instead of a list, requires numpy.
         :returns:
-            An array of Receipts.
+            An array of Receipts or a ReceiptFrame.
         '''
 
         if not userToken:
@@ -2377,6 +2531,9 @@ class Api(object):
             params
         )
 
+        if asFrame:
+            return ReceiptFrame.fromRecords(response.get('data', []))
+
         return [Receipt(x) for x in response.get('data', [])]
 
     def listReceiptsForPrepaidCard(self,
@@ -2421,7 +2578,8 @@ class Api(object):
     def listReceiptsForAccount(self,
                                programToken=None,
                                accountToken=None,
-                               params=None):
+                               params=None,
+                               asFrame=False):
         '''
         List Account Receipts.
 
@@ -2431,8 +2589,10 @@ class Api(object):
             A token identifying the Account. **REQUIRED**
         :param params:
             A dictionary containing query parameters.
+        :param asFrame:
+            Return a columnar ReceiptFrame instead of a list, requires numpy.
         :returns:
-            An array of Receipts.
+            An array of Receipts or a ReceiptFrame.
         '''
 
         if not programToken:
@@ -2455,6 +2615,9 @@ class Api(object):
             params
         )
 
+        if asFrame:
+            return ReceiptFrame.fromRecords(response.get('data', []))
+
         return [Receipt(x) for x in response.get('data', [])]
 
     '''
@@ -2616,22 +2779,19 @@ class Api(object):
         if not profileType:
             raise HyperwalletException('profileType is required')
 
-        response = self.apiClient.doGet(
-            'transfer-method-configurations',
-            {
-                'userToken': userToken,
-                'country': country,
-                'currency': currency,
-                'type': transferMethodType,
-                'profileType': profileType
-            }
-        )
+        response = self.__getTransferMethodConfigurations({
+            'userToken': userToken,
+            'country': country,
+            'currency': currency,
+            'type': transferMethodType,
+            'profileType': profileType
+        })
 
         return TransferMethodConfiguration(response)
 
     def listTransferMethodConfigurations(self,
                                          userToken=None,
-                                         params={}):
+                                         params=None):
         '''
         List Transfer Method Configurations.
 
@@ -2640,7 +2800,7 @@ class Api(object):
         :param params:
             A dictionary containing query parameters.
         :returns:
-            An array of Transfer Method Configurations.
+            A lazy list of Transfer Method Configurations, one per country and currency.
         '''
 
         if not userToken:
@@ -2649,33 +2809,38 @@ class Api(object):
         if params and not set(list(params)).issubset(TransferMethodConfiguration.filters_array):
             raise HyperwalletException('Invalid filter')
 
-        params.update({'userToken': userToken})
+        query = dict(params or {})
+        query['userToken'] = userToken
 
-        response = self.apiClient.doGet(
-            'transfer-method-configurations',
-            params
-        )
+        response = self.__getTransferMethodConfigurations(query)
 
-        configurations = []
+        return TransferMethodConfigurationList(response.get('data') or [])
 
-        data = response.get('data')
+    def __getTransferMethodConfigurations(self, params):
+        '''
+        Retrieve Transfer Method Configurations, using the cache when enabled.
 
-        if not data:
-            return []
+        :param params:
+            A dictionary containing query parameters. **REQUIRED**
+        :returns:
+            The API response.
+        '''
+
+        if self.configurationCache is None:
+            return self.apiClient.doGet('transfer-method-configurations', params)
 
-        for collection in data:
-            countries = collection.pop('countries', [])
-            currencies = collection.pop('currencies', [])
+        key = tuple(sorted(
+            (name, value) for (name, value) in params.items()
+            if not (self.configurationCacheIgnoreUserToken and name == 'userToken')
+        ))
 
-            for country in countries:
-                for currency in currencies:
-                    configuration = collection.copy()
-                    configuration.update({'countries': [country]})
-                    configuration.update({'currencies': [currency]})
+        response = self.configurationCache.get(key)
 
-                    configurations.append(configuration)
+        if response is None:
+            response = self.apiClient.doGet('transfer-method-configurations', params)
+            self.configurationCache.set(key, response)
 
-        return [TransferMethodConfiguration(x) for x in configurations]
+        return response
 
     def __updateTransferMethod(self,
                                userToken=None,
@@ -2764,6 +2929,83 @@ class Api(object):
     def __buildUrl(self, *paths):
         return '/'.join(s.strip('/') for s in paths)
 
+    def __getMany(self, getFunction, tokens, concurrency):
+        '''
+        Call a retrieve method for distinct tokens concurrently.
+
+        :param getFunction:
+            A callable retrieving a single model by token. **REQUIRED**
+        :param tokens:
+            An iterable of tokens, duplicates are retrieved once. **REQUIRED**
+        :param concurrency:
+            The number of concurrent requests. **REQUIRED**
+        :returns:
+            A dictionary of token to model or exception, in the order of the tokens.
+        '''
+
+        uniqueTokens = list(OrderedDict.fromkeys(tokens))
+        results = {}
+
+        for (token, model, error) in boundedMap(getFunction, uniqueTokens, concurrency):
+            results[token] = error if error is not None else model
+
+        return OrderedDict((token, results[token]) for token in uniqueTokens)
+
+    def __createIdempotent(self, kind, clientId, createFunction, lookupFunction, model):
+        '''
+        Create a Payment or Transfer, recording the request in the idempotency ledger.
+
+        :param kind:
+            The kind of request recorded in the ledger. **REQUIRED**
+        :param clientId:
+            The client id of the request. **REQUIRED**
+        :param createFunction:
+            A callable sending the create request and returning the API response. **REQUIRED**
+        :param lookupFunction:
+            A callable listing the models with the client id. **REQUIRED**
+        :param model:
+            The model class of the response. **REQUIRED**
+        :returns:
+            A model, the one recorded by an earlier request if any.
+        '''
+
+        from .ledger import SUCCEEDED, isAmbiguousError
+
+        entry = self.idempotencyLedger.begin(kind, clientId)
+
+        if entry.state == SUCCEEDED:
+            return model(entry.response)
+
+        if entry.ambiguous:
+            # An earlier attempt may have landed, look it up once before
+            # sending the request again.
+            try:
+                found = lookupFunction()
+            except BaseException:
+                self.idempotencyLedger.abandon(kind, clientId)
+                raise
+
+            if found:
+                self.idempotencyLedger.succeed(kind, clientId, found[0]._raw_json)
+                return found[0]
+
+        try:
+            response = createFunction()
+        except HyperwalletAPIException as e:
+            if isAmbiguousError(e):
+                self.idempotencyLedger.abandon(kind, clientId)
+            else:
+                self.idempotencyLedger.fail(kind, clientId, e.message)
+
+            raise
+        except BaseException:
+            self.idempotencyLedger.abandon(kind, clientId)
+            raise
+
+        self.idempotencyLedger.succeed(kind, clientId, response)
+
+        return model(response)
+
     def setDocumentAndReasonFromResponseHelper(self,
                                                data=None):
         '''
@@ -2799,7 +3041,8 @@ class Api(object):
     def uploadDocumentsForUser(self,
                                userToken=None,
                                data=None,
-                               files=None):
+                               files=None,
+                               onProgress=None):
         '''
         Upload documents for Users
 
@@ -2816,6 +3059,8 @@ class Api(object):
             'drivers_license_front': open('F1.png', 'rb'),
             'drivers_license_back': open('F22.png', 'rb')
             }
+        :param onProgress:
+            Called with an UploadProgress (bytesSent, totalBytes, bytesPerSecond) while the files are sent.
         :returns:
             A User with documents information
         '''
@@ -2829,7 +3074,8 @@ class Api(object):
                 userToken
             ),
             data,
-            files
+            files,
+            onProgress
         )
         response = self.setDocumentAndReasonFromResponseHelper(response)
         return User(response)
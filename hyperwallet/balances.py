@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+
+from hyperwallet.utils.concurrency import boundedMap
+from hyperwallet.utils.currencies import toDecimal
+from hyperwallet.utils.paging import iterItems
+
+
+class UserBalances(object):
+    '''
+    The balances of a single User.
+
+    :param userToken:
+        A token identifying the User.
+    :param sources:
+        A dictionary of User or Prepaid Card token to a dictionary of currency to Decimal amount.
+    :param error:
+        The exception raised while retrieving the balances, if any.
+    '''
+
+    def __init__(self, userToken, sources=None, error=None):
+        '''
+        Create a new UserBalances.
+        '''
+
+        self.userToken = userToken
+        self.sources = sources or {}
+        self.error = error
+
+    @property
+    def totals(self):
+        '''
+        A dictionary of currency to Decimal amount summed over all sources.
+        '''
+
+        totals = {}
+
+        for amounts in self.sources.values():
+            for (currency, amount) in amounts.items():
+                totals[currency] = totals.get(currency, 0) + amount
+
+        return totals
+
+    def __repr__(self):
+        return "UserBalances({userToken}, {totals})".format(
+            userToken=self.userToken,
+            totals=self.totals
+        )
+
+
+class BalanceAggregator(object):
+    '''
+    Aggregate balances of many Users with concurrent API calls.
+
+    Only the per currency amounts of each User are kept, the Balance objects
+    are released as soon as a User has been processed.
+
+    :param api:
+        The Api instance used to retrieve balances. **REQUIRED**
+    :param concurrency:
+        The number of concurrent requests.
+    :param includePrepaidCards:
+        Also retrieve the balances of every Prepaid Card of each User.
+    '''
+
+    def __init__(self, api, concurrency=8, includePrepaidCards=False):
+        '''
+        Create a new BalanceAggregator.
+        '''
+
+        self.api = api
+        self.concurrency = concurrency
+        self.includePrepaidCards = includePrepaidCards
+
+        self.totals = {}
+        self.processed = 0
+        self.failed = 0
+
+    def iterBalances(self, userTokens=None, params=None):
+        '''
+        Retrieve the balances of Users and yield them as they complete.
+
+        The aggregated totals and counters are updated while iterating.
+
+        :param userTokens:
+            An iterable of User tokens, all Users of the program are walked with listUsers if not provided.
+        :param params:
+            A dictionary containing query parameters for listUsers.
+        :returns:
+            A generator of UserBalances.
+        '''
+
+        if userTokens is None:
+            userTokens = (user.token for user in iterItems(self.api.listUsers, params=params))
+
+        for (userToken, sources, error) in boundedMap(self.__fetch, userTokens, self.concurrency):
+            self.processed += 1
+
+            if error is not None:
+                self.failed += 1
+                yield UserBalances(userToken, error=error)
+                continue
+
+            result = UserBalances(userToken, sources)
+
+            for (currency, amount) in result.totals.items():
+                self.totals[currency] = self.totals.get(currency, 0) + amount
+
+            yield result
+
+    def aggregate(self,
+                  userTokens=None,
+                  params=None,
+                  onResult=None,
+                  onError=None,
+                  onProgress=None,
+                  progressInterval=100):
+        '''
+        Retrieve the balances of Users and sum them per currency.
+
+        :param userTokens:
+            An iterable of User tokens, all Users of the program are walked with listUsers if not provided.
+        :param params:
+            A dictionary containing query parameters for listUsers.
+        :param onResult:
+            Called with each successful UserBalances.
+        :param onError:
+            Called with each failed UserBalances, the exception is in its error attribute.
+        :param onProgress:
+            Called with the processed and failed counts every progressInterval Users and at the end.
+        :param progressInterval:
+            The number of Users between two onProgress calls.
+        :returns:
+            A dictionary of currency to Decimal amount.
+        '''
+
+        for result in self.iterBalances(userTokens, params):
+            if result.error is not None:
+                if onError is not None:
+                    onError(result)
+            elif onResult is not None:
+                onResult(result)
+
+            if onProgress is not None and self.processed % progressInterval == 0:
+                onProgress(self.processed, self.failed)
+
+        if onProgress is not None:
+            onProgress(self.processed, self.failed)
+
+        return dict(self.totals)
+
+    def __fetch(self, userToken):
+        '''
+        Retrieve the balances of a single User.
+
+        :param userToken:
+            A token identifying the User. **REQUIRED**
+        :returns:
+            A dictionary of source token to a dictionary of currency to Decimal amount.
+        '''
+
+        sources = {userToken: self.__sum(iterItems(self.api.listBalancesForUser, (userToken,)))}
+
+        if self.includePrepaidCards:
+            for prepaidCard in iterItems(self.api.listPrepaidCards, (userToken,)):
+                sources[prepaidCard.token] = self.__sum(
+                    self.api.listBalancesForPrepaidCard(userToken, prepaidCard.token)
+                )
+
+        return sources
+
+    def __sum(self, balances):
+        amounts = {}
+
+        for balance in balances:
+            if balance.amount is None:
+                continue
+
+            amounts[balance.currency] = amounts.get(balance.currency, 0) + toDecimal(balance.amount)
+
+        return amounts
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+import collections
+import threading
+import time
+
+
+class WebhookDeduplicator(object):
+    '''
+    Drop Webhooks seen within a time window, keyed on the Webhook token.
+
+    Tokens are kept in exact sets rotated over the window, so there are no
+    false positives: a Webhook is only reported as a duplicate if its token
+    was seen before. A token is remembered for at least window seconds and
+    at most window plus one bucket width.
+
+    The number of remembered tokens is capped by maxTokens. When the cap is
+    reached the oldest bucket is dropped early, which shortens the window
+    instead of growing memory, the dropped tokens are counted in evicted.
+
+    :param window:
+        The number of seconds a token is remembered.
+    :param buckets:
+        The number of sets the window is divided into.
+    :param maxTokens:
+        The maximum number of remembered tokens.
+    :param clock:
+        Callable returning the current time in seconds.
+    '''
+
+    def __init__(self, window=3600, buckets=6, maxTokens=1000000, clock=time.time):
+        '''
+        Create a new WebhookDeduplicator.
+        '''
+
+        if window <= 0 or buckets < 1 or maxTokens < 1:
+            raise ValueError('window, buckets and maxTokens must be positive')
+
+        self.window = window
+        self.width = float(window) / buckets
+        self.maxTokens = maxTokens
+        self.clock = clock
+
+        self.accepted = 0
+        self.duplicates = 0
+        self.evicted = 0
+
+        # (start, tokens) from the oldest to the current bucket.
+        self.__buckets = collections.deque()
+        self.__size = 0
+        self.__lock = threading.Lock()
+
+    def seen(self, webhook):
+        '''
+        Check a Webhook and remember its token.
+
+        :param webhook:
+            A Webhook or a Webhook token. **REQUIRED**
+        :returns:
+            True if the token was seen within the window, False otherwise.
+        '''
+
+        token = getattr(webhook, 'token', webhook)
+
+        with self.__lock:
+            current = self.__rotate(self.clock())
+
+            for (start, tokens) in self.__buckets:
+                if token in tokens:
+                    self.duplicates += 1
+                    return True
+
+            current.add(token)
+            self.__size += 1
+            self.accepted += 1
+
+            self.__evict()
+
+            return False
+
+    def filter(self, webhooks):
+        '''
+        Drop the duplicates of an iterable of Webhooks.
+
+        :param webhooks:
+            An iterable of Webhooks. **REQUIRED**
+        :returns:
+            A generator of the Webhooks not seen before.
+        '''
+
+        return (webhook for webhook in webhooks if not self.seen(webhook))
+
+    def wrap(self, handler):
+        '''
+        Wrap a handler so that it is only called once per Webhook token.
+
+        The token is remembered before the handler is called, so a Webhook
+        delivered again while it is handled is dropped. If the handler raises,
+        the token is forgotten so the next delivery is handled again.
+
+        :param handler:
+            Called with each Webhook not seen before. **REQUIRED**
+        :returns:
+            The wrapping handler.
+        '''
+
+        def deduplicated(webhook):
+            if self.seen(webhook):
+                return None
+
+            try:
+                return handler(webhook)
+            except Exception:
+                self.forget(webhook)
+                raise
+
+        return deduplicated
+
+    def forget(self, webhook):
+        '''
+        Forget the token of a Webhook, for example when it failed to be handled.
+
+        :param webhook:
+            A Webhook or a Webhook token. **REQUIRED**
+        :returns:
+            True if the token was remembered, False otherwise.
+        '''
+
+        token = getattr(webhook, 'token', webhook)
+
+        with self.__lock:
+            for (start, tokens) in self.__buckets:
+                if token in tokens:
+                    tokens.remove(token)
+                    self.__size -= 1
+                    return True
+
+            return False
+
+    def clear(self):
+        '''
+        Forget every token.
+        '''
+
+        with self.__lock:
+            self.__buckets.clear()
+            self.__size = 0
+
+    def __contains__(self, webhook):
+        token = getattr(webhook, 'token', webhook)
+
+        with self.__lock:
+            self.__rotate(self.clock())
+
+            return any(token in tokens for (start, tokens) in self.__buckets)
+
+    def __len__(self):
+        with self.__lock:
+            self.__rotate(self.clock())
+
+            return self.__size
+
+    def __rotate(self, now):
+        '''
+        Drop the buckets older than the window and return the current bucket.
+        '''
+
+        while self.__buckets and self.__buckets[0][0] + self.width <= now - self.window:
+            self.__size -= len(self.__buckets.popleft()[1])
+
+        if not self.__buckets or self.__buckets[-1][0] + self.width <= now:
+            self.__buckets.append((now - now % self.width, set()))
+
+        return self.__buckets[-1][1]
+
+    def __evict(self):
+        # The current bucket itself is dropped when it alone exceeds the cap.
+        while self.__size > self.maxTokens:
+            tokens = self.__buckets.popleft()[1]
+
+            self.__size -= len(tokens)
+            self.evicted += len(tokens)
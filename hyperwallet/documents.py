@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+import os
+import threading
+
+from hyperwallet.utils.concurrency import boundedMap
+
+
+class ByteBudget(object):
+    '''
+    Limit the number of bytes held by concurrent operations.
+
+    :param maxBytes:
+        The maximum number of bytes in flight. **REQUIRED**
+    '''
+
+    def __init__(self, maxBytes):
+        '''
+        Create a new ByteBudget.
+        '''
+
+        self.maxBytes = maxBytes
+        self.inFlight = 0
+        self.__condition = threading.Condition()
+
+    def acquire(self, size):
+        '''
+        Wait until size bytes fit in the budget. A single operation larger than
+        the budget is admitted once nothing else is in flight.
+
+        :param size:
+            The number of bytes to reserve. **REQUIRED**
+        '''
+
+        with self.__condition:
+            while self.inFlight and self.inFlight + size > self.maxBytes:
+                self.__condition.wait()
+
+            self.inFlight += size
+
+    def release(self, size):
+        '''
+        Return bytes to the budget.
+
+        :param size:
+            The number of bytes reserved by acquire. **REQUIRED**
+        '''
+
+        with self.__condition:
+            self.inFlight -= size
+            self.__condition.notify_all()
+
+
+def getUploadSize(files):
+    '''
+    Estimate the number of bytes of the files of an upload.
+
+    :param files:
+        A dictionary of form field name to file object, path, bytes or tuple.
+    :returns:
+        The total size in bytes, files of unknown size count as 0.
+    '''
+
+    size = 0
+
+    for value in (files or {}).values():
+        if isinstance(value, (list, tuple)):
+            value = value[1]
+
+        if isinstance(value, str):
+            size += os.path.getsize(value) if os.path.isfile(value) else 0
+            continue
+
+        if isinstance(value, (bytes, bytearray)):
+            size += len(value)
+            continue
+
+        try:
+            size += os.fstat(value.fileno()).st_size - value.tell()
+            continue
+        except Exception:
+            pass
+
+        try:
+            position = value.tell()
+            value.seek(0, os.SEEK_END)
+            size += value.tell() - position
+            value.seek(position)
+        except Exception:
+            size += getattr(value, 'len', 0) or 0
+
+    return size
+
+
+class DocumentUploadResult(object):
+    '''
+    The outcome of uploading the documents of a single User.
+
+    :param userToken:
+        A token identifying the User.
+    :param user:
+        The User returned by the API, None when the upload failed.
+    :param error:
+        The exception raised by the upload, if any.
+    :param size:
+        The number of bytes uploaded.
+    '''
+
+    def __init__(self, userToken, user=None, error=None, size=0):
+        '''
+        Create a new DocumentUploadResult.
+        '''
+
+        self.userToken = userToken
+        self.user = user
+        self.error = error
+        self.size = size
+
+    @property
+    def reasons(self):
+        '''
+        The rejection reasons of the uploaded documents.
+
+        :returns:
+            An array of (document type, RejectReason, description) tuples.
+        '''
+
+        reasons = []
+
+        for document in (getattr(self.user, 'documents', None) or []):
+            for reason in (getattr(document, 'reasons', None) or []):
+                reasons.append((document.type, reason.name, reason.description))
+
+        return reasons
+
+    @property
+    def successful(self):
+        return self.error is None and not self.reasons
+
+    def __repr__(self):
+        return "DocumentUploadResult({userToken}, {status})".format(
+            userToken=self.userToken,
+            status='FAILED' if self.error is not None else ('REJECTED' if self.reasons else 'UPLOADED')
+        )
+
+
+class BulkDocumentUploader(object):
+    '''
+    Upload verification documents for many Users concurrently.
+
+    Jobs are pulled from their iterable only when the number of concurrent
+    uploads and the number of bytes in flight allow it, so memory use stays
+    bounded whatever the number of jobs.
+
+    :param api:
+        The Api instance used to upload documents. **REQUIRED**
+    :param concurrency:
+        The number of concurrent uploads.
+    :param maxBytesInFlight:
+        The maximum number of file bytes being uploaded at the same time.
+    '''
+
+    def __init__(self, api, concurrency=4, maxBytesInFlight=64 * 1024 * 1024):
+        '''
+        Create a new BulkDocumentUploader.
+        '''
+
+        self.api = api
+        self.concurrency = concurrency
+        self.budget = ByteBudget(maxBytesInFlight)
+
+        self.uploaded = 0
+        self.rejected = 0
+        self.failed = 0
+
+    def upload(self, jobs):
+        '''
+        Upload documents and yield the results as they complete.
+
+        :param jobs:
+            An iterable of ``(userToken, data, files)`` tuples as accepted by uploadDocumentsForUser. **REQUIRED**
+        :returns:
+            A generator of DocumentUploadResults.
+        '''
+
+        for (job, result, error) in boundedMap(self.__upload, self.__admit(jobs), self.concurrency, self.concurrency):
+            if error is not None:
+                self.failed += 1
+                yield DocumentUploadResult(job[0][0], error=error, size=job[1])
+                continue
+
+            if result.reasons:
+                self.rejected += 1
+            else:
+                self.uploaded += 1
+
+            yield result
+
+    def __admit(self, jobs):
+        for job in jobs:
+            size = getUploadSize(job[2])
+            self.budget.acquire(size)
+
+            yield (job, size)
+
+    def __upload(self, admitted):
+        ((userToken, data, files), size) = admitted
+
+        try:
+            user = self.api.uploadDocumentsForUser(userToken, data, files)
+        finally:
+            self.budget.release(size)
+
+        return DocumentUploadResult(userToken, user, size=size)
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+
+import datetime
+import glob
+import json
+import os
+import threading
+
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.models import Webhook
+
+
+SEGMENT_PATTERN = 'segment-{:08d}.jsonl'
+
+
+def toTimestamp(value):
+    '''
+    Convert a createdOn bound to the ISO string format of the API.
+
+    :param value:
+        A datetime or an ISO string.
+    :returns:
+        The ISO string, or None.
+    '''
+
+    if isinstance(value, datetime.datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+
+    return value
+
+
+class _Block(object):
+    '''
+    The sparse index entry of a block of consecutive events in a segment.
+    '''
+
+    def __init__(self, offset, end=None, count=0, minCreatedOn=None, maxCreatedOn=None, objectTokens=()):
+        self.offset = offset
+        self.end = offset if end is None else end
+        self.count = count
+        self.minCreatedOn = minCreatedOn
+        self.maxCreatedOn = maxCreatedOn
+        self.objectTokens = set(objectTokens)
+
+    def add(self, record, end):
+        createdOn = record.get('createdOn')
+
+        if createdOn is not None:
+            if self.minCreatedOn is None or createdOn < self.minCreatedOn:
+                self.minCreatedOn = createdOn
+
+            if self.maxCreatedOn is None or createdOn > self.maxCreatedOn:
+                self.maxCreatedOn = createdOn
+
+        if record.get('objectToken') is not None:
+            self.objectTokens.add(record['objectToken'])
+
+        self.count += 1
+        self.end = end
+
+    def matches(self, start, end, objectToken):
+        if objectToken is not None and objectToken not in self.objectTokens:
+            return False
+
+        # Events without createdOn are never excluded by the time range.
+        if self.minCreatedOn is None:
+            return True
+
+        if start is not None and self.maxCreatedOn < start:
+            return False
+
+        if end is not None and self.minCreatedOn >= end:
+            return False
+
+        return True
+
+    def asDict(self):
+        return {
+            'offset': self.offset,
+            'end': self.end,
+            'count': self.count,
+            'minCreatedOn': self.minCreatedOn,
+            'maxCreatedOn': self.maxCreatedOn,
+            'objectTokens': sorted(self.objectTokens)
+        }
+
+
+class WebhookEventStore(object):
+    '''
+    Append-only local log of Webhook notifications.
+
+    Events are appended as JSON lines to numbered segment files in a
+    directory, a new segment is started when the current one reaches
+    segmentSize bytes. Every blockSize events and at the end of a segment,
+    the offsets, the createdOn range and the object tokens of the block are
+    appended to the index file of the segment. Replays only read the blocks
+    that can contain matching events.
+
+    Each line holds the token, type, createdOn and object token of the event
+    and the raw notification as returned by the API.
+
+    :param directory:
+        The directory of the segment and index files, created if missing. **REQUIRED**
+    :param segmentSize:
+        The size in bytes after which a new segment is started.
+    :param blockSize:
+        The number of events in a block of the index.
+    :param sync:
+        Whether to fsync the segment after every append.
+    '''
+
+    def __init__(self, directory, segmentSize=64 * 1024 * 1024, blockSize=256, sync=False):
+        '''
+        Create a new WebhookEventStore.
+        '''
+
+        if segmentSize < 1 or blockSize < 1:
+            raise ValueError('segmentSize and blockSize must be positive')
+
+        self.directory = directory
+        self.segmentSize = segmentSize
+        self.blockSize = blockSize
+        self.sync = sync
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        # {segment number: [_Block]}, the last block of the last segment is open.
+        self.segments = {}
+
+        self.__file = None
+        self.__lock = threading.Lock()
+
+        for path in sorted(glob.glob(os.path.join(directory, 'segment-*.jsonl'))):
+            number = int(os.path.basename(path)[8:-6])
+            self.segments[number] = self.__readIndex(number)
+
+        self.__open(max(self.segments) if self.segments else 1)
+
+    def append(self, webhook):
+        '''
+        Append a Webhook.
+
+        :param webhook:
+            A Webhook or the dictionary of a notification. **REQUIRED**
+        '''
+
+        self.appendMany([webhook])
+
+    def appendMany(self, webhooks):
+        '''
+        Append Webhooks with a single write per segment.
+
+        :param webhooks:
+            An iterable of Webhooks or dictionaries of notifications. **REQUIRED**
+        '''
+
+        with self.__lock:
+            if self.__file is None:
+                raise HyperwalletException('Event store is closed')
+
+            lines = []
+
+            for webhook in webhooks:
+                if isinstance(webhook, dict):
+                    webhook = Webhook(webhook)
+
+                record = {
+                    'token': webhook.token,
+                    'type': webhook.type,
+                    'createdOn': webhook.createdOn,
+                    'objectToken': self.__objectToken(webhook),
+                    'webhook': webhook._raw_json
+                }
+                line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+                block = self.segments[self.number][-1]
+                block.add(record, block.end + len(line))
+                lines.append(line)
+
+                if block.count >= self.blockSize or block.end >= self.segmentSize:
+                    self.__write(lines)
+                    lines = []
+
+                    self.__closeBlock()
+
+            self.__write(lines)
+
+    def replay(self, start=None, end=None, objectToken=None, raw=False):
+        '''
+        Stream the stored events in the order they were appended.
+
+        :param start:
+            Only events created on or after this datetime or ISO string.
+        :param end:
+            Only events created before this datetime or ISO string.
+        :param objectToken:
+            Only events of the object with this token, for example a User token.
+        :param raw:
+            Whether to return the dictionaries of the notifications instead of Webhooks.
+        :returns:
+            A generator of Webhooks.
+        '''
+
+        start = toTimestamp(start)
+        end = toTimestamp(end)
+
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+
+            # Snapshot of the index, events appended during the replay are not returned.
+            segments = [
+                (number, [(block.offset, block.end) for block in blocks if block.count and block.matches(start, end, objectToken)])
+                for (number, blocks) in sorted(self.segments.items())
+            ]
+
+        # Lines of other objects are skipped without decoding them.
+        needle = None
+
+        if objectToken is not None:
+            needle = '"objectToken":{},'.format(json.dumps(objectToken)).encode('utf-8')
+
+        for (number, blocks) in segments:
+            if not blocks:
+                continue
+
+            with open(self.__segmentPath(number), 'rb') as f:
+                for (offset, blockEnd) in blocks:
+                    f.seek(offset)
+
+                    for line in f.read(blockEnd - offset).splitlines():
+                        if needle is not None and needle not in line:
+                            continue
+
+                        record = json.loads(line)
+
+                        if objectToken is not None and record.get('objectToken') != objectToken:
+                            continue
+
+                        createdOn = record.get('createdOn')
+
+                        if createdOn is not None:
+                            if start is not None and createdOn < start:
+                                continue
+
+                            if end is not None and createdOn >= end:
+                                continue
+
+                        yield record['webhook'] if raw else Webhook(record['webhook'])
+
+    def count(self):
+        '''
+        The number of stored events.
+        '''
+
+        with self.__lock:
+            return sum(block.count for blocks in self.segments.values() for block in blocks)
+
+    def flush(self):
+        '''
+        Write the appended events to disk.
+        '''
+
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.flush()
+                os.fsync(self.__file.fileno())
+
+    def close(self):
+        '''
+        Close the current segment. The index of its open block is rebuilt on the next open.
+        '''
+
+        with self.__lock:
+            if self.__file is not None:
+                self.__file.close()
+                self.__file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __objectToken(self, webhook):
+        raw = webhook._raw_json.get('object')
+
+        return raw.get('token') if isinstance(raw, dict) else None
+
+    def __segmentPath(self, number):
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(number))
+
+    def __indexPath(self, number):
+        return self.__segmentPath(number)[:-6] + '.index'
+
+    def __readIndex(self, number):
+        blocks = []
+        indexPath = self.__indexPath(number)
+
+        if os.path.isfile(indexPath):
+            with open(indexPath) as f:
+                for line in f:
+                    try:
+                        blocks.append(_Block(**json.loads(line)))
+                    except ValueError:
+                        # A crash left an incomplete last entry, its events are indexed again on open.
+                        self.__writeIndex(number, blocks)
+                        break
+
+        return blocks
+
+    def __writeIndex(self, number, blocks):
+        temporaryPath = self.__indexPath(number) + '.tmp'
+
+        with open(temporaryPath, 'w') as f:
+            f.write(''.join(json.dumps(block.asDict(), separators=(',', ':')) + '\n' for block in blocks))
+
+        os.replace(temporaryPath, self.__indexPath(number))
+
+    def __open(self, number):
+        '''
+        Open a segment for appending, indexing the events after its last complete block.
+        '''
+
+        path = self.__segmentPath(number)
+        blocks = self.segments.setdefault(number, [])
+        block = _Block(blocks[-1].end if blocks else 0)
+        blocks.append(block)
+
+        if os.path.isfile(path):
+            with open(path, 'rb+') as f:
+                f.seek(block.offset)
+
+                for line in iter(f.readline, b''):
+                    if not line.endswith(b'\n'):
+                        # A crash left an incomplete last event.
+                        f.truncate(block.end)
+                        break
+
+                    block.add(json.loads(line), block.end + len(line))
+
+        self.number = number
+        self.__file = open(path, 'ab')
+
+        if block.count >= self.blockSize or block.end >= self.segmentSize:
+            self.__closeBlock()
+
+    def __closeBlock(self):
+        block = self.segments[self.number][-1]
+
+        with open(self.__indexPath(self.number), 'a') as f:
+            f.write(json.dumps(block.asDict(), separators=(',', ':')) + '\n')
+
+        if block.end >= self.segmentSize:
+            self.__file.close()
+            self.__open(self.number + 1)
+        else:
+            self.segments[self.number].append(_Block(block.end))
+
+    def __write(self, lines):
+        if not lines:
+            return
+
+        self.__file.write(b''.join(lines))
+        self.__file.flush()
+
+        if self.sync:
+            os.fsync(self.__file.fileno())
@@ -11,11 +11,42 @@ class HyperwalletException(Exception):
         return self.__dict__.get('message', None) or getattr(self, 'args')[0]
 
 
+class HyperwalletInProgressException(HyperwalletException):
+    '''
+    An Exception raised when a create request with the same client id is
+    already in progress, it can be retried once its lease has expired.
+
+    :param kind:
+        The kind of request, for example payments or transfers.
+    :param clientId:
+        The client id of the request.
+    :param leaseExpiresOn:
+        The time after which the request in progress is considered abandoned.
+    '''
+
+    def __init__(self, kind, clientId, leaseExpiresOn):
+        super(HyperwalletInProgressException, self).__init__('{} {} is already in progress'.format(kind, clientId))
+
+        self.kind = kind
+        self.clientId = clientId
+        self.leaseExpiresOn = leaseExpiresOn
+
+
 class HyperwalletAPIException(Exception):
     '''
     An Exception raised when the API response is an error.
+
+    :param message:
+        The error object of the response, or a description of the error.
+    :param statusCode:
+        The HTTP status code of the response, None if no response was received.
     '''
 
+    def __init__(self, message, statusCode=None):
+        super(HyperwalletAPIException, self).__init__(message)
+
+        self.statusCode = statusCode
+
     @property
     def message(self):
         return self.__dict__.get('message', None) or getattr(self, 'args')[0]
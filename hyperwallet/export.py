@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+
+import json
+import os
+
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.frames import _importOptional
+from hyperwallet.models import Payment, Receipt, Transfer, User
+from hyperwallet.utils.paging import iterPages
+
+
+def getExportFormat(path):
+    '''
+    Guess the export format from the extension of a path.
+
+    :param path:
+        The path of the file. **REQUIRED**
+    :returns:
+        'jsonl' or 'parquet'.
+    '''
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+
+    raise HyperwalletException('Unsupported file format = {}'.format(extension))
+
+
+def getColumns(model):
+    '''
+    The columns exported for a model, the attributes it declares.
+
+    :param model:
+        A HyperwalletModel class. **REQUIRED**
+    :returns:
+        A sorted array of column names.
+    '''
+
+    return sorted(model({}).defaults)
+
+
+class JsonLinesWriter(object):
+    '''
+    Write models as JSON lines, one object per line as returned by the API.
+
+    :param target:
+        A path or a text file object. **REQUIRED**
+    '''
+
+    def __init__(self, target):
+        '''
+        Create a new JsonLinesWriter.
+        '''
+
+        self.closeFile = not hasattr(target, 'write')
+        self.file = open(target, 'w') if self.closeFile else target
+
+    def write(self, records):
+        '''
+        Write a page of models and flush it.
+
+        :param records:
+            An array of models or dictionaries. **REQUIRED**
+        '''
+
+        self.file.write(''.join(
+            json.dumps(getattr(record, '_raw_json', record), separators=(',', ':')) + '\n' for record in records
+        ))
+        self.file.flush()
+
+    def close(self):
+        if self.closeFile:
+            self.file.close()
+
+
+class ParquetWriter(object):
+    '''
+    Write models to a Parquet file, one row group per page. Requires pyarrow.
+
+    Every column is a string, nested objects and arrays are stored as JSON.
+
+    :param target:
+        A path or a binary file object. **REQUIRED**
+    :param columns:
+        The array of column names. **REQUIRED**
+    '''
+
+    def __init__(self, target, columns):
+        '''
+        Create a new ParquetWriter.
+        '''
+
+        pyarrow = _importOptional('pyarrow')
+        import pyarrow.parquet
+
+        self.pyarrow = pyarrow
+        self.columns = columns
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(target, self.schema)
+
+    def write(self, records):
+        '''
+        Write a page of models as a row group.
+
+        :param records:
+            An array of models or dictionaries. **REQUIRED**
+        '''
+
+        rows = [getattr(record, '_raw_json', record) for record in records]
+
+        self.writer.write_table(self.pyarrow.Table.from_pydict(
+            dict((column, [self.__toString(row.get(column)) for row in rows]) for column in self.columns),
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+
+    def __toString(self, value):
+        if value is None or isinstance(value, str):
+            return value
+
+        if isinstance(value, (dict, list, tuple)):
+            return json.dumps(value, separators=(',', ':'), sort_keys=True)
+
+        return json.dumps(value)
+
+
+class Exporter(object):
+    '''
+    Export list endpoints to JSON lines or Parquet files.
+
+    Pages are written as soon as they are retrieved, only one page is held
+    in memory whatever the number of records.
+
+    :param api:
+        The Api instance used to list the records. **REQUIRED**
+    :param limit:
+        The page size.
+    '''
+
+    def __init__(self, api, limit=100):
+        '''
+        Create a new Exporter.
+        '''
+
+        self.api = api
+        self.limit = limit
+
+        self.exported = 0
+        self.pages = 0
+
+    def exportReceiptsForAccount(self, programToken, accountToken, target, fileFormat=None, params=None):
+        '''
+        Export the Receipts of a program Account.
+
+        :param programToken:
+            A token identifying the Program. **REQUIRED**
+        :param accountToken:
+            A token identifying the Account. **REQUIRED**
+        :param target:
+            A path or file object. **REQUIRED**
+        :param fileFormat:
+            'jsonl' or 'parquet', guessed from the extension of a path if not provided.
+        :param params:
+            A dictionary containing query parameters.
+        :returns:
+            The number of exported Receipts.
+        '''
+
+        return self.export(self.api.listReceiptsForAccount, (programToken, accountToken), Receipt, target, fileFormat, params)
+
+    def exportReceiptsForUser(self, userToken, target, fileFormat=None, params=None):
+        '''
+        Export the Receipts of a User.
+
+        :param userToken:
+            A token identifying the User. **REQUIRED**
+        :param target:
+            A path or file object. **REQUIRED**
+        :param fileFormat:
+            'jsonl' or 'parquet', guessed from the extension of a path if not provided.
+        :param params:
+            A dictionary containing query parameters.
+        :returns:
+            The number of exported Receipts.
+        '''
+
+        return self.export(self.api.listReceiptsForUser, (userToken,), Receipt, target, fileFormat, params)
+
+    def exportPayments(self, target, fileFormat=None, params=None):
+        '''
+        Export Payments.
+
+        :param target:
+            A path or file object. **REQUIRED**
+        :param fileFormat:
+            'jsonl' or 'parquet', guessed from the extension of a path if not provided.
+        :param params:
+            A dictionary containing query parameters.
+        :returns:
+            The number of exported Payments.
+        '''
+
+        return self.export(self.api.listPayments, (), Payment, target, fileFormat, params)
+
+    def exportTransfers(self, target, fileFormat=None, params=None):
+        '''
+        Export Transfers.
+
+        :param target:
+            A path or file object. **REQUIRED**
+        :param fileFormat:
+            'jsonl' or 'parquet', guessed from the extension of a path if not provided.
+        :param params:
+            A dictionary containing query parameters.
+        :returns:
+            The number of exported Transfers.
+        '''
+
+        return self.export(self.api.listTransfers, (), Transfer, target, fileFormat, params)
+
+    def exportUsers(self, target, fileFormat=None, params=None):
+        '''
+        Export Users.
+
+        :param target:
+            A path or file object. **REQUIRED**
+        :param fileFormat:
+            'jsonl' or 'parquet', guessed from the extension of a path if not provided.
+        :param params:
+            A dictionary containing query parameters.
+        :returns:
+            The number of exported Users.
+        '''
+
+        return self.export(self.api.listUsers, (), User, target, fileFormat, params)
+
+    def export(self, listFunction, args, model, target, fileFormat=None, params=None):
+        '''
+        Export every page of a list endpoint.
+
+        :param listFunction:
+            An Api list method. **REQUIRED**
+        :param args:
+            Positional arguments passed before the query parameters. **REQUIRED**
+        :param model:
+            The model class of the records, its attributes are the Parquet columns. **REQUIRED**
+        :param target:
+            A path or file object. **REQUIRED**
+        :param fileFormat:
+            'jsonl' or 'parquet', guessed from the extension of a path if not provided.
+        :param params:
+            A dictionary containing query parameters.
+        :returns:
+            The number of exported records.
+        '''
+
+        if fileFormat is None:
+            if not isinstance(target, str):
+                raise HyperwalletException('fileFormat is required')
+
+            fileFormat = getExportFormat(target)
+
+        if fileFormat == 'jsonl':
+            writer = JsonLinesWriter(target)
+        elif fileFormat == 'parquet':
+            writer = ParquetWriter(target, getColumns(model))
+        else:
+            raise HyperwalletException('Unsupported file format = {}'.format(fileFormat))
+
+        exported = 0
+
+        try:
+            for page in iterPages(listFunction, args, params, self.limit):
+                writer.write(page)
+
+                exported += len(page)
+                self.exported += len(page)
+                self.pages += 1
+        finally:
+            writer.close()
+
+        return exported
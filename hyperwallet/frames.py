@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.models import toDatetime
+from hyperwallet.utils.currencies import toMinorUnits, fromMinorUnits
+
+
+def _importOptional(name):
+    '''
+    Import an optional dependency or raise a HyperwalletException.
+    '''
+
+    try:
+        return __import__(name)
+    except ImportError:
+        raise HyperwalletException('{} is required for this feature, install it with: pip install {}'.format(name, name))
+
+
+def toMinorUnitsArray(records, field='amount', currencyField=None):
+    '''
+    Decode an amount attribute of many records to minor units at once.
+
+    :param records:
+        An iterable of models or dictionaries as returned by the API. **REQUIRED**
+    :param field:
+        The name of the amount attribute.
+    :param currencyField:
+        The name of the currency attribute, defaults to the one of the model
+        of the first record, or currency for dictionaries.
+    :returns:
+        A NumPy int64 array, missing amounts are 0.
+    '''
+
+    numpy = _importOptional('numpy')
+
+    records = list(records)
+
+    if currencyField is None:
+        currencyField = records[0].getCurrencyField(field) if records and hasattr(records[0], 'getCurrencyField') else 'currency'
+
+    rows = [getattr(record, '_raw_json', record) for record in records]
+
+    return numpy.fromiter((
+        0 if row.get(field) in (None, '') else toMinorUnits(row.get(field), row.get(currencyField))
+        for row in rows
+    ), dtype=numpy.int64, count=len(rows))
+
+
+def toDatetimeArray(records, field='createdOn', unit='s'):
+    '''
+    Decode a timestamp attribute of many records at once.
+
+    :param records:
+        An iterable of models or dictionaries as returned by the API. **REQUIRED**
+    :param field:
+        The name of the timestamp attribute.
+    :param unit:
+        The NumPy datetime unit of the result.
+    :returns:
+        A NumPy datetime64 array in UTC, missing timestamps are NaT.
+    '''
+
+    numpy = _importOptional('numpy')
+
+    values = []
+
+    for record in records:
+        value = getattr(record, '_raw_json', record).get(field)
+
+        if value in (None, ''):
+            value = 'NaT'
+        elif len(value) > 19 and value[19:].strip('.0123456789'):
+            # Timestamps with an offset are converted to UTC first.
+            value = toDatetime(value).replace(tzinfo=None).isoformat()
+
+        values.append(value)
+
+    return numpy.array(values, dtype='datetime64').astype('datetime64[{}]'.format(unit))
+
+
+class ReceiptFrame(object):
+    '''
+    A columnar container for Receipts and Balances backed by NumPy arrays.
+
+    Amounts are stored as int64 minor units of their currency (e.g. 1050 for
+    10.50 USD, missing amounts are stored as 0), categorical fields as int32
+    codes into a list of categories (-1 when missing), createdOn as
+    datetime64 and the remaining fields as object arrays.
+
+    :param columns:
+        A dictionary of column name to NumPy array. **REQUIRED**
+    :param categories:
+        A dictionary of categorical column name to its list of values. **REQUIRED**
+    '''
+
+    amount_fields = ('amount', 'fee')
+    categorical_fields = ('currency', 'type', 'entry')
+    datetime_fields = ('createdOn',)
+    object_fields = ('journalId', 'sourceToken', 'destinationToken', 'foreignExchangeRate', 'foreignExchangeCurrency')
+
+    def __init__(self, columns, categories):
+        '''
+        Create a new ReceiptFrame from prepared columns.
+        '''
+
+        self.columns = columns
+        self.categories = categories
+
+    @classmethod
+    def fromRecords(cls, records):
+        '''
+        Build a ReceiptFrame from Receipt or Balance dictionaries or models.
+
+        :param records:
+            An iterable of dictionaries as returned by the API, or of Receipts/Balances. **REQUIRED**
+        :returns:
+            A ReceiptFrame.
+        '''
+
+        numpy = _importOptional('numpy')
+
+        rows = [getattr(record, '_raw_json', record) for record in records]
+        present = set()
+        for row in rows:
+            present.update(row)
+
+        columns = {}
+        categories = {}
+
+        for field in cls.categorical_fields:
+            if field not in present:
+                continue
+
+            index = {}
+            codes = [-1 if row.get(field) is None else index.setdefault(row.get(field), len(index)) for row in rows]
+            columns[field] = numpy.array(codes, dtype=numpy.int32)
+            categories[field] = list(index)
+
+        currencies = [row.get('currency') for row in rows]
+
+        for field in cls.amount_fields:
+            if field not in present:
+                continue
+
+            columns[field] = numpy.array([
+                0 if row.get(field) in (None, '') else toMinorUnits(row.get(field), currency)
+                for (row, currency) in zip(rows, currencies)
+            ], dtype=numpy.int64)
+
+        for field in cls.datetime_fields:
+            if field not in present:
+                continue
+
+            columns[field] = toDatetimeArray(rows, field)
+
+        for field in cls.object_fields:
+            if field not in present:
+                continue
+
+            column = numpy.empty(len(rows), dtype=object)
+            column[:] = [row.get(field) for row in rows]
+            columns[field] = column
+
+        return cls(columns, categories)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __repr__(self):
+        return "ReceiptFrame({length}, {columns})".format(
+            length=len(self),
+            columns=sorted(self.columns)
+        )
+
+    def decode(self, name):
+        '''
+        Return a categorical column with its values instead of codes.
+
+        :param name:
+            The name of a categorical column. **REQUIRED**
+        :returns:
+            A NumPy object array.
+        '''
+
+        numpy = _importOptional('numpy')
+
+        values = numpy.array(self.categories[name] + [None], dtype=object)
+        return values[self.columns[name]]
+
+    def sumBy(self, by=('currency',), column='amount'):
+        '''
+        Sum an amount column grouped by categorical columns.
+
+        :param by:
+            A list of categorical column names, must contain currency.
+        :param column:
+            The amount column to sum.
+        :returns:
+            A dictionary of group values tuple to Decimal sum.
+        '''
+
+        numpy = _importOptional('numpy')
+
+        by = tuple(by)
+
+        if 'currency' not in by:
+            raise HyperwalletException('currency is required to group amounts')
+
+        if column not in self.columns:
+            return {}
+
+        keys = numpy.stack([self.columns[name] for name in by], axis=1)
+        groups, inverse = numpy.unique(keys, axis=0, return_inverse=True)
+        sums = numpy.zeros(len(groups), dtype=numpy.int64)
+        numpy.add.at(sums, inverse.reshape(-1), self.columns[column])
+
+        currencyPosition = by.index('currency')
+        result = {}
+
+        for (group, total) in zip(groups.tolist(), sums.tolist()):
+            values = tuple(
+                None if code < 0 else self.categories[name][code]
+                for (name, code) in zip(by, group)
+            )
+            result[values] = fromMinorUnits(total, values[currencyPosition])
+
+        return result
+
+    def toPandas(self):
+        '''
+        Convert to a pandas DataFrame, categorical columns become pandas
+        Categoricals sharing the code arrays.
+
+        :returns:
+            A pandas DataFrame.
+        '''
+
+        pandas = _importOptional('pandas')
+
+        data = {}
+        for (name, column) in self.columns.items():
+            if name in self.categories:
+                data[name] = pandas.Categorical.from_codes(column, self.categories[name])
+            else:
+                data[name] = column
+
+        return pandas.DataFrame(data, copy=False)
+
+    def toArrow(self):
+        '''
+        Convert to a pyarrow Table, numeric columns are wrapped without a copy
+        and categorical columns become dictionary arrays.
+
+        :returns:
+            A pyarrow Table.
+        '''
+
+        pyarrow = _importOptional('pyarrow')
+
+        arrays = []
+        names = []
+        for (name, column) in self.columns.items():
+            if name in self.categories:
+                arrays.append(pyarrow.DictionaryArray.from_arrays(
+                    pyarrow.array(column, mask=column < 0),
+                    pyarrow.array(self.categories[name], type=pyarrow.string())
+                ))
+            elif column.dtype.kind == 'O':
+                arrays.append(pyarrow.array(column.tolist()))
+            else:
+                arrays.append(pyarrow.array(column))
+            names.append(name)
+
+        return pyarrow.Table.from_arrays(arrays, names=names)
@@ -0,0 +1,445 @@
+#!/usr/bin/env python
+
+import csv
+import json
+import os
+
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.utils.concurrency import boundedMap
+from hyperwallet.utils.currencies import toDecimal, toMinorUnits
+
+
+SUCCEEDED = 'SUCCEEDED'
+FAILED = 'FAILED'
+INVALID = 'INVALID'
+
+REQUIRED_FIELDS = ('clientPaymentId', 'amount', 'currency', 'destinationToken')
+
+
+def getFileFormat(path):
+    '''
+    Guess the format of a payment file from its extension.
+
+    :param path:
+        The path of the file. **REQUIRED**
+    :returns:
+        'csv' or 'jsonl'.
+    '''
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        return 'csv'
+
+    if extension in ('.jsonl', '.ndjson', '.json'):
+        return 'jsonl'
+
+    raise HyperwalletException('Unsupported file format = {}'.format(extension))
+
+
+def readRows(path, fileFormat=None, offset=0):
+    '''
+    Stream the rows of a CSV or JSON lines file.
+
+    The file is read line by line, only the current row is held in memory.
+    CSV files must have a header line, quoted values may span several lines.
+
+    :param path:
+        The path of the file. **REQUIRED**
+    :param fileFormat:
+        'csv' or 'jsonl', guessed from the extension if not provided.
+    :param offset:
+        The byte offset of the first row to read, as returned for a previous row.
+    :returns:
+        A generator of ``(offset, nextOffset, record)`` tuples, record is a dictionary,
+        or the exception raised while parsing the row. The nextOffset of a row is
+        the offset of the following one.
+    '''
+
+    fileFormat = fileFormat or getFileFormat(path)
+
+    with open(path, 'rb') as f:
+        header = None
+
+        if fileFormat == 'csv':
+            header = next(csv.reader([f.readline().decode('utf-8-sig')]), None)
+
+            if not header:
+                return
+
+        if offset > f.tell():
+            f.seek(offset)
+
+        # Blank lines belong to the row after them, so consecutive rows
+        # cover the file without gaps.
+        start = f.tell()
+
+        while True:
+            line = f.readline()
+
+            if not line:
+                return
+
+            if fileFormat == 'csv':
+                # A quoted value containing a line break continues on the next line.
+                while line.count(b'"') % 2:
+                    more = f.readline()
+
+                    if not more:
+                        break
+
+                    line += more
+
+            if not line.strip():
+                continue
+
+            try:
+                record = parseRow(line.decode('utf-8'), fileFormat, header)
+            except Exception as e:
+                record = e
+
+            end = f.tell()
+
+            yield (start, end, record)
+
+            start = end
+
+
+def parseRow(line, fileFormat, header=None):
+    '''
+    Parse a single row.
+
+    :param line:
+        The text of the row. **REQUIRED**
+    :param fileFormat:
+        'csv' or 'jsonl'. **REQUIRED**
+    :param header:
+        The column names of a CSV file.
+    :returns:
+        A dictionary.
+    '''
+
+    if fileFormat == 'jsonl':
+        record = json.loads(line)
+
+        if not isinstance(record, dict):
+            raise HyperwalletException('Row must be a JSON object')
+
+        return record
+
+    values = next(csv.reader([line]))
+
+    if len(values) != len(header):
+        raise HyperwalletException('Row has {} values, expected {}'.format(len(values), len(header)))
+
+    return dict(zip(header, values))
+
+
+def toPaymentData(record, defaults=None):
+    '''
+    Validate a row and convert it to the data of createPayment.
+
+    Empty values are dropped, defaults fill the missing fields.
+
+    :param record:
+        A dictionary read from the file. **REQUIRED**
+    :param defaults:
+        A dictionary of default Payment fields, for example programToken and purpose.
+    :returns:
+        A dictionary containing Payment information.
+    '''
+
+    data = dict(defaults or {})
+    data.update((name, value) for (name, value) in record.items() if value not in (None, ''))
+
+    for field in REQUIRED_FIELDS:
+        if not data.get(field):
+            raise HyperwalletException('{} is required'.format(field))
+
+    data['currency'] = str(data['currency']).upper()
+
+    if toDecimal(data['amount']) <= 0:
+        raise HyperwalletException('Invalid amount = {}'.format(data['amount']))
+
+    toMinorUnits(data['amount'], data['currency'])
+    data['amount'] = str(data['amount'])
+
+    return data
+
+
+class PaymentIngest(object):
+    '''
+    Create Payments from a CSV or JSON lines file.
+
+    Rows are streamed from the file, validated, and sent with createPayment
+    on a bounded thread pool, so memory use does not depend on the file
+    size. The outcome of every row is appended to a JSON lines results file.
+
+    The checkpoint file records the byte offset up to which every row is
+    done. Rows complete out of order, rows after the checkpoint that are
+    already in the results file are skipped when a run is resumed. Rows that
+    were in flight when the previous run stopped, or whose results were not
+    yet synced to disk, may have been created without being in the results
+    file. On resume, the first rows missing from the results file, up to
+    checkpointInterval plus twice the concurrency of the previous run, are
+    looked up with listPayments by their clientPaymentId before they are
+    sent, so no row is sent twice.
+
+    :param api:
+        The Api instance used to create Payments. **REQUIRED**
+    :param path:
+        The path of the CSV or JSON lines file. **REQUIRED**
+    :param resultsPath:
+        The path of the JSON lines results file. **REQUIRED**
+    :param checkpointPath:
+        The path of the checkpoint file, defaults to resultsPath with a .checkpoint suffix.
+    :param fileFormat:
+        'csv' or 'jsonl', guessed from the extension if not provided.
+    :param concurrency:
+        The number of concurrent requests.
+    :param defaults:
+        A dictionary of default Payment fields, programToken defaults to the one of the Api.
+    :param convert:
+        Callable converting a row to the data of createPayment, defaults to toPaymentData.
+    :param checkpointInterval:
+        The number of completed rows between two checkpoints.
+    '''
+
+    def __init__(self,
+                 api,
+                 path,
+                 resultsPath,
+                 checkpointPath=None,
+                 fileFormat=None,
+                 concurrency=8,
+                 defaults=None,
+                 convert=None,
+                 checkpointInterval=1000):
+        '''
+        Create a new PaymentIngest.
+        '''
+
+        self.api = api
+        self.path = path
+        self.resultsPath = resultsPath
+        self.checkpointPath = checkpointPath or resultsPath + '.checkpoint'
+        self.fileFormat = fileFormat or getFileFormat(path)
+        self.concurrency = concurrency
+        self.checkpointInterval = checkpointInterval
+
+        self.defaults = {'programToken': getattr(api, 'programToken', None), 'purpose': 'OTHER'}
+        self.defaults.update(defaults or {})
+        self.convert = convert or (lambda record: toPaymentData(record, self.defaults))
+
+        self.succeeded = 0
+        self.failed = 0
+        self.invalid = 0
+        self.skipped = 0
+        self.offset = 0
+
+        self.__lookups = set()
+        self.__uncertain = 0
+
+    def run(self, onProgress=None):
+        '''
+        Create the Payments of every row after the checkpoint.
+
+        :param onProgress:
+            Called with the counts every time a checkpoint is written.
+        :returns:
+            A dictionary with the number of succeeded, failed, invalid and skipped rows.
+        '''
+
+        checkpoint = self.__readCheckpoint()
+        self.offset = checkpoint.get('offset', 0)
+        done = self.__readDone(self.offset)
+
+        # Rows are submitted in file order, so the rows the previous run may
+        # have sent without recording them are among the first maxUnrecorded
+        # rows missing from the results file.
+        self.__lookups = set()
+        self.__uncertain = checkpoint.get('maxUnrecorded', 0)
+
+        # Offsets of completed rows after the checkpoint, bounded by the
+        # number of rows in flight.
+        completed = {}
+        sinceCheckpoint = 0
+
+        rows = (row for row in self.__readRows() if not self.__skip(row, done, completed))
+
+        with open(self.resultsPath, 'a') as results:
+            if not self.__endsWithNewline():
+                # A crash left an incomplete last line.
+                results.write('\n')
+
+            # Written before any row is sent, a crash from now on is resumed with lookups.
+            self.__checkpoint(results, completed)
+
+            for (row, result, error) in boundedMap(self.__submit, rows, self.concurrency):
+                results.write(json.dumps(self.__result(row, result, error), separators=(',', ':')) + '\n')
+
+                # A process that is killed loses no result, the results are
+                # only synced to disk at checkpoints.
+                results.flush()
+
+                completed[row[0]] = row[1]
+                sinceCheckpoint += 1
+
+                if sinceCheckpoint >= self.checkpointInterval:
+                    self.__checkpoint(results, completed)
+                    sinceCheckpoint = 0
+
+                    if onProgress is not None:
+                        onProgress(self.counts)
+
+            self.__checkpoint(results, completed)
+
+        if onProgress is not None:
+            onProgress(self.counts)
+
+        return self.counts
+
+    @property
+    def counts(self):
+        return {
+            SUCCEEDED: self.succeeded,
+            FAILED: self.failed,
+            INVALID: self.invalid,
+            'SKIPPED': self.skipped
+        }
+
+    def __readRows(self):
+        first = True
+
+        for row in readRows(self.path, self.fileFormat, self.offset):
+            if first:
+                # The first row starts after the CSV header.
+                self.offset = row[0]
+                first = False
+
+            yield row
+
+    def __skip(self, row, done, completed):
+        if row[0] not in done:
+            if self.__uncertain > 0:
+                self.__lookups.add(row[0])
+                self.__uncertain -= 1
+
+            return False
+
+        self.skipped += 1
+        completed[row[0]] = row[1]
+
+        return True
+
+    def __submit(self, row):
+        (offset, nextOffset, record) = row
+
+        if isinstance(record, Exception):
+            raise _InvalidRow(record)
+
+        try:
+            data = self.convert(record)
+        except Exception as e:
+            raise _InvalidRow(e)
+
+        if offset in self.__lookups:
+            payments = self.api.listPayments({'clientPaymentId': data['clientPaymentId']})
+
+            if payments:
+                return payments[0]
+
+        return self.api.createPayment(data)
+
+    def __result(self, row, payment, error):
+        (offset, nextOffset, record) = row
+        result = {'offset': offset}
+
+        if isinstance(record, dict):
+            result['clientPaymentId'] = record.get('clientPaymentId')
+
+        if error is None:
+            self.succeeded += 1
+            result.update(status=SUCCEEDED, token=payment.token)
+        elif isinstance(error, _InvalidRow):
+            self.invalid += 1
+            result.update(status=INVALID, error=str(error.args[0]))
+        else:
+            self.failed += 1
+            result.update(status=FAILED, error=getattr(error, 'message', None) or str(error))
+
+        return result
+
+    def __checkpoint(self, results, completed):
+        '''
+        Advance the checkpoint over the rows completed without gap.
+        '''
+
+        while self.offset in completed:
+            self.offset = completed.pop(self.offset)
+
+        # The results must be on disk before the checkpoint moves past them.
+        results.flush()
+        os.fsync(results.fileno())
+
+        temporaryPath = self.checkpointPath + '.tmp'
+
+        with open(temporaryPath, 'w') as f:
+            json.dump({'path': self.path, 'offset': self.offset, 'maxUnrecorded': self.__maxUnrecorded()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporaryPath, self.checkpointPath)
+
+    def __maxUnrecorded(self):
+        '''
+        The number of rows that may be sent without being in the results
+        file after a crash: the rows completed since the last checkpoint, not
+        yet synced to disk, and the rows in flight.
+        '''
+
+        return self.checkpointInterval + self.concurrency * 2
+
+    def __endsWithNewline(self):
+        if not os.path.isfile(self.resultsPath) or not os.path.getsize(self.resultsPath):
+            return True
+
+        with open(self.resultsPath, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def __readCheckpoint(self):
+        if not os.path.isfile(self.checkpointPath):
+            return {}
+
+        with open(self.checkpointPath) as f:
+            return json.load(f)
+
+    def __readDone(self, offset):
+        '''
+        Read the offsets of the rows after the checkpoint already in the results file.
+        '''
+
+        done = set()
+
+        if not os.path.isfile(self.resultsPath):
+            return done
+
+        with open(self.resultsPath) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # The last line may be incomplete after a crash.
+                    continue
+
+                if result.get('offset', -1) >= offset:
+                    done.add(result['offset'])
+
+        return done
+
+
+class _InvalidRow(Exception):
+    '''
+    Wrap the error of a row that could not be converted to a Payment.
+    '''
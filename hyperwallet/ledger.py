@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+
+import json
+import sqlite3
+import threading
+import time
+
+from hyperwallet.exceptions import HyperwalletException, HyperwalletAPIException, HyperwalletInProgressException
+
+
+PENDING = 'PENDING'
+SUCCEEDED = 'SUCCEEDED'
+FAILED = 'FAILED'
+
+# API errors for which the request may have reached the API.
+AMBIGUOUS_ERROR_CODES = frozenset(['COMMUNICATION_ERROR', 'GARBAGE_RESPONSE'])
+
+
+def isAmbiguousError(error):
+    '''
+    Whether a create request that raised an error may have reached the API.
+
+    Only client errors, a 4xx response with a JSON error code, are known to
+    have failed. Connection errors, server errors and responses that are not
+    JSON, for example the HTML page of a proxy timeout, may have landed.
+
+    :param error:
+        The exception raised by the request. **REQUIRED**
+    :returns:
+        True if the outcome of the request must be looked up, False if it failed.
+    '''
+
+    if not isinstance(error, HyperwalletAPIException):
+        return True
+
+    statusCode = getattr(error, 'statusCode', None)
+
+    if statusCode is not None and statusCode >= 500:
+        return True
+
+    errors = error.message.get('errors') if isinstance(error.message, dict) else None
+    code = errors[0].get('code') if errors and isinstance(errors[0], dict) else None
+
+    return code is None or code in AMBIGUOUS_ERROR_CODES
+
+
+class LedgerEntry(object):
+    '''
+    The recorded state of a create request.
+
+    :param kind:
+        The kind of request, for example payments or transfers.
+    :param clientId:
+        The client id of the request (clientPaymentId or clientTransferId).
+    :param state:
+        One of PENDING, SUCCEEDED or FAILED.
+    :param response:
+        The API response of a succeeded request.
+    :param error:
+        The API error of a failed request.
+    :param leaseExpiresOn:
+        The time after which a pending request is considered abandoned.
+    :param claimed:
+        True when the caller of begin now owns the request and must complete it.
+    :param ambiguous:
+        True when an earlier attempt may have reached the API, its outcome must be looked up first.
+    '''
+
+    def __init__(self,
+                 kind,
+                 clientId,
+                 state,
+                 response=None,
+                 error=None,
+                 leaseExpiresOn=None,
+                 claimed=False,
+                 ambiguous=False):
+        '''
+        Create a new LedgerEntry.
+        '''
+
+        self.kind = kind
+        self.clientId = clientId
+        self.state = state
+        self.response = response
+        self.error = error
+        self.leaseExpiresOn = leaseExpiresOn
+        self.claimed = claimed
+        self.ambiguous = ambiguous
+
+    def __repr__(self):
+        return "LedgerEntry({kind}, {clientId}, {state})".format(
+            kind=self.kind,
+            clientId=self.clientId,
+            state=self.state
+        )
+
+
+class IdempotencyLedger(object):
+    '''
+    Record the state of create requests keyed on their client id.
+
+    The ledger is a SQLite database, every state change is a transaction so
+    several threads and processes can share the same file. A request is
+    claimed with a lease before it is sent. When a process dies or a call
+    times out the request stays pending, once its lease has expired the next
+    attempt is told to look the outcome up before sending the request again.
+
+    :param path:
+        The path of the SQLite database, defaults to an in-memory database.
+    :param leaseSeconds:
+        How long a pending request is owned by the attempt that claimed it.
+    :param timeout:
+        Seconds to wait for a lock held by another process.
+    '''
+
+    def __init__(self, path=':memory:', leaseSeconds=300, timeout=30):
+        '''
+        Create a new IdempotencyLedger.
+        '''
+
+        self.path = path
+        self.leaseSeconds = leaseSeconds
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.__connection.execute(
+            'CREATE TABLE IF NOT EXISTS ledger ('
+            'kind TEXT NOT NULL, '
+            'clientId TEXT NOT NULL, '
+            'state TEXT NOT NULL, '
+            'response TEXT, '
+            'error TEXT, '
+            'leaseExpiresOn REAL, '
+            'updatedOn REAL NOT NULL, '
+            'PRIMARY KEY (kind, clientId))'
+        )
+        self.__connection.execute('CREATE INDEX IF NOT EXISTS ledger_updatedOn ON ledger (updatedOn)')
+
+    def begin(self, kind, clientId):
+        '''
+        Claim a request before sending it.
+
+        :param kind:
+            The kind of request. **REQUIRED**
+        :param clientId:
+            The client id of the request. **REQUIRED**
+        :returns:
+            A LedgerEntry. A claimed entry must be completed with succeed, fail or abandon,
+            a SUCCEEDED entry holds the response of the earlier request.
+        :raises HyperwalletInProgressException:
+            When the request is claimed by another attempt whose lease has not expired.
+        '''
+
+        if not clientId:
+            raise HyperwalletException('clientId is required')
+
+        now = time.time()
+
+        with self.__transaction() as cursor:
+            entry = self.__select(cursor, kind, clientId)
+
+            if entry is not None and entry.state == SUCCEEDED:
+                return entry
+
+            if entry is not None and entry.state == PENDING and entry.leaseExpiresOn > now:
+                raise HyperwalletInProgressException(kind, clientId, entry.leaseExpiresOn)
+
+            cursor.execute(
+                'INSERT OR REPLACE INTO ledger (kind, clientId, state, response, error, leaseExpiresOn, updatedOn) '
+                'VALUES (?, ?, ?, NULL, NULL, ?, ?)',
+                (kind, clientId, PENDING, now + self.leaseSeconds, now)
+            )
+
+        return LedgerEntry(
+            kind,
+            clientId,
+            PENDING,
+            leaseExpiresOn=now + self.leaseSeconds,
+            claimed=True,
+            ambiguous=entry is not None and entry.state == PENDING
+        )
+
+    def succeed(self, kind, clientId, response):
+        '''
+        Record the response of a request.
+
+        :param kind:
+            The kind of request. **REQUIRED**
+        :param clientId:
+            The client id of the request. **REQUIRED**
+        :param response:
+            The API response. **REQUIRED**
+        '''
+
+        self.__update(kind, clientId, SUCCEEDED, response=json.dumps(response, separators=(',', ':')))
+
+    def fail(self, kind, clientId, error):
+        '''
+        Record that the API rejected a request, it may be sent again.
+
+        :param kind:
+            The kind of request. **REQUIRED**
+        :param clientId:
+            The client id of the request. **REQUIRED**
+        :param error:
+            The API error. **REQUIRED**
+        '''
+
+        self.__update(kind, clientId, FAILED, error=json.dumps(error, separators=(',', ':'), default=str))
+
+    def abandon(self, kind, clientId):
+        '''
+        Record that the outcome of a request is unknown, the next attempt looks it up.
+
+        :param kind:
+            The kind of request. **REQUIRED**
+        :param clientId:
+            The client id of the request. **REQUIRED**
+        '''
+
+        self.__update(kind, clientId, PENDING, leaseExpiresOn=0)
+
+    def get(self, kind, clientId):
+        '''
+        Retrieve the recorded state of a request.
+
+        :param kind:
+            The kind of request. **REQUIRED**
+        :param clientId:
+            The client id of the request. **REQUIRED**
+        :returns:
+            A LedgerEntry, or None if the request is unknown.
+        '''
+
+        with self.__lock:
+            return self.__select(self.__connection.cursor(), kind, clientId)
+
+    def purge(self, olderThan):
+        '''
+        Delete the succeeded and failed requests completed before a time.
+
+        Pending requests are kept. Once purged, a request with the same
+        client id is sent again instead of returning the stored response.
+
+        :param olderThan:
+            A time in seconds since the epoch, for example time.time() - 7 * 86400. **REQUIRED**
+        :returns:
+            The number of deleted requests.
+        '''
+
+        with self.__transaction() as cursor:
+            cursor.execute(
+                'DELETE FROM ledger WHERE state IN (?, ?) AND updatedOn < ?',
+                (SUCCEEDED, FAILED, olderThan)
+            )
+
+            return cursor.rowcount
+
+    def close(self):
+        '''
+        Close the database connection.
+        '''
+
+        with self.__lock:
+            self.__connection.close()
+
+    def __update(self, kind, clientId, state, response=None, error=None, leaseExpiresOn=None):
+        with self.__transaction() as cursor:
+            cursor.execute(
+                'UPDATE ledger SET state = ?, response = ?, error = ?, leaseExpiresOn = ?, updatedOn = ? '
+                'WHERE kind = ? AND clientId = ?',
+                (state, response, error, leaseExpiresOn, time.time(), kind, clientId)
+            )
+
+    def __select(self, cursor, kind, clientId):
+        row = cursor.execute(
+            'SELECT state, response, error, leaseExpiresOn FROM ledger WHERE kind = ? AND clientId = ?',
+            (kind, clientId)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return LedgerEntry(
+            kind,
+            clientId,
+            row[0],
+            response=json.loads(row[1]) if row[1] is not None else None,
+            error=json.loads(row[2]) if row[2] is not None else None,
+            leaseExpiresOn=row[3]
+        )
+
+    def __transaction(self):
+        return _Transaction(self.__connection, self.__lock)
+
+
+class _Transaction(object):
+    '''
+    A write transaction, BEGIN IMMEDIATE takes the database lock up front so
+    concurrent processes cannot claim the same request.
+    '''
+
+    def __init__(self, connection, lock):
+        self.connection = connection
+        self.lock = lock
+
+    def __enter__(self):
+        self.lock.acquire()
+
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+        except Exception:
+            self.lock.release()
+            raise
+
+        return cursor
+
+    def __exit__(self, excType, excValue, traceback):
+        try:
+            self.connection.execute('COMMIT' if excType is None else 'ROLLBACK')
+        finally:
+            self.lock.release()
@@ -1,7 +1,59 @@
 #!/usr/bin/env python
 
 import json
+from bisect import bisect_right
+from datetime import datetime, timezone
 from enum import Enum
+from types import MappingProxyType
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence  # Python 2
+
+
+def toDatetime(value):
+    '''
+    Convert a timestamp returned by the API to a timezone-aware datetime.
+
+    :param value:
+        An ISO 8601 string or a datetime, timestamps without offset are in UTC. **REQUIRED**
+    :returns:
+        A datetime in UTC.
+    '''
+
+    if isinstance(value, datetime):
+        result = value
+    else:
+        try:
+            result = datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+        except (AttributeError, TypeError, ValueError):
+            from hyperwallet.exceptions import HyperwalletException
+
+            raise HyperwalletException('Invalid timestamp = {}'.format(value))
+
+    if result.tzinfo is None:
+        return result.replace(tzinfo=timezone.utc)
+
+    return result.astimezone(timezone.utc)
+
+
+def _toDecimal(amount):
+    from hyperwallet.utils.currencies import toDecimal
+
+    return toDecimal(amount)
+
+
+def _toMinorUnits(raw):
+    from hyperwallet.utils.currencies import toMinorUnits
+
+    (amount, currency, currencyField, field) = raw
+
+    if not currency:
+        from hyperwallet.exceptions import HyperwalletException
+
+        raise HyperwalletException('{} is required to decode {}'.format(currencyField, field))
+
+    return toMinorUnits(amount, currency)
 
 
 class HyperwalletModel(object):
@@ -12,6 +64,9 @@ class HyperwalletModel(object):
         A dictionary containing the attributes for the Model.
     '''
 
+    # The currency attribute of the amount attributes not in the currency attribute.
+    currency_fields = {}
+
     def __init__(self, data):
         '''
         Create an instance of the base HyperwalletModel.
@@ -23,6 +78,20 @@ class HyperwalletModel(object):
 
         setattr(self, '_raw_json', data)
 
+    @property
+    def _raw_json(self):
+        return self._rawJson
+
+    @_raw_json.setter
+    def _raw_json(self, value):
+        self._rawJson = value
+
+        # The cached representations are only valid for the data they were built from.
+        self._sharedDict = None
+        self._dictView = None
+        self._jsonStrings = {}
+        self._decoded = {}
+
     def __str__(self):
         '''
         Return a string representation of the HyperwalletModel. By default this
@@ -31,36 +100,162 @@ class HyperwalletModel(object):
 
         return self.asJsonString()
 
-    def asJsonString(self):
+    def asJsonString(self, compact=False):
         '''
         Return a JSON string of the HyperwalletModel based on key/value pairs
         returned from the asDict() function.
+
+        The string is cached until _raw_json is replaced.
+
+        :param compact:
+            Whether to return the string without indentation.
         '''
 
-        return json.dumps(
-            self.asDict(),
-            sort_keys=True,
-            separators=(',', ':'),
-            indent=4
-        )
+        jsonString = self._jsonStrings.get(compact)
+
+        if jsonString is None:
+            jsonString = self._jsonStrings[compact] = json.dumps(
+                self.__getSharedDict(),
+                sort_keys=True,
+                separators=(',', ':'),
+                indent=None if compact else 4
+            )
+
+        return jsonString
 
-    def asDict(self):
+    def asDict(self, view=False):
         '''
         Return a dictionary representation of the Model.
+
+        :param view:
+            Whether to return a cached read-only view instead of a copy, the
+            arrays of the view are shared with the Model and must not be modified.
+        '''
+
+        if view:
+            if self._dictView is None:
+                self._dictView = MappingProxyType(self.__getSharedDict())
+
+            return self._dictView
+
+        return self.__toDict(True)
+
+    def __getSharedDict(self):
+        if self._sharedDict is None:
+            self._sharedDict = self.__toDict(False)
+
+        return self._sharedDict
+
+    def getDecimal(self, field):
+        '''
+        Decode an amount attribute to a Decimal, once per value.
+
+        :param field:
+            The name of the attribute, for example amount. **REQUIRED**
+        :returns:
+            A Decimal, or None if the attribute is empty.
+        '''
+
+        return self.__decode(('decimal', field), getattr(self, field, None), _toDecimal)
+
+    def getMinorUnits(self, field):
+        '''
+        Decode an amount attribute to an integer number of minor units of its
+        currency, once per value.
+
+        :param field:
+            The name of the attribute, for example amount. **REQUIRED**
+        :returns:
+            An integer, e.g. 1050 for 10.50 USD, or None if the attribute is empty.
+        '''
+
+        currencyField = self.getCurrencyField(field)
+
+        return self.__decode(
+            ('minorUnits', field),
+            (getattr(self, field, None), getattr(self, currencyField, None), currencyField, field),
+            _toMinorUnits
+        )
+
+    def getDatetime(self, field='createdOn'):
+        '''
+        Decode a timestamp attribute to a timezone-aware datetime in UTC, once per value.
+
+        :param field:
+            The name of the attribute, for example expiresOn.
+        :returns:
+            A datetime, or None if the attribute is empty.
+        '''
+
+        return self.__decode(('datetime', field), getattr(self, field, None), toDatetime)
+
+    def getCurrencyField(self, field):
+        '''
+        The name of the currency attribute of an amount attribute.
+
+        :param field:
+            The name of the amount attribute. **REQUIRED**
         '''
 
-        data = {}
+        return self.currency_fields.get(field, 'currency')
 
-        for (key, value) in self._raw_json.items():
-            if isinstance(self._raw_json.get(key, None), (list, tuple, set)):
-                data[key] = list()
-                for subobj in self._raw_json.get(key, None):
-                    data[key].append(subobj)
+    def toBytes(self, codec=None):
+        '''
+        Serialize the Model to a compact binary form, see hyperwallet.utils.serialization.
+
+        :param codec:
+            'msgpack' or 'json', msgpack if it is installed and JSON otherwise if not provided.
+        :returns:
+            The bytes of the Model.
+        '''
+
+        from hyperwallet.utils.serialization import toBytes
+
+        return toBytes(self, codec)
+
+    @classmethod
+    def fromBytes(cls, data):
+        '''
+        Build a Model from the bytes returned by toBytes.
+
+        :param data:
+            The bytes of the Model. **REQUIRED**
+        :returns:
+            A Model of this class.
+        '''
 
-            elif self._raw_json.get(key, None):
-                data[key] = self._raw_json.get(key, None)
+        from hyperwallet.exceptions import HyperwalletException
+        from hyperwallet.utils.serialization import fromBytes
 
-        return data
+        model = fromBytes(data)
+
+        if not isinstance(model, cls):
+            raise HyperwalletException('Expected {}, found {}'.format(cls.__name__, type(model).__name__))
+
+        return model
+
+    def __decode(self, key, raw, decoder):
+        # The decoded value is kept with the value it was decoded from, so
+        # that a changed attribute is decoded again.
+        cached = self._decoded.get(key)
+
+        if cached is not None and cached[0] == raw:
+            return cached[1]
+
+        value = raw[0] if isinstance(raw, tuple) else raw
+        decoded = None if value in (None, '') else decoder(raw)
+        self._decoded[key] = (raw, decoded)
+
+        return decoded
+
+    def __toDict(self, copy):
+        sequences = (list, tuple, set)
+
+        return {
+            key: (list(value) if copy or not isinstance(value, list) else value) if isinstance(value, sequences) else value
+            for (key, value) in self._raw_json.items()
+            if value or isinstance(value, sequences)
+        }
 
 
 class User(HyperwalletModel):
@@ -494,6 +689,13 @@ class Transfer(HyperwalletModel):
 
     filters_array = {'clientTransferId', 'sourceToken', 'destinationToken', 'createdBefore', 'createdAfter', 'offset', 'limit'}
 
+    currency_fields = {
+        'sourceAmount': 'sourceCurrency',
+        'sourceFeeAmount': 'sourceCurrency',
+        'destinationAmount': 'destinationCurrency',
+        'destinationFeeAmount': 'destinationCurrency'
+    }
+
     def __init__(self, data):
         '''
         Create a new Transfer with the provided attributes.
@@ -859,6 +1061,166 @@ class TransferMethodConfiguration(HyperwalletModel):
         )
 
 
+class TransferMethodConfigurationList(Sequence):
+    '''
+    A lazy list of Transfer Method Configurations.
+
+    The API returns configurations grouped by their countries and currencies.
+    This list keeps that compact form and only creates a
+    TransferMethodConfiguration for a single country and currency when it is
+    accessed.
+
+    :param collections:
+        A list of configuration dictionaries as returned by the API.
+    '''
+
+    def __init__(self, collections):
+        '''
+        Create a new Transfer Method Configuration list.
+        '''
+
+        self.collections = collections
+
+        self.__offsets = []
+        self.__length = 0
+
+        for collection in collections:
+            self.__offsets.append(self.__length)
+            self.__length += len(collection.get('countries', [])) * len(collection.get('currencies', []))
+
+        self.__countryIndex = None
+        self.__currencyIndex = None
+        self.__typesCache = {}
+
+    def __len__(self):
+        return self.__length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.__length))]
+
+        if index < 0:
+            index += self.__length
+
+        if not 0 <= index < self.__length:
+            raise IndexError('TransferMethodConfigurationList index out of range')
+
+        position = bisect_right(self.__offsets, index) - 1
+        collection = self.collections[position]
+        currencies = collection.get('currencies', [])
+        countryIndex, currencyIndex = divmod(index - self.__offsets[position], len(currencies))
+
+        return self.__materialize(
+            collection,
+            collection.get('countries', [])[countryIndex],
+            currencies[currencyIndex]
+        )
+
+    def __iter__(self):
+        for collection in self.collections:
+            for country in collection.get('countries', []):
+                for currency in collection.get('currencies', []):
+                    yield self.__materialize(collection, country, currency)
+
+    def __eq__(self, other):
+        if isinstance(other, TransferMethodConfigurationList):
+            return self.collections == other.collections
+
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+
+        # Models have no equality, this keeps comparisons with [] working.
+        return len(self) == len(other) and list(self) == list(other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "TransferMethodConfigurationList({length})".format(
+            length=self.__length
+        )
+
+    def __materialize(self, collection, country, currency):
+        configuration = collection.copy()
+        configuration['countries'] = [country]
+        configuration['currencies'] = [currency]
+
+        return TransferMethodConfiguration(configuration)
+
+    def __buildIndex(self):
+        countryIndex = {}
+        currencyIndex = {}
+
+        for (position, collection) in enumerate(self.collections):
+            profileType = collection.get('profileType')
+
+            for country in collection.get('countries', []):
+                countryIndex.setdefault((country, profileType), set()).add(position)
+
+            for currency in collection.get('currencies', []):
+                currencyIndex.setdefault(currency, set()).add(position)
+
+        self.__countryIndex = countryIndex
+        self.__currencyIndex = currencyIndex
+
+    def getTransferMethodTypes(self, country, currency, profileType):
+        '''
+        Find the Transfer Method types available for a country, currency and
+        profile type without expanding the configurations.
+
+        :param country:
+            An ISO 3166-1 code identifying the country. **REQUIRED**
+        :param currency:
+            An ISO 4217-1 code identifying the currency. **REQUIRED**
+        :param profileType:
+            A string identifying the type of User. **REQUIRED**
+        :returns:
+            A frozenset of Transfer Method types.
+        '''
+
+        key = (country, currency, profileType)
+
+        if key not in self.__typesCache:
+            if self.__countryIndex is None:
+                self.__buildIndex()
+
+            positions = self.__countryIndex.get((country, profileType), set()) & self.__currencyIndex.get(currency, set())
+            self.__typesCache[key] = frozenset(self.collections[p].get('type') for p in positions)
+
+        return self.__typesCache[key]
+
+    def find(self, country, currency, profileType, transferMethodType=None):
+        '''
+        Materialize the configurations matching a country, currency and profile
+        type.
+
+        :param country:
+            An ISO 3166-1 code identifying the country. **REQUIRED**
+        :param currency:
+            An ISO 4217-1 code identifying the currency. **REQUIRED**
+        :param profileType:
+            A string identifying the type of User. **REQUIRED**
+        :param transferMethodType:
+            A string identifying the type of Transfer Method.
+        :returns:
+            An array of Transfer Method Configurations.
+        '''
+
+        if self.__countryIndex is None:
+            self.__buildIndex()
+
+        positions = self.__countryIndex.get((country, profileType), set()) & self.__currencyIndex.get(currency, set())
+
+        return [
+            self.__materialize(self.collections[p], country, currency)
+            for p in sorted(positions)
+            if transferMethodType is None or self.collections[p].get('type') == transferMethodType
+        ]
+
+
 class Webhook(HyperwalletModel):
     '''
     The Webhook Model.
@@ -886,31 +1248,28 @@ class Webhook(HyperwalletModel):
         for (param, default) in self.defaults.items():
             setattr(self, param, data.get(param, default))
 
-        if self.type is None:
-            return
-
-        if type(self.object) is not dict:
-            return
-
-        types = {
-            'PAYMENTS': Payment,
-            'BANK_ACCOUNTS': BankAccount,
-            'PREPAID_CARDS': PrepaidCard,
-            'USERS': User,
-            "BANK_CARDS": BankCard,
-            "PAYPAL_ACCOUNTS": PayPalAccount,
-            "PAPER_CHECKS": PaperCheck,
-            "VENMO_ACCOUNTS": VenmoAccount,
-            "TRANSFERS": Transfer,
-            "REFUND": TransferRefunds
-        }
+    @property
+    def object(self):
+        '''
+        The object of the notification, converted to the model of the event
+        type on first access.
+        '''
+
+        if self._object is None:
+            self._object = self._rawObject
 
-        base, sub = self.type.split('.')[:2]
+            if type(self._rawObject) is dict:
+                model = getWebhookObjectType(self.type)
 
-        if sub in types:
-            self.object = types[sub](self.object)
-        elif base in types:
-            self.object = types[base](self.object)
+                if model is not None:
+                    self._object = model(self._rawObject)
+
+        return self._object
+
+    @object.setter
+    def object(self, value):
+        self._rawObject = value
+        self._object = None
 
     def __repr__(self):
         return "Webhook({date}, {token})".format(
@@ -934,6 +1293,8 @@ class TransferRefunds(HyperwalletModel):
         A dictionary containing the attributes for the Transfer Refunds.
     '''
 
+    currency_fields = Transfer.currency_fields
+
     def __init__(self, data):
         '''
         Create a new Transfer Refunds with the provided attributes.
@@ -968,3 +1329,53 @@ class TransferRefunds(HyperwalletModel):
             date=self.createdOn,
             token=self.token
         )
+
+
+# Model of the object of a Webhook, by the second segment of the event type
+# and otherwise by the first one.
+WEBHOOK_OBJECT_TYPES = {
+    'PAYMENTS': Payment,
+    'BANK_ACCOUNTS': BankAccount,
+    'PREPAID_CARDS': PrepaidCard,
+    'USERS': User,
+    'BANK_CARDS': BankCard,
+    'PAYPAL_ACCOUNTS': PayPalAccount,
+    'PAPER_CHECKS': PaperCheck,
+    'VENMO_ACCOUNTS': VenmoAccount,
+    'TRANSFERS': Transfer,
+    'REFUND': TransferRefunds
+}
+
+# Resolved models by full event type.
+_webhookDispatch = {}
+
+
+def getWebhookObjectType(webhookType):
+    '''
+    Find the model of the object of a Webhook.
+
+    :param webhookType:
+        The type of the Webhook, for example USERS.BANK_ACCOUNTS.CREATED.
+    :returns:
+        A HyperwalletModel class, or None if the type is unknown.
+    '''
+
+    try:
+        return _webhookDispatch[webhookType]
+    except KeyError:
+        pass
+
+    if not webhookType:
+        return None
+
+    segments = webhookType.split('.')
+    model = WEBHOOK_OBJECT_TYPES.get(segments[1]) if len(segments) > 1 else None
+
+    if model is None and len(segments) > 1:
+        model = WEBHOOK_OBJECT_TYPES.get(segments[0])
+
+    # The number of event types is small, unexpected values are not cached.
+    if len(_webhookDispatch) < 1024:
+        _webhookDispatch[webhookType] = model
+
+    return model
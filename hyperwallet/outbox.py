@@ -0,0 +1,484 @@
+#!/usr/bin/env python
+
+import json
+import sqlite3
+import threading
+import time
+
+from hyperwallet.exceptions import HyperwalletException, HyperwalletAPIException, HyperwalletInProgressException
+from hyperwallet.ledger import isAmbiguousError
+
+
+QUEUED = 'QUEUED'
+IN_PROGRESS = 'IN_PROGRESS'
+SUCCEEDED = 'SUCCEEDED'
+FAILED = 'FAILED'
+
+
+class OutboxEntry(object):
+    '''
+    A Payment request stored in the outbox.
+
+    :param clientPaymentId:
+        The client id of the Payment.
+    :param data:
+        The dictionary passed to createPayment.
+    :param state:
+        One of QUEUED, IN_PROGRESS, SUCCEEDED or FAILED.
+    :param attempts:
+        The number of times the request was sent.
+    :param response:
+        The API response of a succeeded request.
+    :param error:
+        The last error, a string or the API error object.
+    '''
+
+    def __init__(self, clientPaymentId, data, state, attempts=0, response=None, error=None):
+        '''
+        Create a new OutboxEntry.
+        '''
+
+        self.clientPaymentId = clientPaymentId
+        self.data = data
+        self.state = state
+        self.attempts = attempts
+        self.response = response
+        self.error = error
+
+    def __repr__(self):
+        return "OutboxEntry({clientPaymentId}, {state})".format(
+            clientPaymentId=self.clientPaymentId,
+            state=self.state
+        )
+
+
+class PaymentOutbox(object):
+    '''
+    A durable queue of Payment requests drained in the background.
+
+    enqueue stores the request in a SQLite database and returns right away.
+    Worker threads claim batches of queued requests, send them with
+    createPayment and record the outcome. Requests that fail with a
+    communication error, a server error or a response that is not JSON are
+    retried with an exponential backoff, requests rejected by the API fail
+    immediately. Results are reported to the
+    callbacks and can be queried with status.
+
+    Requests are keyed on their clientPaymentId, enqueueing the same id
+    twice stores it once. Requests in progress when a process stops are
+    queued again by the next outbox opened on the same database, use an Api
+    with an idempotencyLedger so such requests are not paid twice. A request
+    still claimed in the ledger by the stopped process is retried once its
+    lease has expired, the ledger then looks its outcome up.
+
+    A database file is used by a single outbox at a time, the outbox holds
+    an exclusive lock on it until it is closed. Opening a second outbox on
+    the same file, from this or another process, raises a HyperwalletException.
+
+    :param api:
+        The Api instance used to create Payments. **REQUIRED**
+    :param path:
+        The path of the SQLite database, ':memory:' for a queue that is lost when the process exits. **REQUIRED**
+    :param workers:
+        The number of worker threads.
+    :param batchSize:
+        The number of requests claimed by a worker at once.
+    :param maxRetries:
+        The number of times a request is retried before it fails.
+    :param retryDelay:
+        The delay in seconds before the first retry, doubled for each following retry.
+    :param maxQueued:
+        The maximum number of queued requests, enqueue waits while the outbox is full.
+    :param onSuccess:
+        Called with the OutboxEntry and the Payment of each succeeded request.
+    :param onFailure:
+        Called with the OutboxEntry of each failed request.
+    :param timeout:
+        Seconds to wait for the lock of a database used by another outbox.
+
+    .. note::
+        Callbacks are called from the worker threads, exceptions they raise
+        are ignored.
+    '''
+
+    def __init__(self,
+                 api,
+                 path=None,
+                 workers=4,
+                 batchSize=10,
+                 maxRetries=5,
+                 retryDelay=1.0,
+                 maxQueued=10000,
+                 onSuccess=None,
+                 onFailure=None,
+                 timeout=5):
+        '''
+        Create a new PaymentOutbox.
+        '''
+
+        if not path:
+            raise HyperwalletException('path is required')
+
+        if workers < 1:
+            raise ValueError('workers must be a positive integer')
+
+        self.api = api
+        self.path = path
+        self.workers = workers
+        self.batchSize = batchSize
+        self.maxRetries = maxRetries
+        self.retryDelay = retryDelay
+        self.maxQueued = maxQueued
+        self.onSuccess = onSuccess
+        self.onFailure = onFailure
+
+        self.__lock = threading.Lock()
+        self.__condition = threading.Condition(self.__lock)
+        self.__threads = []
+        self.__stopping = False
+
+        self.__connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+
+        try:
+            self.__open(path)
+        except sqlite3.OperationalError as e:
+            self.__connection.close()
+
+            if 'locked' in str(e):
+                raise HyperwalletException('Outbox database {} is used by another outbox'.format(path))
+
+            raise
+
+        self.__queued = self.__connection.execute(
+            'SELECT COUNT(*) FROM outbox WHERE state = ?', (QUEUED,)
+        ).fetchone()[0]
+        self.__inProgress = 0
+
+    def enqueue(self, data=None, timeout=None):
+        '''
+        Store a Payment request, it is sent by the workers.
+
+        :param data:
+            A dictionary containing Payment information, with a clientPaymentId. **REQUIRED**
+        :param timeout:
+            Seconds to wait while the outbox is full, waits forever if not provided.
+        :returns:
+            The OutboxEntry of the request, the stored one if the clientPaymentId was already enqueued.
+        '''
+
+        if not data:
+            raise HyperwalletException('data is required')
+
+        if not data.get('clientPaymentId'):
+            raise HyperwalletException('clientPaymentId is required')
+
+        deadline = time.time() + timeout if timeout is not None else None
+
+        with self.__condition:
+            while self.__queued >= self.maxQueued:
+                remaining = deadline - time.time() if deadline is not None else None
+
+                if remaining is not None and remaining <= 0:
+                    raise HyperwalletException('Outbox is full')
+
+                self.__condition.wait(remaining)
+
+            now = time.time()
+            cursor = self.__connection.execute(
+                'INSERT OR IGNORE INTO outbox (clientPaymentId, data, state, nextAttemptOn, updatedOn) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (data['clientPaymentId'], json.dumps(data, separators=(',', ':')), QUEUED, now, now)
+            )
+
+            if cursor.rowcount:
+                self.__queued += 1
+                self.__condition.notify_all()
+                return OutboxEntry(data['clientPaymentId'], data, QUEUED)
+
+            return self.__select(data['clientPaymentId'])
+
+    def status(self, clientPaymentId):
+        '''
+        Retrieve the state of a Payment request.
+
+        :param clientPaymentId:
+            The client id of the Payment. **REQUIRED**
+        :returns:
+            An OutboxEntry, or None if the request is unknown.
+        '''
+
+        with self.__lock:
+            return self.__select(clientPaymentId)
+
+    def counts(self):
+        '''
+        Count the requests in every state.
+
+        :returns:
+            A dictionary of state to number of requests.
+        '''
+
+        with self.__lock:
+            counts = dict((state, 0) for state in (QUEUED, IN_PROGRESS, SUCCEEDED, FAILED))
+            counts.update(self.__connection.execute('SELECT state, COUNT(*) FROM outbox GROUP BY state').fetchall())
+
+        return counts
+
+    def start(self):
+        '''
+        Start the worker threads.
+        '''
+
+        with self.__lock:
+            if self.__threads:
+                return
+
+            self.__stopping = False
+            self.__threads = [
+                threading.Thread(target=self.__work, name='hyperwallet-outbox-{}'.format(i))
+                for i in range(self.workers)
+            ]
+
+        for thread in self.__threads:
+            thread.daemon = True
+            thread.start()
+
+    def stop(self, timeout=None):
+        '''
+        Stop the worker threads once their current batch is done, queued
+        requests stay in the database.
+
+        :param timeout:
+            Seconds to wait for each worker thread.
+        '''
+
+        with self.__condition:
+            self.__stopping = True
+            self.__condition.notify_all()
+            threads, self.__threads = self.__threads, []
+
+        for thread in threads:
+            thread.join(timeout)
+
+    def drain(self, timeout=None):
+        '''
+        Wait until no request is queued or in progress.
+
+        :param timeout:
+            Seconds to wait, waits forever if not provided.
+        :returns:
+            True if the outbox is empty, False if the timeout expired.
+        '''
+
+        deadline = time.time() + timeout if timeout is not None else None
+
+        with self.__condition:
+            while self.__queued or self.__inProgress:
+                remaining = deadline - time.time() if deadline is not None else None
+
+                if remaining is not None and remaining <= 0:
+                    return False
+
+                self.__condition.wait(remaining)
+
+        return True
+
+    def close(self):
+        '''
+        Stop the workers and close the database.
+        '''
+
+        self.stop()
+
+        with self.__lock:
+            self.__connection.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __open(self, path):
+        if path != ':memory:':
+            # The lock taken by the first write is kept until the connection is
+            # closed, so that requests in progress belong to this outbox only.
+            self.__connection.execute('PRAGMA locking_mode=EXCLUSIVE')
+            self.__connection.execute('PRAGMA journal_mode=WAL')
+            self.__connection.execute('PRAGMA synchronous=NORMAL')
+
+        self.__connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            self.__connection.execute(
+                'CREATE TABLE IF NOT EXISTS outbox ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'clientPaymentId TEXT NOT NULL UNIQUE, '
+                'data TEXT NOT NULL, '
+                'state TEXT NOT NULL, '
+                'attempts INTEGER NOT NULL DEFAULT 0, '
+                'nextAttemptOn REAL NOT NULL, '
+                'response TEXT, '
+                'error TEXT, '
+                'updatedOn REAL NOT NULL)'
+            )
+            self.__connection.execute('CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, nextAttemptOn)')
+
+            # Requests claimed by an outbox that stopped are sent again.
+            self.__connection.execute('UPDATE outbox SET state = ? WHERE state = ?', (QUEUED, IN_PROGRESS))
+            self.__connection.execute('COMMIT')
+        except Exception:
+            self.__connection.execute('ROLLBACK')
+            raise
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __work(self):
+        while True:
+            batch = self.__claim()
+
+            if batch is None:
+                return
+
+            for entry in batch:
+                try:
+                    self.__send(entry)
+                except Exception:
+                    # The outcome is recorded before the callbacks are called,
+                    # an exception raised by a callback must not stop the worker.
+                    pass
+
+    def __claim(self):
+        '''
+        Wait for requests ready to be sent and mark a batch of them in progress.
+
+        :returns:
+            An array of OutboxEntries, None when the outbox is stopping.
+        '''
+
+        with self.__condition:
+            while not self.__stopping:
+                now = time.time()
+
+                # The rows are selected and claimed in a single write transaction.
+                self.__connection.execute('BEGIN IMMEDIATE')
+
+                try:
+                    rows = self.__connection.execute(
+                        'SELECT clientPaymentId, data, attempts FROM outbox '
+                        'WHERE state = ? AND nextAttemptOn <= ? ORDER BY id LIMIT ?',
+                        (QUEUED, now, self.batchSize)
+                    ).fetchall()
+
+                    self.__connection.executemany(
+                        'UPDATE outbox SET state = ?, updatedOn = ? WHERE clientPaymentId = ? AND state = ?',
+                        [(IN_PROGRESS, now, row[0], QUEUED) for row in rows]
+                    )
+                    self.__connection.execute('COMMIT')
+                except Exception:
+                    self.__connection.execute('ROLLBACK')
+                    raise
+
+                if rows:
+                    self.__queued -= len(rows)
+                    self.__inProgress += len(rows)
+                    self.__condition.notify_all()
+
+                    return [OutboxEntry(row[0], json.loads(row[1]), IN_PROGRESS, row[2]) for row in rows]
+
+                nextAttemptOn = self.__connection.execute(
+                    'SELECT MIN(nextAttemptOn) FROM outbox WHERE state = ?', (QUEUED,)
+                ).fetchone()[0]
+
+                self.__condition.wait(max(nextAttemptOn - now, 0.01) if nextAttemptOn is not None else None)
+
+        return None
+
+    def __send(self, entry):
+        entry.attempts += 1
+
+        try:
+            payment = self.api.createPayment(entry.data)
+        except Exception as e:
+            self.__failed(entry, e)
+            return
+
+        entry.state = SUCCEEDED
+        entry.response = payment._raw_json
+
+        self.__complete(entry, SUCCEEDED, response=json.dumps(entry.response, separators=(',', ':')))
+
+        if self.onSuccess is not None:
+            self.onSuccess(entry, payment)
+
+    def __failed(self, entry, error):
+        if isinstance(error, HyperwalletInProgressException):
+            # The request was not sent, the ledger lease of an earlier attempt
+            # has to expire first. This is not counted as a retry.
+            entry.attempts -= 1
+            entry.error = str(error)
+            entry.state = QUEUED
+            self.__complete(
+                entry,
+                QUEUED,
+                error=json.dumps(entry.error, separators=(',', ':')),
+                nextAttemptOn=error.leaseExpiresOn
+            )
+            return
+
+        if isinstance(error, HyperwalletAPIException):
+            entry.error = error.message
+            retry = isAmbiguousError(error)
+        else:
+            entry.error = str(error)
+            retry = not isinstance(error, HyperwalletException)
+
+        serialized = json.dumps(entry.error, separators=(',', ':'), default=str)
+
+        if retry and entry.attempts <= self.maxRetries:
+            entry.state = QUEUED
+            self.__complete(
+                entry,
+                QUEUED,
+                error=serialized,
+                nextAttemptOn=time.time() + self.retryDelay * 2 ** (entry.attempts - 1)
+            )
+            return
+
+        entry.state = FAILED
+        self.__complete(entry, FAILED, error=serialized)
+
+        if self.onFailure is not None:
+            self.onFailure(entry)
+
+    def __complete(self, entry, state, response=None, error=None, nextAttemptOn=0):
+        with self.__condition:
+            self.__connection.execute(
+                'UPDATE outbox SET state = ?, attempts = ?, response = ?, error = ?, nextAttemptOn = ?, updatedOn = ? '
+                'WHERE clientPaymentId = ?',
+                (state, entry.attempts, response, error, nextAttemptOn, time.time(), entry.clientPaymentId)
+            )
+
+            self.__inProgress -= 1
+
+            if state == QUEUED:
+                self.__queued += 1
+
+            self.__condition.notify_all()
+
+    def __select(self, clientPaymentId):
+        row = self.__connection.execute(
+            'SELECT data, state, attempts, response, error FROM outbox WHERE clientPaymentId = ?',
+            (clientPaymentId,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return OutboxEntry(
+            clientPaymentId,
+            json.loads(row[0]),
+            row[1],
+            row[2],
+            json.loads(row[3]) if row[3] is not None else None,
+            json.loads(row[4]) if row[4] is not None else None
+        )
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+
+import json
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # Python 2
+
+from hyperwallet.models import Webhook
+
+
+class WebhookReceiver(object):
+    '''
+    Receive Webhook notifications over HTTP and dispatch them in the background.
+
+    The receiver is a WSGI application, and an ASGI application through its
+    asgi method. A delivery is acknowledged with 202 as soon as its body is
+    queued. When the queue is full the delivery is answered with 503 so that
+    it is sent again later, deliveries are never dropped silently. An empty
+    body is answered with 400 and a WSGI request without a Content-Length,
+    unless the server marks its input as terminated, with 411.
+
+    Worker threads take batches of bodies from the queue, decrypt and verify
+    them when encryption is enabled, and call the handler with a Webhook.
+
+    :param handler:
+        Called with each Webhook. **REQUIRED**
+    :param encryptionData:
+        Dictionary with params for encrypted deliveries (keys: clientPrivateKeySetLocation, hyperwalletKeySetLocation, etc).
+    :param workers:
+        The number of worker threads.
+    :param maxQueued:
+        The maximum number of deliveries waiting to be processed.
+    :param batchSize:
+        The maximum number of deliveries taken from the queue at once by a worker.
+    :param onError:
+        Called with the body and the exception of each delivery that could not be processed.
+    '''
+
+    def __init__(self,
+                 handler,
+                 encryptionData=None,
+                 workers=4,
+                 maxQueued=10000,
+                 batchSize=32,
+                 onError=None):
+        '''
+        Create a new WebhookReceiver.
+        '''
+
+        if workers < 1:
+            raise ValueError('workers must be a positive integer')
+
+        self.handler = handler
+        self.workers = workers
+        self.batchSize = batchSize
+        self.onError = onError
+
+        # One Encryption instance, its keys are loaded once and shared by the workers.
+        if encryptionData is not None:
+            from hyperwallet.utils.encryption import Encryption
+
+            self.encryption = Encryption(**encryptionData)
+        else:
+            self.encryption = None
+
+        self.queue = queue.Queue(maxQueued)
+
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+
+        self.__lock = threading.Lock()
+        self.__threads = []
+
+    @property
+    def encrypted(self):
+        return self.encryption is not None
+
+    def accept(self, body):
+        '''
+        Queue the body of a delivery.
+
+        :param body:
+            The raw request body. **REQUIRED**
+        :returns:
+            True if the body was queued, False if the queue is full.
+        '''
+
+        try:
+            self.queue.put_nowait(body)
+        except queue.Full:
+            with self.__lock:
+                self.rejected += 1
+            return False
+
+        with self.__lock:
+            self.received += 1
+
+        return True
+
+    def __call__(self, environ, start_response):
+        '''
+        Handle a delivery as a WSGI application.
+        '''
+
+        if environ.get('REQUEST_METHOD') != 'POST':
+            return self.__respond(start_response, 405)
+
+        if environ.get('CONTENT_LENGTH'):
+            try:
+                length = int(environ['CONTENT_LENGTH'])
+            except ValueError:
+                return self.__respond(start_response, 400)
+
+            body = environ['wsgi.input'].read(length) if length > 0 else b''
+        elif environ.get('wsgi.input_terminated'):
+            # A chunked delivery, the server ends the input after the last chunk.
+            body = environ['wsgi.input'].read()
+        else:
+            return self.__respond(start_response, 411)
+
+        if not body:
+            return self.__respond(start_response, 400)
+
+        return self.__respond(start_response, 202 if self.accept(body) else 503)
+
+    async def asgi(self, scope, receive, send):
+        '''
+        Handle a delivery as an ASGI application.
+        '''
+
+        if scope['type'] != 'http':
+            return
+
+        if scope.get('method') != 'POST':
+            status = 405
+        else:
+            chunks = []
+
+            while True:
+                message = await receive()
+                chunks.append(message.get('body', b''))
+
+                if not message.get('more_body'):
+                    break
+
+            body = b''.join(chunks)
+
+            if not body:
+                status = 400
+            else:
+                status = 202 if self.accept(body) else 503
+
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1')) for (name, value) in self.__headers(status)]
+        })
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def parse(self, body):
+        '''
+        Decrypt, verify and parse the body of a delivery.
+
+        :param body:
+            The raw request body. **REQUIRED**
+        :returns:
+            A Webhook.
+        '''
+
+        if self.encrypted:
+            if isinstance(body, bytes):
+                body = body.decode('ascii')
+
+            body = self.encryption.decrypt(body)
+
+        return Webhook(json.loads(body))
+
+    def start(self):
+        '''
+        Start the worker threads.
+        '''
+
+        with self.__lock:
+            if self.__threads:
+                return
+
+            self.__threads = [
+                threading.Thread(target=self.__work, name='hyperwallet-webhooks-{}'.format(i))
+                for i in range(self.workers)
+            ]
+
+        for thread in self.__threads:
+            thread.daemon = True
+            thread.start()
+
+    def drain(self, timeout=None):
+        '''
+        Wait until every queued delivery is processed.
+
+        :param timeout:
+            Seconds to wait, waits forever if not provided.
+        :returns:
+            True if the queue is empty, False if the timeout expired.
+        '''
+
+        deadline = time.time() + timeout if timeout is not None else None
+
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.time() if deadline is not None else None
+
+                if remaining is not None and remaining <= 0:
+                    return False
+
+                self.queue.all_tasks_done.wait(remaining)
+
+        return True
+
+    def stop(self, timeout=None):
+        '''
+        Process the queued deliveries and stop the worker threads.
+
+        :param timeout:
+            Seconds to wait for each worker thread.
+        '''
+
+        with self.__lock:
+            threads, self.__threads = self.__threads, []
+
+        for thread in threads:
+            self.queue.put(None)
+
+        for thread in threads:
+            thread.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __work(self):
+        while True:
+            batch = [self.queue.get()]
+
+            while len(batch) < self.batchSize and batch[-1] is not None:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for body in batch:
+                if body is not None:
+                    self.__process(body)
+
+                self.queue.task_done()
+
+            if batch[-1] is None:
+                return
+
+    def __process(self, body):
+        try:
+            self.handler(self.parse(body))
+        except Exception as e:
+            with self.__lock:
+                self.failed += 1
+
+            if self.onError is not None:
+                try:
+                    self.onError(body, e)
+                except Exception:
+                    pass
+
+            return
+
+        with self.__lock:
+            self.processed += 1
+
+    def __headers(self, status):
+        headers = [('Content-Length', '0')]
+
+        if status == 503:
+            headers.append(('Retry-After', '1'))
+
+        return headers
+
+    def __respond(self, start_response, status):
+        reasons = {
+            202: 'Accepted',
+            400: 'Bad Request',
+            405: 'Method Not Allowed',
+            411: 'Length Required',
+            503: 'Service Unavailable'
+        }
+
+        start_response('{} {}'.format(status, reasons[status]), self.__headers(status))
+
+        return [b'']
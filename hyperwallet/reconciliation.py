@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+
+from collections import deque
+from itertools import chain
+try:
+    from itertools import zip_longest
+except ImportError:
+    from itertools import izip_longest as zip_longest  # Python 2
+
+from hyperwallet.models import Transfer
+from hyperwallet.utils.currencies import toDecimal
+from hyperwallet.utils.paging import iterItems
+
+
+MATCHED = 'MATCHED'
+AMOUNT_MISMATCH = 'AMOUNT_MISMATCH'
+UNMATCHED_RECEIPT = 'UNMATCHED_RECEIPT'
+UNMATCHED_RECORD = 'UNMATCHED_RECORD'
+
+
+def receiptReference(receipt):
+    '''
+    Default join key of a Receipt, the client id found in its details.
+
+    :param receipt:
+        A Receipt. **REQUIRED**
+    :returns:
+        The clientPaymentId or clientTransferId of the Receipt, or None.
+    '''
+
+    details = receipt.details or {}
+
+    return details.get('clientPaymentId') or details.get('clientTransferId')
+
+
+def recordReference(record):
+    '''
+    Default join key of a Payment or Transfer, its client id.
+
+    :param record:
+        A Payment or Transfer. **REQUIRED**
+    :returns:
+        The clientPaymentId or clientTransferId of the record, or None.
+    '''
+
+    return getattr(record, 'clientPaymentId', None) or getattr(record, 'clientTransferId', None)
+
+
+def receiptAmount(receipt):
+    '''
+    Default amount of a Receipt.
+
+    :returns:
+        A tuple of absolute Decimal amount and currency.
+    '''
+
+    return (abs(toDecimal(receipt.amount)), receipt.currency)
+
+
+def recordAmount(record):
+    '''
+    Default amount of a Payment, or of the source side of a Transfer.
+
+    :returns:
+        A tuple of absolute Decimal amount and currency.
+    '''
+
+    if isinstance(record, Transfer):
+        return (abs(toDecimal(record.sourceAmount)), record.sourceCurrency)
+
+    return (abs(toDecimal(record.amount)), record.currency)
+
+
+class ReconciliationResult(object):
+    '''
+    The outcome of reconciling a Receipt with a Payment or Transfer.
+
+    :param status:
+        One of MATCHED, AMOUNT_MISMATCH, UNMATCHED_RECEIPT or UNMATCHED_RECORD.
+    :param key:
+        The join key.
+    :param receipt:
+        The Receipt, None for UNMATCHED_RECORD.
+    :param record:
+        The Payment or Transfer, None for UNMATCHED_RECEIPT.
+    '''
+
+    def __init__(self, status, key, receipt=None, record=None):
+        '''
+        Create a new ReconciliationResult.
+        '''
+
+        self.status = status
+        self.key = key
+        self.receipt = receipt
+        self.record = record
+
+    def __repr__(self):
+        return "ReconciliationResult({status}, {key})".format(
+            status=self.status,
+            key=self.key
+        )
+
+
+class Reconciler(object):
+    '''
+    Incrementally match Receipts against Payments or Transfers.
+
+    Receipts and records are joined through hash indexes on their keys. Only
+    items still waiting for their counterpart are held in memory, matched
+    pairs are emitted and released immediately.
+
+    :param receiptKey:
+        Callable returning the join key of a Receipt, defaults to receiptReference.
+    :param recordKey:
+        Callable returning the join key of a Payment or Transfer, defaults to recordReference.
+    :param receiptAmount:
+        Callable returning the comparable amount of a Receipt, defaults to receiptAmount.
+    :param recordAmount:
+        Callable returning the comparable amount of a record, defaults to recordAmount.
+    :param receiptTypes:
+        A set of Receipt types to reconcile, other Receipts are ignored.
+    '''
+
+    def __init__(self,
+                 receiptKey=receiptReference,
+                 recordKey=recordReference,
+                 receiptAmount=receiptAmount,
+                 recordAmount=recordAmount,
+                 receiptTypes=None):
+        '''
+        Create a new Reconciler.
+        '''
+
+        self.receiptKey = receiptKey
+        self.recordKey = recordKey
+        self.receiptAmount = receiptAmount
+        self.recordAmount = recordAmount
+        self.receiptTypes = receiptTypes
+
+        self.pendingReceipts = {}
+        self.pendingRecords = {}
+
+        self.counts = {
+            MATCHED: 0,
+            AMOUNT_MISMATCH: 0,
+            UNMATCHED_RECEIPT: 0,
+            UNMATCHED_RECORD: 0
+        }
+
+    @property
+    def outstanding(self):
+        '''
+        The number of Receipts and records waiting for their counterpart.
+        '''
+
+        return sum(len(x) for x in self.pendingReceipts.values()) + sum(len(x) for x in self.pendingRecords.values())
+
+    def addReceipt(self, receipt):
+        '''
+        Add a Receipt.
+
+        :param receipt:
+            A Receipt. **REQUIRED**
+        :returns:
+            An array of ReconciliationResults, empty while the Receipt waits for its record.
+        '''
+
+        if self.receiptTypes is not None and receipt.type not in self.receiptTypes:
+            return []
+
+        key = self.receiptKey(receipt)
+
+        if key is None:
+            return [self.__result(UNMATCHED_RECEIPT, key, receipt=receipt)]
+
+        record = self.__take(self.pendingRecords, key)
+
+        if record is None:
+            self.pendingReceipts.setdefault(key, deque()).append(receipt)
+            return []
+
+        return [self.__compare(key, receipt, record)]
+
+    def addRecord(self, record):
+        '''
+        Add a Payment or Transfer.
+
+        :param record:
+            A Payment or Transfer. **REQUIRED**
+        :returns:
+            An array of ReconciliationResults, empty while the record waits for its Receipt.
+        '''
+
+        key = self.recordKey(record)
+
+        if key is None:
+            return [self.__result(UNMATCHED_RECORD, key, record=record)]
+
+        receipt = self.__take(self.pendingReceipts, key)
+
+        if receipt is None:
+            self.pendingRecords.setdefault(key, deque()).append(record)
+            return []
+
+        return [self.__compare(key, receipt, record)]
+
+    def flush(self):
+        '''
+        Report every item still waiting for its counterpart as unmatched and
+        forget them.
+
+        :returns:
+            A generator of ReconciliationResults.
+        '''
+
+        pendingReceipts, self.pendingReceipts = self.pendingReceipts, {}
+        pendingRecords, self.pendingRecords = self.pendingRecords, {}
+
+        for (key, receipts) in pendingReceipts.items():
+            for receipt in receipts:
+                yield self.__result(UNMATCHED_RECEIPT, key, receipt=receipt)
+
+        for (key, records) in pendingRecords.items():
+            for record in records:
+                yield self.__result(UNMATCHED_RECORD, key, record=record)
+
+    def reconcile(self, receipts, records):
+        '''
+        Reconcile two streams, reading them alternately so both indexes stay small.
+
+        :param receipts:
+            An iterable of Receipts. **REQUIRED**
+        :param records:
+            An iterable of Payments or Transfers. **REQUIRED**
+        :returns:
+            A generator of ReconciliationResults, unmatched items are reported once both streams are exhausted.
+        '''
+
+        missing = object()
+
+        for (receipt, record) in zip_longest(receipts, records, fillvalue=missing):
+            if receipt is not missing:
+                for result in self.addReceipt(receipt):
+                    yield result
+
+            if record is not missing:
+                for result in self.addRecord(record):
+                    yield result
+
+        for result in self.flush():
+            yield result
+
+    def reconcileAccount(self,
+                         api,
+                         programToken,
+                         accountToken,
+                         receiptParams=None,
+                         paymentParams=None,
+                         transferParams=None,
+                         includeTransfers=False,
+                         limit=100):
+        '''
+        Page through the Receipts of a program Account and the Payments (and
+        optionally Transfers) and reconcile them.
+
+        :param api:
+            The Api instance used to list the records. **REQUIRED**
+        :param programToken:
+            A token identifying the Program. **REQUIRED**
+        :param accountToken:
+            A token identifying the Account. **REQUIRED**
+        :param receiptParams:
+            A dictionary containing query parameters for listReceiptsForAccount.
+        :param paymentParams:
+            A dictionary containing query parameters for listPayments.
+        :param transferParams:
+            A dictionary containing query parameters for listTransfers.
+        :param includeTransfers:
+            Also reconcile Transfers.
+        :param limit:
+            The page size.
+        :returns:
+            A generator of ReconciliationResults.
+        '''
+
+        receipts = iterItems(api.listReceiptsForAccount, (programToken, accountToken), receiptParams, limit)
+        records = iterItems(api.listPayments, params=paymentParams, limit=limit)
+
+        if includeTransfers:
+            records = chain(records, iterItems(api.listTransfers, params=transferParams, limit=limit))
+
+        return self.reconcile(receipts, records)
+
+    def __take(self, pending, key):
+        queue = pending.get(key)
+
+        if not queue:
+            return None
+
+        item = queue.popleft()
+
+        if not queue:
+            del pending[key]
+
+        return item
+
+    def __compare(self, key, receipt, record):
+        status = MATCHED if self.receiptAmount(receipt) == self.recordAmount(record) else AMOUNT_MISMATCH
+
+        return self.__result(status, key, receipt=receipt, record=record)
+
+    def __result(self, status, key, receipt=None, record=None):
+        self.counts[status] += 1
+
+        return ReconciliationResult(status, key, receipt, record)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+import threading
+
+from hyperwallet.api import Api
+from hyperwallet.config import SERVER
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.utils import ApiClient
+
+
+class ClientRegistry(object):
+    '''
+    Share API clients between the Api instances of many programs.
+
+    One ApiClient, with its connection pool and its encryption keys, is
+    created per server, credentials and key sets. Api instances returned by
+    getApi only hold a program token and a reference to the shared client, so
+    creating one for a new program costs almost nothing.
+
+    :param poolSize:
+        The maximum number of pooled connections of each client.
+    :param coalesceRequests:
+        Collapse identical concurrent GET requests into a single API call.
+    '''
+
+    def __init__(self, poolSize=10, coalesceRequests=False):
+        '''
+        Create a new ClientRegistry.
+        '''
+
+        self.poolSize = poolSize
+        self.coalesceRequests = coalesceRequests
+
+        self.clients = {}
+        self.__lock = threading.Lock()
+
+    def getClient(self, username=None, password=None, server=SERVER, encryptionData=None):
+        '''
+        Retrieve the client shared by a server, credentials and key sets, creating it if needed.
+
+        :param username:
+            The username of this API user. **REQUIRED**
+        :param password:
+            The password of this API user. **REQUIRED**
+        :param server:
+            Your UAT or Production API URL if applicable.
+        :param encryptionData:
+            Dictionary with params for encrypted requests (keys: clientPrivateKeySetLocation, hyperwalletKeySetLocation, etc).
+        :returns:
+            An ApiClient.
+        '''
+
+        if not username:
+            raise HyperwalletException('username is required')
+
+        if not password:
+            raise HyperwalletException('password is required')
+
+        keySets = tuple(sorted(encryptionData.items())) if encryptionData is not None else None
+        key = (server, username, password, keySets)
+
+        with self.__lock:
+            client = self.clients.get(key)
+
+            if client is None:
+                client = ApiClient(username, password, server, encryptionData, self.coalesceRequests, self.poolSize)
+                self.clients[key] = client
+
+        return client
+
+    def getApi(self,
+               username=None,
+               password=None,
+               programToken=None,
+               server=SERVER,
+               encryptionData=None,
+               configurationCacheData=None):
+        '''
+        Create an Api for a program, backed by a shared client.
+
+        :param username:
+            The username of this API user. **REQUIRED**
+        :param password:
+            The password of this API user. **REQUIRED**
+        :param programToken:
+            The token for the program this user is accessing. **REQUIRED**
+        :param server:
+            Your UAT or Production API URL if applicable.
+        :param encryptionData:
+            Dictionary with params for encrypted requests (keys: clientPrivateKeySetLocation, hyperwalletKeySetLocation, etc).
+        :param configurationCacheData:
+            Dictionary enabling the Transfer Method Configuration cache of this Api (keys: maxSize, ttl, ignoreUserToken).
+        :returns:
+            An Api.
+        '''
+
+        if not programToken:
+            raise HyperwalletException('programToken is required')
+
+        return Api(
+            username,
+            password,
+            programToken,
+            server,
+            configurationCacheData=configurationCacheData,
+            apiClient=self.getClient(username, password, server, encryptionData)
+        )
+
+    def close(self):
+        '''
+        Close the connections of every client and forget them.
+        '''
+
+        with self.__lock:
+            clients, self.clients = self.clients, {}
+
+        for client in clients.values():
+            client.close()
+
+    def __len__(self):
+        return len(self.clients)
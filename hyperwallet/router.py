@@ -0,0 +1,321 @@
+#!/usr/bin/env python
+
+import fnmatch
+import threading
+import time
+import zlib
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # Python 2
+
+from hyperwallet.exceptions import HyperwalletException
+
+
+def getPartitionKey(webhook):
+    '''
+    The key keeping the events of an object in order, the token of the
+    object the Webhook refers to.
+
+    :param webhook:
+        A Webhook. **REQUIRED**
+    :returns:
+        The object token, or the Webhook token if the object has none.
+    '''
+
+    # Read the raw object so the nested model is not built.
+    raw = getattr(webhook, '_raw_json', None) or {}
+    obj = raw.get('object')
+
+    if isinstance(obj, dict) and obj.get('token'):
+        return obj['token']
+
+    return webhook.token
+
+
+class HandlerMetrics(object):
+    '''
+    Call count and latency of a handler.
+
+    :param name:
+        The name of the handler.
+    '''
+
+    def __init__(self, name):
+        '''
+        Create a new HandlerMetrics.
+        '''
+
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.totalSeconds = 0.0
+        self.maxSeconds = 0.0
+
+    @property
+    def averageSeconds(self):
+        return self.totalSeconds / self.calls if self.calls else 0.0
+
+    def asDict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'totalSeconds': self.totalSeconds,
+            'maxSeconds': self.maxSeconds,
+            'averageSeconds': self.averageSeconds
+        }
+
+
+class WebhookRouter(object):
+    '''
+    Dispatch Webhooks to handlers registered by event type pattern.
+
+    Webhooks are partitioned by the token of the object they refer to, each
+    partition is processed by its own worker thread, so events of the same
+    User or Transfer are handled in the order they were routed while other
+    objects are handled concurrently. Each partition has a bounded queue,
+    route waits while the queue of the partition is full.
+
+    :param workers:
+        The number of partitions and worker threads.
+    :param maxQueued:
+        The maximum number of Webhooks waiting in each partition.
+    :param onError:
+        Called with the Webhook, the handler and the exception when a handler fails.
+    :param partitionKey:
+        Callable returning the partition key of a Webhook, defaults to getPartitionKey.
+    '''
+
+    def __init__(self, workers=4, maxQueued=1000, onError=None, partitionKey=getPartitionKey):
+        '''
+        Create a new WebhookRouter.
+        '''
+
+        if workers < 1:
+            raise ValueError('workers must be a positive integer')
+
+        self.workers = workers
+        self.onError = onError
+        self.partitionKey = partitionKey
+
+        self.handlers = []
+        self.partitions = [queue.Queue(maxQueued) for i in range(workers)]
+
+        self.routed = 0
+        self.unhandled = 0
+
+        self.__matches = {}
+        self.__lock = threading.Lock()
+        self.__threads = []
+
+    def register(self, pattern, handler):
+        '''
+        Register a handler for the event types matching a pattern.
+
+        :param pattern:
+            A shell style pattern, for example PAYMENTS.* or USERS.UPDATED. **REQUIRED**
+        :param handler:
+            Called with each matching Webhook. **REQUIRED**
+        '''
+
+        if not pattern:
+            raise HyperwalletException('pattern is required')
+
+        name = '{}:{}'.format(pattern, getattr(handler, '__name__', repr(handler)))
+
+        with self.__lock:
+            self.handlers.append((pattern, handler, HandlerMetrics(name)))
+            self.__matches = {}
+
+    def on(self, pattern):
+        '''
+        Decorator registering a handler for the event types matching a pattern.
+
+        :param pattern:
+            A shell style pattern, for example PAYMENTS.* or USERS.UPDATED. **REQUIRED**
+        '''
+
+        def decorator(handler):
+            self.register(pattern, handler)
+            return handler
+
+        return decorator
+
+    def match(self, webhookType):
+        '''
+        Find the handlers of an event type.
+
+        :param webhookType:
+            The type of a Webhook. **REQUIRED**
+        :returns:
+            An array of ``(pattern, handler, metrics)`` tuples in registration order.
+        '''
+
+        matches = self.__matches.get(webhookType)
+
+        if matches is None:
+            with self.__lock:
+                matches = [x for x in self.handlers if fnmatch.fnmatchcase(webhookType or '', x[0])]
+                self.__matches[webhookType] = matches
+
+        return matches
+
+    def route(self, webhook, timeout=None):
+        '''
+        Queue a Webhook in its partition, waiting while the partition is full.
+
+        :param webhook:
+            A Webhook. **REQUIRED**
+        :param timeout:
+            Seconds to wait while the partition is full, waits forever if not provided.
+        '''
+
+        key = self.partitionKey(webhook)
+        partition = zlib.crc32(str(key).encode('utf-8')) % self.workers
+
+        try:
+            self.partitions[partition].put(webhook, timeout=timeout)
+        except queue.Full:
+            raise HyperwalletException('Partition {} is full'.format(partition))
+
+        with self.__lock:
+            self.routed += 1
+
+    def dispatch(self, webhook):
+        '''
+        Call the handlers of a Webhook in the current thread.
+
+        :param webhook:
+            A Webhook. **REQUIRED**
+        '''
+
+        matches = self.match(webhook.type)
+
+        if not matches:
+            with self.__lock:
+                self.unhandled += 1
+            return
+
+        for (pattern, handler, metrics) in matches:
+            started = time.time()
+            error = None
+
+            try:
+                handler(webhook)
+            except Exception as e:
+                error = e
+
+            elapsed = time.time() - started
+
+            with self.__lock:
+                metrics.calls += 1
+                metrics.totalSeconds += elapsed
+                metrics.maxSeconds = max(metrics.maxSeconds, elapsed)
+
+                if error is not None:
+                    metrics.errors += 1
+
+            if error is not None and self.onError is not None:
+                try:
+                    self.onError(webhook, handler, error)
+                except Exception:
+                    pass
+
+    def metrics(self):
+        '''
+        Snapshot of the queue depths and handler metrics.
+
+        :returns:
+            A dictionary with routed and unhandled counts, the queue depth of
+            every partition and the metrics of every handler by name.
+        '''
+
+        with self.__lock:
+            return {
+                'routed': self.routed,
+                'unhandled': self.unhandled,
+                'queueDepths': [x.qsize() for x in self.partitions],
+                'handlers': dict((metrics.name, metrics.asDict()) for (pattern, handler, metrics) in self.handlers)
+            }
+
+    def start(self):
+        '''
+        Start a worker thread per partition.
+        '''
+
+        with self.__lock:
+            if self.__threads:
+                return
+
+            self.__threads = [
+                threading.Thread(target=self.__work, args=(partition,), name='hyperwallet-router-{}'.format(i))
+                for (i, partition) in enumerate(self.partitions)
+            ]
+
+        for thread in self.__threads:
+            thread.daemon = True
+            thread.start()
+
+    def drain(self, timeout=None):
+        '''
+        Wait until every routed Webhook is handled.
+
+        :param timeout:
+            Seconds to wait for all partitions, waits forever if not provided.
+        :returns:
+            True if every partition is empty, False if the timeout expired.
+        '''
+
+        deadline = time.time() + timeout if timeout is not None else None
+
+        for partition in self.partitions:
+            with partition.all_tasks_done:
+                while partition.unfinished_tasks:
+                    remaining = deadline - time.time() if deadline is not None else None
+
+                    if remaining is not None and remaining <= 0:
+                        return False
+
+                    partition.all_tasks_done.wait(remaining)
+
+        return True
+
+    def stop(self, timeout=None):
+        '''
+        Handle the routed Webhooks and stop the worker threads.
+
+        :param timeout:
+            Seconds to wait for each worker thread.
+        '''
+
+        with self.__lock:
+            threads, self.__threads = self.__threads, []
+
+        if not threads:
+            return
+
+        for partition in self.partitions:
+            partition.put(None)
+
+        for thread in threads:
+            thread.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __work(self, partition):
+        while True:
+            webhook = partition.get()
+
+            try:
+                if webhook is None:
+                    return
+
+                self.dispatch(webhook)
+            finally:
+                partition.task_done()
@@ -4,7 +4,13 @@ import mock
 import unittest
 import hyperwallet
 
-from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.exceptions import HyperwalletException, HyperwalletAPIException
+from hyperwallet.ledger import IdempotencyLedger
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class ApiInitializationTest(unittest.TestCase):
@@ -35,6 +41,13 @@ class ApiInitializationTest(unittest.TestCase):
 
         self.assertEqual(exc.exception.message, 'programToken is required')
 
+    def test_initialize_with_api_client(self):
+
+        apiClient = hyperwallet.utils.ApiClient('username', 'password', 'https://api.sandbox.hyperwallet.com')
+        api = hyperwallet.Api('username', 'password', 'prg-12345', apiClient=apiClient)
+
+        self.assertIs(api.apiClient, apiClient)
+
 
 class ApiTest(unittest.TestCase):
 
@@ -140,6 +153,31 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response.token, self.data.get('token'))
 
+    def test_get_users_fail_need_user_tokens(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.api.getUsers()
+
+        self.assertEqual(exc.exception.message, 'userTokens is required')
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_get_users_success(self, mock_get):
+
+        def makeRequest(method=None, url=None, params=None, **kwargs):
+            if url == 'users/usr-missing':
+                raise HyperwalletAPIException({'errors': [{'code': 'OBJECT_NOT_FOUND'}]})
+            return {'token': url.split('/')[1]}
+
+        mock_get.side_effect = makeRequest
+        response = self.api.getUsers(['usr-1', 'usr-missing', 'usr-2', 'usr-1', ''], concurrency=2)
+
+        self.assertEqual(list(response), ['usr-1', 'usr-missing', 'usr-2', ''])
+        self.assertEqual(response['usr-1'].token, 'usr-1')
+        self.assertEqual(response['usr-2'].token, 'usr-2')
+        self.assertIsInstance(response['usr-missing'], HyperwalletAPIException)
+        self.assertEqual(response[''].message, 'userToken is required')
+        self.assertEqual(mock_get.call_count, 3)
+
     def test_update_user_fail_need_user_token(self):
 
         with self.assertRaises(HyperwalletException) as exc:
@@ -290,6 +328,32 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response.token, self.data.get('token'))
 
+    def test_get_bank_accounts_fail_need_user_token(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.api.getBankAccounts()
+
+        self.assertEqual(exc.exception.message, 'userToken is required')
+
+    def test_get_bank_accounts_fail_need_bank_account_tokens(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.api.getBankAccounts('token')
+
+        self.assertEqual(exc.exception.message, 'bankAccountTokens is required')
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_get_bank_accounts_success(self, mock_get):
+
+        mock_get.side_effect = lambda method=None, url=None, params=None, **kwargs: {'token': url.split('/')[-1]}
+        response = self.api.getBankAccounts('usr-1', ['trm-1', 'trm-2'])
+
+        self.assertEqual([x.token for x in response.values()], ['trm-1', 'trm-2'])
+        self.assertEqual(
+            sorted(x[1]['url'] for x in mock_get.call_args_list),
+            ['users/usr-1/bank-accounts/trm-1', 'users/usr-1/bank-accounts/trm-2']
+        )
+
     def test_update_bank_account_fail_need_user_token(self):
 
         with self.assertRaises(HyperwalletException) as exc:
@@ -1423,6 +1487,29 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response.sourceToken, transfer_data.get('sourceToken'))
 
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_transfer_with_ledger_resolves_ambiguous_outcome(self, mock_request):
+
+        transfer_data = {
+            'sourceToken': 'test-source-token',
+            'destinationToken': 'test-destination-token',
+            'clientTransferId': 'transfer-1'
+        }
+        self.api.idempotencyLedger = IdempotencyLedger()
+        mock_request.side_effect = [
+            HyperwalletAPIException({'errors': [{'code': 'GARBAGE_RESPONSE', 'message': 'Invalid response'}]}),
+            {'data': [{'token': 'trf-1', 'clientTransferId': 'transfer-1'}]}
+        ]
+
+        with self.assertRaises(HyperwalletAPIException):
+            self.api.createTransfer(transfer_data)
+
+        response = self.api.createTransfer(transfer_data)
+
+        self.assertEqual(response.token, 'trf-1')
+        self.assertEqual(mock_request.call_args[1]['url'], 'transfers')
+        self.assertEqual(mock_request.call_args[1]['params'], {'clientTransferId': 'transfer-1'})
+
     def test_get_transfer_fail_need_transfer_token(self):
 
         with self.assertRaises(HyperwalletException) as exc:
@@ -1438,6 +1525,21 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response.token, self.data.get('token'))
 
+    def test_get_transfers_fail_need_transfer_tokens(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.api.getTransfers()
+
+        self.assertEqual(exc.exception.message, 'transferTokens is required')
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_get_transfers_success(self, mock_get):
+
+        mock_get.side_effect = lambda method=None, url=None, params=None, **kwargs: {'token': url.split('/')[-1]}
+        response = self.api.getTransfers(iter(['trf-1', 'trf-2']))
+
+        self.assertEqual(response['trf-2'].token, 'trf-2')
+
     def test_list_transfers_fail_need_params_invalid(self):
 
         options = {'clientTransferId': 'test', 'status': 'test'}
@@ -2103,6 +2205,119 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response.token, self.data.get('token'))
 
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_records_response(self, mock_post):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+        mock_post.return_value = {'token': 'pmt-1', 'clientPaymentId': 'payment-1'}
+
+        first = self.api.createPayment({'clientPaymentId': 'payment-1'})
+        second = self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        self.assertEqual(first.token, 'pmt-1')
+        self.assertEqual(second.token, 'pmt-1')
+        self.assertEqual(mock_post.call_count, 1)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_without_client_id(self, mock_post):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+        mock_post.return_value = self.data
+
+        self.api.createPayment(self.data)
+        self.api.createPayment(self.data)
+
+        self.assertEqual(mock_post.call_count, 2)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_resolves_ambiguous_outcome(self, mock_request):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+        mock_request.side_effect = [
+            HyperwalletAPIException({'errors': [{'code': 'COMMUNICATION_ERROR', 'message': 'timeout'}]}),
+            {'data': [{'token': 'pmt-1', 'clientPaymentId': 'payment-1'}]}
+        ]
+
+        with self.assertRaises(HyperwalletAPIException):
+            self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        response = self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        self.assertEqual(response.token, 'pmt-1')
+        self.assertEqual(mock_request.call_args[1]['method'], 'GET')
+        self.assertEqual(mock_request.call_args[1]['params'], {'clientPaymentId': 'payment-1'})
+        self.assertEqual(self.api.idempotencyLedger.get('payments', 'payment-1').response['token'], 'pmt-1')
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_resends_when_lookup_is_empty(self, mock_request):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+        mock_request.side_effect = [
+            HyperwalletAPIException({'errors': [{'code': 'COMMUNICATION_ERROR', 'message': 'timeout'}]}),
+            {'data': []},
+            {'token': 'pmt-1'}
+        ]
+
+        with self.assertRaises(HyperwalletAPIException):
+            self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        response = self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        self.assertEqual(response.token, 'pmt-1')
+        self.assertEqual([x[1]['method'] for x in mock_request.call_args_list], ['POST', 'GET', 'POST'])
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_keeps_ambiguous_when_lookup_fails(self, mock_request):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+        self.api.idempotencyLedger.begin('payments', 'payment-1')
+        self.api.idempotencyLedger.abandon('payments', 'payment-1')
+        mock_request.side_effect = HyperwalletAPIException({'errors': [{'code': 'SERVER_ERROR'}]})
+
+        with self.assertRaises(HyperwalletAPIException):
+            self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        self.assertTrue(self.api.idempotencyLedger.begin('payments', 'payment-1').ambiguous)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_looks_up_after_server_errors(self, mock_request):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+
+        for (clientPaymentId, error) in (
+            ('payment-1', HyperwalletAPIException('Invalid Content-Type specified in Response Header', 504)),
+            ('payment-2', HyperwalletAPIException({'errors': [{'code': 'SERVER_ERROR', 'message': 'Unavailable'}]}, 503))
+        ):
+            mock_request.reset_mock()
+            mock_request.side_effect = [error, {'data': [{'token': 'pmt-1', 'clientPaymentId': clientPaymentId}]}]
+
+            with self.assertRaises(HyperwalletAPIException):
+                self.api.createPayment({'clientPaymentId': clientPaymentId})
+
+            response = self.api.createPayment({'clientPaymentId': clientPaymentId})
+
+            self.assertEqual(response.token, 'pmt-1')
+            self.assertEqual([x[1]['method'] for x in mock_request.call_args_list], ['POST', 'GET'])
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_create_payment_with_ledger_records_rejection(self, mock_post):
+
+        self.api.idempotencyLedger = IdempotencyLedger()
+        mock_post.side_effect = [
+            HyperwalletAPIException({'errors': [{'code': 'CONSTRAINT_VIOLATIONS', 'message': 'Invalid'}]}),
+            {'token': 'pmt-1'}
+        ]
+
+        with self.assertRaises(HyperwalletAPIException):
+            self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        self.assertEqual(self.api.idempotencyLedger.get('payments', 'payment-1').state, 'FAILED')
+
+        response = self.api.createPayment({'clientPaymentId': 'payment-1'})
+
+        self.assertEqual(response.token, 'pmt-1')
+        self.assertEqual([x[1]['method'] for x in mock_post.call_args_list], ['POST', 'POST'])
+
     def test_get_payment_fail_need_payment_token(self):
 
         with self.assertRaises(HyperwalletException) as exc:
@@ -2118,6 +2333,25 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response.token, self.data.get('token'))
 
+    def test_get_payments_fail_need_payment_tokens(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.api.getPayments()
+
+        self.assertEqual(exc.exception.message, 'paymentTokens is required')
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_get_payments_success(self, mock_get):
+
+        mock_get.side_effect = lambda method=None, url=None, params=None, **kwargs: {'token': url.split('/')[-1]}
+        response = self.api.getPayments([])
+
+        self.assertEqual(len(response), 0)
+
+        response = self.api.getPayments(['pmt-1'])
+
+        self.assertEqual(response['pmt-1'].token, 'pmt-1')
+
     def test_list_payments_fail_need_params_invalid(self):
 
         options = {'currency': 'test', 'email': 'test'}
@@ -2451,6 +2685,33 @@ class ApiTest(unittest.TestCase):
 
         self.assertTrue(response[0].currency, self.balance.get('currency'))
 
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_list_user_balances_as_frame(self, mock_get):
+
+        mock_get.return_value = {'data': [{'currency': 'USD', 'amount': '10.00'}]}
+        response = self.api.listBalancesForUser('token', asFrame=True)
+
+        self.assertEqual(response['amount'].tolist(), [1000])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_list_user_receipts_as_frame(self, mock_get):
+
+        mock_get.return_value = {'data': [{'currency': 'USD', 'amount': '10.00', 'type': 'PAYMENT'}]}
+        response = self.api.listReceiptsForUser('token', asFrame=True)
+
+        self.assertEqual(response.decode('type').tolist(), ['PAYMENT'])
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_list_account_receipts_as_frame(self, mock_get):
+
+        mock_get.return_value = {}
+        response = self.api.listReceiptsForAccount('token', 'token', asFrame=True)
+
+        self.assertEqual(len(response), 0)
+
     '''
 
     Programs
@@ -2619,6 +2880,68 @@ class ApiTest(unittest.TestCase):
 
         self.assertEqual(response, [])
 
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_list_transfer_method_configurations_expands_countries_and_currencies(self, mock_get):
+
+        mock_get.return_value = {'data': [{
+            'countries': ['US', 'CA'],
+            'currencies': ['USD', 'CAD', 'EUR'],
+            'type': 'BANK_ACCOUNT',
+            'profileType': 'INDIVIDUAL'
+        }]}
+        response = self.api.listTransferMethodConfigurations('token')
+
+        self.assertEqual(len(response), 6)
+        self.assertEqual([(x.country, x.currency) for x in response], [
+            ('US', 'USD'), ('US', 'CAD'), ('US', 'EUR'),
+            ('CA', 'USD'), ('CA', 'CAD'), ('CA', 'EUR')
+        ])
+        self.assertEqual((response[4].country, response[4].currency), ('CA', 'CAD'))
+        self.assertEqual((response[-1].country, response[-1].currency), ('CA', 'EUR'))
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_list_transfer_method_configurations_does_not_mutate_params(self, mock_get):
+
+        options = {'offset': 0}
+        mock_get.return_value = {'data': [self.configuration]}
+        self.api.listTransferMethodConfigurations('token', options)
+
+        self.assertEqual(options, {'offset': 0})
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_get_transfer_method_configuration_cached(self, mock_get):
+
+        api = hyperwallet.Api('test-user', 'test-pass', 'prg-12345', configurationCacheData={'maxSize': 10, 'ttl': 60})
+        mock_get.return_value = self.configuration
+        api.getTransferMethodConfiguration('token', 'US', 'USD', 'BANK_ACCOUNT', 'INDIVIDUAL')
+        response = api.getTransferMethodConfiguration('token', 'US', 'USD', 'BANK_ACCOUNT', 'INDIVIDUAL')
+
+        self.assertEqual(response.type, self.configuration.get('type'))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(api.configurationCache.stats().get('hits'), 1)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_get_transfer_method_configuration_cached_per_user(self, mock_get):
+
+        api = hyperwallet.Api('test-user', 'test-pass', 'prg-12345', configurationCacheData={})
+        mock_get.return_value = self.configuration
+        api.getTransferMethodConfiguration('token1', 'US', 'USD', 'BANK_ACCOUNT', 'INDIVIDUAL')
+        api.getTransferMethodConfiguration('token2', 'US', 'USD', 'BANK_ACCOUNT', 'INDIVIDUAL')
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_list_transfer_method_configurations_cached_ignore_user_token(self, mock_get):
+
+        api = hyperwallet.Api('test-user', 'test-pass', 'prg-12345', configurationCacheData={'ignoreUserToken': True})
+        mock_get.return_value = {'data': [self.configuration]}
+        api.listTransferMethodConfigurations('token1', {})
+        response = api.listTransferMethodConfigurations('token2', {})
+
+        self.assertEqual(response[0].country, 'US')
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(api.configurationCache.stats().get('hitRate'), 0.5)
+
     '''
 
     Webhook Notifications
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+import mock
+import unittest
+
+from decimal import Decimal
+
+from hyperwallet import Balance, PrepaidCard, User
+from hyperwallet.balances import BalanceAggregator
+from hyperwallet.exceptions import HyperwalletAPIException
+
+
+def page(items, params):
+    return items[params['offset']:params['offset'] + params['limit']]
+
+
+class BalanceAggregatorTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.balances = {
+            'usr-1': [Balance({'currency': 'USD', 'amount': '10.50'}), Balance({'currency': 'CAD', 'amount': '1.00'})],
+            'usr-2': [Balance({'currency': 'USD', 'amount': '-0.25'})],
+            'trm-1': [Balance({'currency': 'USD', 'amount': '5.00'})]
+        }
+
+        def listBalancesForUser(userToken, params=None):
+            if userToken == 'usr-3':
+                raise HyperwalletAPIException({'errors': [{'code': 'OBJECT_NOT_FOUND'}]})
+            return page(self.balances[userToken], params)
+
+        self.api = mock.MagicMock()
+        self.api.listBalancesForUser.side_effect = listBalancesForUser
+        self.api.listBalancesForPrepaidCard.side_effect = lambda userToken, prepaidCardToken: self.balances[prepaidCardToken]
+
+    def test_aggregate(self):
+
+        aggregator = BalanceAggregator(self.api, concurrency=2)
+        results = []
+        errors = []
+        progress = []
+
+        totals = aggregator.aggregate(
+            ['usr-1', 'usr-2', 'usr-3'],
+            onResult=results.append,
+            onError=errors.append,
+            onProgress=lambda processed, failed: progress.append((processed, failed)),
+            progressInterval=2
+        )
+
+        self.assertEqual(totals, {'USD': Decimal('10.25'), 'CAD': Decimal('1.00')})
+        self.assertEqual(sorted(x.userToken for x in results), ['usr-1', 'usr-2'])
+        self.assertEqual(errors[0].userToken, 'usr-3')
+        self.assertIsInstance(errors[0].error, HyperwalletAPIException)
+        self.assertEqual(progress, [(2, progress[0][1]), (3, 1)])
+        self.assertEqual((aggregator.processed, aggregator.failed), (3, 1))
+
+    def test_iter_balances_with_prepaid_cards(self):
+
+        self.api.listPrepaidCards.side_effect = lambda userToken, params: [PrepaidCard({'token': 'trm-1'})] if userToken == 'usr-1' else []
+        aggregator = BalanceAggregator(self.api, includePrepaidCards=True)
+
+        results = dict((x.userToken, x) for x in aggregator.iterBalances(['usr-1', 'usr-2']))
+
+        self.assertEqual(results['usr-1'].sources['trm-1'], {'USD': Decimal('5.00')})
+        self.assertEqual(results['usr-1'].totals, {'USD': Decimal('15.50'), 'CAD': Decimal('1.00')})
+        self.assertEqual(aggregator.totals, {'USD': Decimal('15.25'), 'CAD': Decimal('1.00')})
+
+    def test_walks_every_page_of_balances_and_prepaid_cards(self):
+
+        self.balances['usr-1'] = [Balance({'currency': 'USD', 'amount': '1.00'})] * 250
+        prepaidCards = [PrepaidCard({'token': 'trm-{}'.format(i)}) for i in range(150)]
+
+        for prepaidCard in prepaidCards:
+            self.balances[prepaidCard.token] = [Balance({'currency': 'CAD', 'amount': '2.00'})]
+
+        self.api.listPrepaidCards.side_effect = lambda userToken, params: page(prepaidCards, params)
+        aggregator = BalanceAggregator(self.api, includePrepaidCards=True)
+
+        result = next(aggregator.iterBalances(['usr-1']))
+
+        self.assertEqual(result.totals, {'USD': Decimal('250.00'), 'CAD': Decimal('300.00')})
+        self.assertEqual(len(result.sources), 151)
+        self.assertEqual(self.api.listBalancesForUser.call_count, 3)
+        self.assertEqual(self.api.listPrepaidCards.call_count, 2)
+
+    def test_walks_users_when_no_tokens_are_given(self):
+
+        self.api.listUsers.side_effect = [[User({'token': 'usr-1'}), User({'token': 'usr-2'})]]
+        aggregator = BalanceAggregator(self.api)
+
+        totals = aggregator.aggregate()
+
+        self.assertEqual(totals, {'USD': Decimal('10.25'), 'CAD': Decimal('1.00')})
+        self.api.listUsers.assert_called_once_with({'offset': 0, 'limit': 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
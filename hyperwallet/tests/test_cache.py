@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+import mock
+import unittest
+
+from hyperwallet.utils.cache import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def test_get_missing_key_returns_default(self):
+
+        cache = TTLCache()
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('key', 'default'), 'default')
+        self.assertEqual(cache.stats().get('misses'), 2)
+
+    def test_set_and_get(self):
+
+        cache = TTLCache()
+        cache.set('key', 'value')
+
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertEqual(cache.stats(), {
+            'hits': 1,
+            'misses': 0,
+            'evictions': 0,
+            'size': 1,
+            'hitRate': 1.0
+        })
+
+    def test_evicts_least_recently_used(self):
+
+        cache = TTLCache(maxSize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        self.assertEqual(cache.stats().get('evictions'), 1)
+
+    @mock.patch('time.time')
+    def test_entries_expire(self, time_mock):
+
+        time_mock.return_value = 1000
+        cache = TTLCache(ttl=10)
+        cache.set('key', 'value')
+
+        time_mock.return_value = 1009
+        self.assertEqual(cache.get('key'), 'value')
+
+        time_mock.return_value = 1010
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self):
+
+        cache = TTLCache()
+        cache.set('key', 'value')
+        cache.get('key')
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats().get('hits'), 0)
+
+    def test_invalid_max_size(self):
+
+        with self.assertRaises(ValueError):
+            TTLCache(maxSize=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,9 @@
 import mock
 import json
 import unittest
+import io
+import threading
+import tempfile
 import os.path
 
 from hyperwallet.utils import ApiClient
@@ -32,6 +35,19 @@ class ApiClientTest(unittest.TestCase):
             {'clientPrivateKeySetLocation': clientPath, 'hyperwalletKeySetLocation': hyperwalletPath}
         )
 
+    def test_session_created_on_first_use(self):
+
+        self.assertIs(self.client.session, self.client.session)
+        self.assertEqual(self.client.session.auth, ('test-user', 'test-pass'))
+        self.assertEqual(self.client.session.headers, self.client.baseHeaders)
+
+    def test_session_can_be_replaced(self):
+
+        session = mock.MagicMock()
+        self.client.session = session
+
+        self.assertIs(self.client.session, session)
+
     def test_failed_connection(self):
 
         with self.assertRaises(HyperwalletAPIException) as exc:
@@ -163,6 +179,65 @@ class ApiClientTest(unittest.TestCase):
             json.loads(encoded)
         )
 
+    @mock.patch('requests.Session.request')
+    def test_receive_valid_json_bytes_response(self, session_mock):
+
+        data = {
+            'key': u'valu\u00e9'
+        }
+
+        session_mock.return_value = mock.MagicMock(
+            status_code=200,
+            content=json.dumps(data, ensure_ascii=False).encode('utf-8'),
+            headers={
+                "Content-Type": "application/json"
+            }
+        )
+
+        self.assertEqual(self.client._makeRequest(), data)
+
+    @mock.patch('requests.Session.request')
+    def test_receive_invalid_utf8_bytes_response(self, session_mock):
+
+        session_mock.return_value = mock.MagicMock(
+            status_code=200,
+            content=b'{"key": "\xff"}',
+            headers={
+                "Content-Type": "application/json"
+            }
+        )
+
+        with self.assertRaises(HyperwalletAPIException) as exc:
+            self.client._makeRequest()
+
+        self.assertEqual(
+            exc.exception.message.get('errors')[0].get('code'),
+            'GARBAGE_RESPONSE'
+        )
+
+    @mock.patch('requests.Session.request')
+    def test_request_with_encryption_bytes_response(self, session_mock):
+
+        data = {
+            'key': 'value'
+        }
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        clientPath = os.path.join(localDir, 'resources', 'private-jwkset1')
+        hyperwalletPath = os.path.join(localDir, 'resources', 'public-jwkset1')
+        encryption = Encryption(clientPath, hyperwalletPath)
+        encryptedMessage = encryption.encrypt(json.dumps(data))
+
+        session_mock.return_value = mock.MagicMock(
+            status_code=200,
+            content=encryptedMessage.encode('ascii'),
+            headers={
+                "Content-Type": "application/jose+json"
+            }
+        )
+
+        self.assertEqual(self.clientWithEncryption._makeRequest(), data)
+
     @mock.patch('requests.Session.request')
     def test_request_with_encryption_when_content_type_contains_charset(self, session_mock):
 
@@ -251,6 +326,7 @@ class ApiClientTest(unittest.TestCase):
             exc.exception.message,
             'Invalid Content-Type specified in Response Header'
         )
+        self.assertEqual(exc.exception.statusCode, 200)
 
     @mock.patch('requests.Session.request')
     def test_request_with_encryption_when_status_code_204_and_content_type_is_not_set(self, session_mock):
@@ -369,6 +445,92 @@ class ApiClientTest(unittest.TestCase):
             'Invalid Content-Type specified in Response Header'
         )
 
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_coalesce_identical_get_requests(self, request_mock):
+
+        client = ApiClient('test-user', 'test-pass', SERVER, coalesceRequests=True)
+        release = threading.Event()
+        responses = []
+
+        def makeRequest(**kwargs):
+            release.wait(5)
+            return {'token': 'usr-1', 'documents': []}
+
+        request_mock.side_effect = makeRequest
+
+        threads = [
+            threading.Thread(target=lambda: responses.append(client.doGet('users/usr-1', {'a': 1})))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+
+        while client.singleFlight.executions + client.singleFlight.coalesced < 4:
+            pass
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(request_mock.call_count, 1)
+        self.assertEqual(responses, [{'token': 'usr-1', 'documents': []}] * 4)
+        self.assertEqual(len(set(id(x) for x in responses)), 4)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_coalesce_requests_disabled_by_default(self, request_mock):
+
+        request_mock.return_value = {}
+        self.client.doGet('users/usr-1')
+        self.client.doGet('users/usr-1')
+
+        self.assertIsNone(self.client.singleFlight)
+        self.assertEqual(request_mock.call_count, 2)
+
+    @mock.patch('requests.Session.request')
+    def test_put_document_streams_multipart_body(self, session_mock):
+
+        bodies = []
+
+        def request(**kwargs):
+            bodies.append((kwargs.get('headers'), kwargs.get('data').read()))
+            return mock.MagicMock(
+                status_code=200,
+                content=json.dumps({'token': 'usr-1'}),
+                headers={'Content-Type': 'application/json'}
+            )
+
+        session_mock.side_effect = request
+        progress = []
+
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+            f.write(b'back-side-bytes')
+
+        try:
+            response = self.client.putDocument(
+                'users/usr-1',
+                {'data': ['{"documents": []}']},
+                {
+                    'drivers_license_front': ('front.png', io.BytesIO(b'front-side-bytes'), 'image/png'),
+                    'drivers_license_back': f.name
+                },
+                onProgress=lambda x: progress.append((x.bytesSent, x.totalBytes, x.done))
+            )
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(response, {'token': 'usr-1'})
+
+        headers, body = bodies[0]
+
+        self.assertTrue(headers['Content-Type'].startswith('multipart/form-data; boundary='))
+        self.assertIn(b'{"documents": []}', body)
+        self.assertIn(b'filename="' + os.path.basename(f.name).encode() + b'"', body)
+        self.assertIn(b'front-side-bytes', body)
+        self.assertIn(b'Content-Type: image/png', body)
+        self.assertIn(b'back-side-bytes', body)
+        self.assertEqual(progress[-1][0], len(body))
+        self.assertTrue(progress[-1][2])
+
 
 if __name__ == '__main__':
     unittest.main()
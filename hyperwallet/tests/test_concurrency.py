@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import time
+import threading
+import unittest
+
+from hyperwallet.utils.concurrency import boundedMap
+
+
+class BoundedMapTest(unittest.TestCase):
+
+    def test_returns_every_result(self):
+
+        results = list(boundedMap(lambda x: x * 2, range(20), concurrency=4))
+
+        self.assertEqual(sorted(result for (item, result, error) in results), [x * 2 for x in range(20)])
+        self.assertTrue(all(error is None for (item, result, error) in results))
+
+    def test_reports_errors_without_aborting(self):
+
+        def function(item):
+            if item == 3:
+                raise ValueError('bad item')
+            return item
+
+        results = dict((item, (result, error)) for (item, result, error) in boundedMap(function, range(5)))
+
+        self.assertEqual(len(results), 5)
+        self.assertIsNone(results[3][0])
+        self.assertEqual(str(results[3][1]), 'bad item')
+        self.assertEqual(results[4], (4, None))
+
+    def test_limits_items_in_flight(self):
+
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0, 'pulled': 0}
+
+        def items():
+            for item in range(30):
+                state['pulled'] += 1
+                yield item
+
+        def function(item):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.001)
+            with lock:
+                state['active'] -= 1
+            return item
+
+        generator = boundedMap(function, items(), concurrency=3, maxPending=5)
+        next(generator)
+
+        self.assertLessEqual(state['pulled'], 6)
+
+        list(generator)
+
+        self.assertLessEqual(state['peak'], 3)
+        self.assertEqual(state['pulled'], 30)
+
+    def test_invalid_concurrency(self):
+
+        with self.assertRaises(ValueError):
+            list(boundedMap(lambda x: x, [1], concurrency=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
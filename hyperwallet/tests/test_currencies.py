@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import unittest
+
+from decimal import Decimal
+
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.utils.currencies import getCurrencyDigits, toDecimal, toMinorUnits, fromMinorUnits
+
+
+class CurrenciesTest(unittest.TestCase):
+
+    def test_currency_digits(self):
+
+        self.assertEqual(getCurrencyDigits('USD'), 2)
+        self.assertEqual(getCurrencyDigits('JPY'), 0)
+        self.assertEqual(getCurrencyDigits('KWD'), 3)
+
+    def test_to_decimal(self):
+
+        self.assertEqual(toDecimal('10.50'), Decimal('10.50'))
+        self.assertEqual(toDecimal(3), Decimal('3'))
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toDecimal('abc')
+
+        self.assertEqual(exc.exception.message, 'Invalid amount = abc')
+
+    def test_to_minor_units(self):
+
+        self.assertEqual(toMinorUnits('10.50', 'USD'), 1050)
+        self.assertEqual(toMinorUnits('-0.01', 'USD'), -1)
+        self.assertEqual(toMinorUnits('1000', 'JPY'), 1000)
+        self.assertEqual(toMinorUnits('1.125', 'BHD'), 1125)
+
+    def test_to_minor_units_formats(self):
+
+        self.assertEqual(toMinorUnits('10', 'USD'), 1000)
+        self.assertEqual(toMinorUnits('10.5', 'USD'), 1050)
+        self.assertEqual(toMinorUnits('10.', 'USD'), 1000)
+        self.assertEqual(toMinorUnits('.5', 'USD'), 50)
+        self.assertEqual(toMinorUnits('+1.00', 'USD'), 100)
+        self.assertEqual(toMinorUnits(' 1.00 ', 'USD'), 100)
+        self.assertEqual(toMinorUnits('1.000', 'JPY'), 1)
+        self.assertEqual(toMinorUnits('1e2', 'USD'), 10000)
+        self.assertEqual(toMinorUnits(Decimal('2.5'), 'USD'), 250)
+        self.assertEqual(toMinorUnits(3, 'USD'), 300)
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toMinorUnits('1.2.3', 'USD')
+
+        self.assertEqual(exc.exception.message, 'Invalid amount = 1.2.3')
+
+    def test_to_minor_units_too_many_decimals(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toMinorUnits('1.5', 'JPY')
+
+        self.assertEqual(exc.exception.message, 'Amount 1.5 has too many decimals for currency JPY')
+
+    def test_from_minor_units(self):
+
+        self.assertEqual(fromMinorUnits(1050, 'USD'), Decimal('10.50'))
+        self.assertEqual(str(fromMinorUnits(1050, 'USD')), '10.50')
+        self.assertEqual(fromMinorUnits(7, 'JPY'), Decimal('7'))
+
+
+if __name__ == '__main__':
+    unittest.main()
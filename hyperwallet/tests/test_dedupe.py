@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+import unittest
+
+from hyperwallet import Webhook
+from hyperwallet.dedupe import WebhookDeduplicator
+
+
+class Clock(object):
+
+    def __init__(self, now=1000.0):
+
+        self.now = now
+
+    def __call__(self):
+
+        return self.now
+
+
+class WebhookDeduplicatorTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.clock = Clock()
+
+    def test_invalid_arguments(self):
+
+        with self.assertRaises(ValueError):
+            WebhookDeduplicator(window=0)
+
+        with self.assertRaises(ValueError):
+            WebhookDeduplicator(buckets=0)
+
+        with self.assertRaises(ValueError):
+            WebhookDeduplicator(maxTokens=0)
+
+    def test_seen_webhooks_and_tokens(self):
+
+        dedupe = WebhookDeduplicator(clock=self.clock)
+
+        self.assertFalse(dedupe.seen(Webhook({'token': 'wbh-1'})))
+        self.assertTrue(dedupe.seen(Webhook({'token': 'wbh-1'})))
+        self.assertTrue(dedupe.seen('wbh-1'))
+        self.assertFalse(dedupe.seen('wbh-2'))
+
+        self.assertEqual(dedupe.accepted, 2)
+        self.assertEqual(dedupe.duplicates, 2)
+        self.assertEqual(len(dedupe), 2)
+        self.assertIn('wbh-2', dedupe)
+        self.assertNotIn('wbh-3', dedupe)
+
+    def test_tokens_expire_after_window(self):
+
+        dedupe = WebhookDeduplicator(window=60, buckets=6, clock=self.clock)
+        dedupe.seen('wbh-1')
+
+        self.clock.now += 60
+
+        self.assertIn('wbh-1', dedupe)
+
+        self.clock.now += 10
+
+        self.assertNotIn('wbh-1', dedupe)
+        self.assertEqual(len(dedupe), 0)
+        self.assertFalse(dedupe.seen('wbh-1'))
+
+    def test_rotation_keeps_recent_tokens(self):
+
+        dedupe = WebhookDeduplicator(window=60, buckets=6, clock=self.clock)
+
+        for i in range(120):
+            dedupe.seen('wbh-{}'.format(i))
+            self.clock.now += 1
+
+        self.assertTrue(all('wbh-{}'.format(i) in dedupe for i in range(60, 120)))
+        self.assertNotIn('wbh-0', dedupe)
+        self.assertLessEqual(len(dedupe), 70)
+        self.assertEqual(dedupe.evicted, 0)
+
+    def test_memory_cap_drops_oldest_bucket(self):
+
+        dedupe = WebhookDeduplicator(window=60, buckets=6, maxTokens=25, clock=self.clock)
+
+        for i in range(30):
+            dedupe.seen('wbh-{}'.format(i))
+
+            if i % 10 == 9:
+                self.clock.now += 10
+
+        self.assertEqual(len(dedupe), 20)
+        self.assertEqual(dedupe.evicted, 10)
+        self.assertNotIn('wbh-0', dedupe)
+        self.assertIn('wbh-10', dedupe)
+
+    def test_memory_cap_with_single_bucket(self):
+
+        dedupe = WebhookDeduplicator(maxTokens=3, clock=self.clock)
+
+        for i in range(4):
+            dedupe.seen('wbh-{}'.format(i))
+
+        self.assertEqual(len(dedupe), 0)
+        self.assertEqual(dedupe.evicted, 4)
+        self.assertFalse(dedupe.seen('wbh-0'))
+
+    def test_filter(self):
+
+        dedupe = WebhookDeduplicator(clock=self.clock)
+        webhooks = [Webhook({'token': 'wbh-{}'.format(i % 3)}) for i in range(7)]
+
+        self.assertEqual([x.token for x in dedupe.filter(webhooks)], ['wbh-0', 'wbh-1', 'wbh-2'])
+
+    def test_wrap(self):
+
+        calls = []
+        handler = WebhookDeduplicator(clock=self.clock).wrap(calls.append)
+
+        for token in ('wbh-1', 'wbh-2', 'wbh-1'):
+            handler(Webhook({'token': token}))
+
+        self.assertEqual([x.token for x in calls], ['wbh-1', 'wbh-2'])
+
+    def test_wrap_forgets_failed_webhook(self):
+
+        calls = []
+        dedupe = WebhookDeduplicator(clock=self.clock)
+
+        def handle(webhook):
+            calls.append(webhook.token)
+
+            if len(calls) == 1:
+                raise RuntimeError('failed')
+
+        handler = dedupe.wrap(handle)
+
+        with self.assertRaises(RuntimeError):
+            handler(Webhook({'token': 'wbh-1'}))
+
+        self.assertNotIn('wbh-1', dedupe)
+
+        handler(Webhook({'token': 'wbh-1'}))
+        handler(Webhook({'token': 'wbh-1'}))
+
+        self.assertEqual(calls, ['wbh-1', 'wbh-1'])
+        self.assertEqual(len(dedupe), 1)
+
+    def test_forget(self):
+
+        dedupe = WebhookDeduplicator(clock=self.clock)
+        dedupe.seen('wbh-1')
+
+        self.assertTrue(dedupe.forget('wbh-1'))
+        self.assertFalse(dedupe.forget('wbh-1'))
+        self.assertEqual(len(dedupe), 0)
+        self.assertFalse(dedupe.seen('wbh-1'))
+
+    def test_clear(self):
+
+        dedupe = WebhookDeduplicator(clock=self.clock)
+        dedupe.seen('wbh-1')
+        dedupe.clear()
+
+        self.assertEqual(len(dedupe), 0)
+        self.assertFalse(dedupe.seen('wbh-1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+import io
+import os
+import mock
+import tempfile
+import threading
+import unittest
+
+from hyperwallet import Api, RejectReason
+from hyperwallet.documents import BulkDocumentUploader, ByteBudget, getUploadSize
+from hyperwallet.exceptions import HyperwalletAPIException
+
+
+class ByteBudgetTest(unittest.TestCase):
+
+    def test_blocks_until_released(self):
+
+        budget = ByteBudget(10)
+        budget.acquire(6)
+        acquired = threading.Event()
+
+        thread = threading.Thread(target=lambda: (budget.acquire(6), acquired.set()))
+        thread.start()
+
+        self.assertFalse(acquired.wait(0.05))
+
+        budget.release(6)
+        thread.join()
+
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(budget.inFlight, 6)
+
+    def test_admits_oversized_operation_alone(self):
+
+        budget = ByteBudget(10)
+        budget.acquire(100)
+
+        self.assertEqual(budget.inFlight, 100)
+
+
+class GetUploadSizeTest(unittest.TestCase):
+
+    def test_sizes(self):
+
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b'12345')
+
+        try:
+            with open(f.name, 'rb') as opened:
+                self.assertEqual(getUploadSize({
+                    'path': f.name,
+                    'file': opened,
+                    'tuple': ('name.png', io.BytesIO(b'123'), 'image/png'),
+                    'missing': 'does-not-exist'
+                }), 13)
+        finally:
+            os.remove(f.name)
+
+        self.assertEqual(getUploadSize(None), 0)
+
+    def test_get_upload_size_bytes(self):
+
+        self.assertEqual(getUploadSize({
+            'tuple': ('name.png', b'x' * 1000, 'image/png'),
+            'bytearray': ('name.png', bytearray(b'123')),
+            'bytes': b'12345'
+        }), 1008)
+
+
+class BulkDocumentUploaderTest(unittest.TestCase):
+
+    @mock.patch('hyperwallet.utils.ApiClient.putDocument')
+    def test_upload(self, put_mock):
+
+        def putDocument(partialUrl, data, files, onProgress=None):
+            userToken = partialUrl.split('/')[1]
+
+            if userToken == 'usr-3':
+                raise HyperwalletAPIException({'errors': [{'code': 'COMMUNICATION_ERROR'}]})
+
+            documents = [{'type': 'DRIVERS_LICENSE', 'status': 'NEW'}]
+
+            if userToken == 'usr-2':
+                documents = [{
+                    'type': 'DRIVERS_LICENSE',
+                    'status': 'INVALID',
+                    'reasons': [{'name': 'DOCUMENT_EXPIRED', 'description': 'Document has expired'}]
+                }]
+
+            return {'token': userToken, 'documents': documents}
+
+        put_mock.side_effect = putDocument
+        api = Api('test-user', 'test-pass', 'prg-12345')
+        uploader = BulkDocumentUploader(api, concurrency=2, maxBytesInFlight=4)
+
+        jobs = (
+            (userToken, {'data': '{}'}, {'front': ('front.png', io.BytesIO(b'abc'))})
+            for userToken in ['usr-1', 'usr-2', 'usr-3']
+        )
+        results = dict((x.userToken, x) for x in uploader.upload(jobs))
+
+        self.assertTrue(results['usr-1'].successful)
+        self.assertEqual(results['usr-1'].user.documents[0].type, 'DRIVERS_LICENSE')
+        self.assertEqual(results['usr-1'].size, 3)
+        self.assertEqual(results['usr-2'].reasons, [('DRIVERS_LICENSE', RejectReason.DOCUMENT_EXPIRED, 'Document has expired')])
+        self.assertIsInstance(results['usr-3'].error, HyperwalletAPIException)
+        self.assertEqual((uploader.uploaded, uploader.rejected, uploader.failed), (1, 1, 1))
+        self.assertEqual(uploader.budget.inFlight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,11 +6,14 @@ import json
 import os.path
 import mock
 
-from jwcrypto import jwk, jws as cryptoJWS
+from jwcrypto import jwk, jws as cryptoJWS, jwe
 from jwcrypto.common import json_encode
 from hyperwallet.exceptions import HyperwalletException
 from hyperwallet.utils.encryption import Encryption
-from six.moves.urllib.parse import urlparse
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse  # Python 2
 
 
 class EncryptionTest(unittest.TestCase):
@@ -157,6 +160,104 @@ class EncryptionTest(unittest.TestCase):
 
         self.assertEqual(exc.exception.message, 'JWS signature has expired, checked by [exp] JWS header')
 
+    def test_should_return_payload_bytes_when_decrypting(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        clientPath = os.path.join(localDir, 'resources', 'private-jwkset1')
+        hyperwalletPath = os.path.join(localDir, 'resources', 'public-jwkset1')
+        encryption = Encryption(clientPath, hyperwalletPath)
+        testMessage = u'{"key": "valu\u00e9"}'
+        encryptedMessage = encryption.encrypt(testMessage)
+
+        self.assertEqual(encryption.decrypt(encryptedMessage), testMessage.encode('utf-8'))
+
+    def test_should_load_key_sets_once(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        clientPath = os.path.join(localDir, 'resources', 'private-jwkset1')
+        hyperwalletPath = os.path.join(localDir, 'resources', 'public-jwkset1')
+        encryption = Encryption(clientPath, hyperwalletPath)
+
+        with mock.patch('hyperwallet.utils.encryption.open', create=True, side_effect=open) as open_mock:
+            for i in range(3):
+                encryption.decrypt(encryption.encrypt('Message {}'.format(i)))
+
+        self.assertEqual(open_mock.call_count, 2)
+        self.assertEqual(len(encryption.keys), 4)
+
+    def test_should_fail_signature_verification_when_signature_is_tampered(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        clientPath = os.path.join(localDir, 'resources', 'private-jwkset1')
+        hyperwalletPath = os.path.join(localDir, 'resources', 'public-jwkset1')
+        encryption = Encryption(clientPath, hyperwalletPath)
+
+        signedBody = self.__sign(clientPath, {'exp': int(time.time()) + 60})
+        (header, payload, signature) = signedBody.split('.')
+        tampered = '.'.join([header, payload[:-2] + ('AA' if payload[-2:] != 'AA' else 'BB'), signature])
+
+        with self.assertRaises(HyperwalletException) as exc:
+            encryption.decrypt(self.__encrypt(hyperwalletPath, tampered))
+
+        self.assertEqual(str(exc.exception), 'Signature verification failed.')
+
+    def test_should_throw_exception_when_decrypting_expired_jws_signature(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        clientPath = os.path.join(localDir, 'resources', 'private-jwkset1')
+        hyperwalletPath = os.path.join(localDir, 'resources', 'public-jwkset1')
+        encryption = Encryption(clientPath, hyperwalletPath)
+
+        signedBody = self.__sign(clientPath, {'exp': int(time.time()) - 6000})
+
+        with self.assertRaises(HyperwalletException) as exc:
+            encryption.decrypt(self.__encrypt(hyperwalletPath, signedBody))
+
+        self.assertEqual(exc.exception.message, 'JWS signature has expired, checked by [exp] JWS header')
+
+    def test_should_throw_exception_when_decrypting_jws_signed_with_other_algorithm(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        clientPath = os.path.join(localDir, 'resources', 'private-jwkset1')
+        hyperwalletPath = os.path.join(localDir, 'resources', 'public-jwkset1')
+        encryption = Encryption(clientPath, hyperwalletPath, signAlgorithm='RS384')
+
+        signedBody = self.__sign(clientPath, {'exp': int(time.time()) + 60})
+
+        with self.assertRaises(HyperwalletException) as exc:
+            encryption.decrypt(self.__encrypt(hyperwalletPath, signedBody))
+
+        self.assertEqual(exc.exception.message, 'The specified alg value is not allowed')
+
+    def test_should_throw_exception_when_jws_signature_is_malformed(self):
+
+        encryption = Encryption('/private-jwkset1', '/public-jwkset1')
+
+        with self.assertRaises(HyperwalletException) as exc:
+            encryption.checkJwsExpiration('not-a-jws')
+
+        self.assertEqual(exc.exception.message, 'Not enough segments')
+
+    def __sign(self, clientPath, header):
+        jwkSignKey = self.__findJwkKeyByAlgorithm(jwkKeySet=self.__getJwkKeySet(location=clientPath), algorithm='RS256')
+        jwsToken = cryptoJWS.JWS('Test message'.encode('utf-8'))
+        header = dict(header, alg='RS256', kid=jwkSignKey['kid'])
+        jwsToken.add_signature(jwk.JWK(**jwkSignKey), None, json_encode(header))
+        return jwsToken.serialize(True)
+
+    def __encrypt(self, hyperwalletPath, signedBody):
+        jwkEncryptKey = self.__findJwkKeyByAlgorithm(
+            jwkKeySet=self.__getJwkKeySet(location=hyperwalletPath),
+            algorithm='RSA-OAEP-256'
+        )
+        jweToken = jwe.JWE(signedBody.encode('utf-8'), recipient=jwk.JWK(**jwkEncryptKey), protected={
+            'alg': 'RSA-OAEP-256',
+            'enc': 'A256CBC-HS512',
+            'typ': 'JWE',
+            'kid': jwkEncryptKey['kid']
+        })
+        return jweToken.serialize(True)
+
     def __getJwkKeySet(self, location):
         '''
         Retrieves JWK key data from given location.
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from hyperwallet import Webhook
+from hyperwallet.eventstore import WebhookEventStore, toTimestamp
+from hyperwallet.exceptions import HyperwalletException
+
+
+def notification(i, objectToken=None):
+    return {
+        'token': 'wbh-{}'.format(i),
+        'type': 'USERS.UPDATED',
+        'createdOn': '2017-10-{:02d}T00:00:00'.format(i % 28 + 1),
+        'object': {'token': objectToken or 'usr-{}'.format(i % 5)}
+    }
+
+
+class WebhookEventStoreTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory)
+
+    def files(self):
+
+        return sorted(os.listdir(self.directory))
+
+    def test_toTimestamp(self):
+
+        self.assertEqual(toTimestamp(datetime.datetime(2017, 10, 1, 2, 3, 4)), '2017-10-01T02:03:04')
+        self.assertEqual(toTimestamp('2017-10-01'), '2017-10-01')
+        self.assertIsNone(toTimestamp(None))
+
+    def test_invalid_arguments(self):
+
+        with self.assertRaises(ValueError):
+            WebhookEventStore(self.directory, blockSize=0)
+
+    def test_append_and_replay(self):
+
+        with WebhookEventStore(self.directory) as store:
+            store.append(Webhook(notification(0)))
+            store.append(notification(1))
+            store.appendMany(notification(i) for i in range(2, 10))
+
+            webhooks = list(store.replay())
+
+            self.assertEqual(store.count(), 10)
+
+        self.assertEqual([x.token for x in webhooks], ['wbh-{}'.format(i) for i in range(10)])
+        self.assertIsInstance(webhooks[0], Webhook)
+        self.assertEqual(webhooks[0].object.token, 'usr-0')
+
+    def test_replay_raw(self):
+
+        with WebhookEventStore(self.directory) as store:
+            store.append(notification(0))
+
+            self.assertEqual(list(store.replay(raw=True)), [notification(0)])
+
+    def test_replay_by_time_range(self):
+
+        with WebhookEventStore(self.directory, blockSize=4) as store:
+            store.appendMany(notification(i) for i in range(20))
+
+            webhooks = list(store.replay('2017-10-05T00:00:00', datetime.datetime(2017, 10, 9)))
+
+        self.assertEqual([x.token for x in webhooks], ['wbh-4', 'wbh-5', 'wbh-6', 'wbh-7'])
+
+    def test_replay_by_object_token(self):
+
+        with WebhookEventStore(self.directory, blockSize=4) as store:
+            store.appendMany(notification(i, 'usr-a' if i < 8 else 'usr-b') for i in range(20))
+            store.append(notification(20, 'usr-a'))
+
+            self.assertEqual(len(list(store.replay(objectToken='usr-b'))), 12)
+            self.assertEqual(
+                [x.token for x in store.replay(objectToken='usr-a', start='2017-10-05T00:00:00')],
+                ['wbh-4', 'wbh-5', 'wbh-6', 'wbh-7', 'wbh-20']
+            )
+            self.assertEqual(list(store.replay(objectToken='usr-c')), [])
+
+    def test_replay_by_object_token_prefix(self):
+
+        with WebhookEventStore(self.directory) as store:
+            store.appendMany([notification(0, 'usr-1'), notification(1, 'usr-10'), notification(2, 'usr-1')])
+
+            self.assertEqual([x.token for x in store.replay(objectToken='usr-1')], ['wbh-0', 'wbh-2'])
+
+    def test_index_skips_blocks(self):
+
+        with WebhookEventStore(self.directory, blockSize=4) as store:
+            store.appendMany(notification(i, 'usr-{}'.format(i // 4)) for i in range(20))
+
+        path = os.path.join(self.directory, 'segment-00000001.jsonl')
+
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+
+        # Only the block of usr-2 is left readable.
+        with open(path, 'wb') as f:
+            f.write(b''.join(x if b'"usr-2"' in x else b'x' * (len(x) - 1) + b'\n' for x in lines))
+
+        store = WebhookEventStore(self.directory, blockSize=4)
+
+        self.assertEqual([x.token for x in store.replay(objectToken='usr-2')], ['wbh-8', 'wbh-9', 'wbh-10', 'wbh-11'])
+
+        store.close()
+
+    def test_segments_roll_over(self):
+
+        with WebhookEventStore(self.directory, segmentSize=1000, blockSize=4) as store:
+            store.appendMany(notification(i) for i in range(30))
+
+            self.assertEqual([x.token for x in store.replay()], ['wbh-{}'.format(i) for i in range(30)])
+
+        files = self.files()
+
+        self.assertGreater(len(files), 4)
+        self.assertIn('segment-00000002.jsonl', files)
+
+        for name in files:
+            if name.endswith('.jsonl'):
+                self.assertLess(os.path.getsize(os.path.join(self.directory, name)), 1000 + 200)
+
+    def test_reopen_indexes_open_block(self):
+
+        with WebhookEventStore(self.directory, blockSize=4) as store:
+            store.appendMany(notification(i) for i in range(6))
+
+        with WebhookEventStore(self.directory, blockSize=4) as store:
+            self.assertEqual(store.count(), 6)
+
+            store.appendMany(notification(i) for i in range(6, 10))
+
+            self.assertEqual([x.token for x in store.replay()], ['wbh-{}'.format(i) for i in range(10)])
+
+        with open(os.path.join(self.directory, 'segment-00000001.index')) as f:
+            self.assertEqual([json.loads(x)['count'] for x in f], [4, 4])
+
+    def test_reopen_truncates_incomplete_event(self):
+
+        with WebhookEventStore(self.directory) as store:
+            store.appendMany(notification(i) for i in range(3))
+
+        path = os.path.join(self.directory, 'segment-00000001.jsonl')
+
+        with open(path, 'ab') as f:
+            f.write(b'{"token":"wbh-3"')
+
+        with WebhookEventStore(self.directory) as store:
+            store.append(notification(4))
+
+            self.assertEqual([x.token for x in store.replay()], ['wbh-0', 'wbh-1', 'wbh-2', 'wbh-4'])
+
+    def test_reopen_repairs_incomplete_index(self):
+
+        with WebhookEventStore(self.directory, blockSize=2) as store:
+            store.appendMany(notification(i) for i in range(5))
+
+        with open(os.path.join(self.directory, 'segment-00000001.index'), 'a') as f:
+            f.write('{"offset":')
+
+        with WebhookEventStore(self.directory, blockSize=2) as store:
+            store.append(notification(5))
+
+            self.assertEqual(store.count(), 6)
+            self.assertEqual(len(list(store.replay())), 6)
+
+        with WebhookEventStore(self.directory, blockSize=2) as store:
+            self.assertEqual(len(list(store.replay())), 6)
+
+    def test_append_after_close(self):
+
+        store = WebhookEventStore(self.directory)
+        store.close()
+
+        with self.assertRaises(HyperwalletException) as exc:
+            store.append(notification(0))
+
+        self.assertEqual(exc.exception.message, 'Event store is closed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+
+import io
+import json
+import mock
+import os
+import shutil
+import tempfile
+import unittest
+
+from hyperwallet import Payment, Receipt, Transfer, User
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.export import Exporter, getColumns, getExportFormat
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+def pages(model, count, limit, extra=None):
+    '''
+    Build a list function returning count records in pages of limit.
+    '''
+
+    def listFunction(*args):
+        params = args[-1]
+        offset = params['offset']
+        return [
+            model(dict({'token': 'tkn-{}'.format(i), 'amount': '{}.00'.format(i), 'currency': 'USD'}, **(extra or {})))
+            for i in range(offset, min(offset + params['limit'], count))
+        ]
+
+    return mock.MagicMock(side_effect=listFunction)
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.api = mock.MagicMock()
+        self.exporter = Exporter(self.api, limit=10)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory)
+
+    def test_get_export_format(self):
+
+        self.assertEqual(getExportFormat('receipts.JSONL'), 'jsonl')
+        self.assertEqual(getExportFormat('receipts.parquet'), 'parquet')
+
+        with self.assertRaises(HyperwalletException) as exc:
+            getExportFormat('receipts.csv')
+
+        self.assertEqual(exc.exception.message, 'Unsupported file format = .csv')
+
+    def test_get_columns(self):
+
+        self.assertIn('details', getColumns(Receipt))
+        self.assertIn('sourceAmount', getColumns(Transfer))
+        self.assertEqual(getColumns(Payment), sorted(getColumns(Payment)))
+
+    def test_export_fail_need_file_format(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.exporter.exportPayments(io.StringIO())
+
+        self.assertEqual(exc.exception.message, 'fileFormat is required')
+
+    def test_export_receipts_for_account_jsonl(self):
+
+        self.api.listReceiptsForAccount = pages(Receipt, 25, 10, {'details': {'clientPaymentId': 'p'}})
+        path = os.path.join(self.directory, 'receipts.jsonl')
+
+        count = self.exporter.exportReceiptsForAccount('prg-1', 'act-1', path, params={'currency': 'USD'})
+
+        with open(path) as f:
+            rows = [json.loads(x) for x in f]
+
+        self.assertEqual(count, 25)
+        self.assertEqual(self.exporter.pages, 3)
+        self.assertEqual([x['token'] for x in rows], ['tkn-{}'.format(i) for i in range(25)])
+        self.assertEqual(rows[0]['details'], {'clientPaymentId': 'p'})
+        self.assertEqual(
+            self.api.listReceiptsForAccount.call_args_list[1][0],
+            ('prg-1', 'act-1', {'currency': 'USD', 'offset': 10, 'limit': 10})
+        )
+
+    def test_export_users_to_file_object(self):
+
+        self.api.listUsers = pages(User, 3, 10)
+        target = io.StringIO()
+
+        self.assertEqual(self.exporter.exportUsers(target, 'jsonl'), 3)
+        self.assertEqual(len(target.getvalue().splitlines()), 3)
+        self.assertFalse(target.closed)
+
+    def test_export_empty(self):
+
+        self.api.listTransfers = pages(Transfer, 0, 10)
+        path = os.path.join(self.directory, 'transfers.jsonl')
+
+        self.assertEqual(self.exporter.exportTransfers(path), 0)
+        self.assertEqual(os.path.getsize(path), 0)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_export_payments_parquet(self):
+
+        self.api.listPayments = pages(Payment, 25, 10, {'notes': None})
+        path = os.path.join(self.directory, 'payments.parquet')
+
+        self.assertEqual(self.exporter.exportPayments(path), 25)
+
+        parquetFile = pyarrow.parquet.ParquetFile(path)
+        table = parquetFile.read()
+
+        self.assertEqual(parquetFile.num_row_groups, 3)
+        self.assertEqual(table.column_names, getColumns(Payment))
+        self.assertEqual(table.column('token').to_pylist()[24], 'tkn-24')
+        self.assertEqual(table.column('notes').to_pylist()[0], None)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_export_receipts_parquet_nested_values(self):
+
+        self.api.listReceiptsForUser = pages(Receipt, 2, 10, {'details': {'b': 1, 'a': 'x'}})
+        path = os.path.join(self.directory, 'receipts.parquet')
+
+        self.exporter.exportReceiptsForUser('usr-1', path)
+
+        table = pyarrow.parquet.read_table(path)
+
+        self.assertEqual(table.column('details').to_pylist()[0], '{"a":"x","b":1}')
+        self.assertEqual(table.column('amount').to_pylist()[1], '1.00')
+        self.assertEqual(self.api.listReceiptsForUser.call_args[0][0], 'usr-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
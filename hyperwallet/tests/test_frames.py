@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+
+import datetime
+import unittest
+
+from decimal import Decimal
+
+from hyperwallet import Receipt, Transfer
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.frames import ReceiptFrame, toDatetimeArray, toMinorUnitsArray
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class ReceiptFrameTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.receipts = [
+            {
+                'journalId': '1',
+                'type': 'PAYMENT',
+                'entry': 'CREDIT',
+                'amount': '10.50',
+                'fee': '0.50',
+                'currency': 'USD',
+                'createdOn': '2017-01-01T00:00:00',
+                'destinationToken': 'usr-1'
+            },
+            {
+                'journalId': '2',
+                'type': 'PAYMENT',
+                'entry': 'CREDIT',
+                'amount': '1000',
+                'currency': 'JPY',
+                'createdOn': '2017-01-02T00:00:00',
+                'destinationToken': 'usr-1'
+            },
+            {
+                'journalId': '3',
+                'type': 'TRANSFER_TO_BANK_ACCOUNT',
+                'entry': 'DEBIT',
+                'amount': '-5.25',
+                'currency': 'USD',
+                'createdOn': '2017-01-03T00:00:00',
+                'sourceToken': 'usr-1'
+            },
+            {
+                'journalId': '4',
+                'type': 'PAYMENT',
+                'entry': 'CREDIT',
+                'amount': '2.00',
+                'currency': 'USD',
+                'createdOn': '2017-01-04T00:00:00',
+                'destinationToken': 'usr-2'
+            }
+        ]
+
+    def test_columns(self):
+
+        frame = ReceiptFrame.fromRecords(self.receipts)
+
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(frame['amount'].dtype, numpy.int64)
+        self.assertEqual(frame['amount'].tolist(), [1050, 1000, -525, 200])
+        self.assertEqual(frame['fee'].tolist(), [50, 0, 0, 0])
+        self.assertEqual(frame.categories['currency'], ['USD', 'JPY'])
+        self.assertEqual(frame['currency'].tolist(), [0, 1, 0, 0])
+        self.assertEqual(frame.decode('type').tolist()[2], 'TRANSFER_TO_BANK_ACCOUNT')
+        self.assertEqual(str(frame['createdOn'][1]), '2017-01-02T00:00:00')
+        self.assertEqual(frame['sourceToken'].tolist(), [None, None, 'usr-1', None])
+
+    def test_created_on_with_offset(self):
+
+        self.receipts[0]['createdOn'] = '2017-10-31T17:32:57-05:00'
+        self.receipts[1]['createdOn'] = '2017-10-31T22:32:57Z'
+        del self.receipts[2]['createdOn']
+
+        frame = ReceiptFrame.fromRecords(self.receipts)
+
+        self.assertEqual(frame['createdOn'].dtype, numpy.dtype('datetime64[s]'))
+        self.assertEqual(
+            [str(x) for x in frame['createdOn']],
+            ['2017-10-31T22:32:57', '2017-10-31T22:32:57', 'NaT', '2017-01-04T00:00:00']
+        )
+
+    def test_from_models(self):
+
+        frame = ReceiptFrame.fromRecords([Receipt(x) for x in self.receipts])
+
+        self.assertEqual(frame['amount'].tolist(), [1050, 1000, -525, 200])
+
+    def test_sum_by_currency(self):
+
+        frame = ReceiptFrame.fromRecords(self.receipts)
+
+        self.assertEqual(frame.sumBy(), {
+            ('USD',): Decimal('7.25'),
+            ('JPY',): Decimal('1000')
+        })
+
+    def test_sum_by_currency_and_type(self):
+
+        frame = ReceiptFrame.fromRecords(self.receipts)
+
+        self.assertEqual(frame.sumBy(['currency', 'type']), {
+            ('USD', 'PAYMENT'): Decimal('12.50'),
+            ('USD', 'TRANSFER_TO_BANK_ACCOUNT'): Decimal('-5.25'),
+            ('JPY', 'PAYMENT'): Decimal('1000')
+        })
+        self.assertEqual(frame.sumBy(['currency'], 'fee'), {
+            ('USD',): Decimal('0.50'),
+            ('JPY',): Decimal('0')
+        })
+
+    def test_sum_by_requires_currency(self):
+
+        frame = ReceiptFrame.fromRecords(self.receipts)
+
+        with self.assertRaises(HyperwalletException) as exc:
+            frame.sumBy(['type'])
+
+        self.assertEqual(exc.exception.message, 'currency is required to group amounts')
+
+    def test_balances(self):
+
+        frame = ReceiptFrame.fromRecords([
+            {'currency': 'USD', 'amount': '10.00'},
+            {'currency': 'KWD', 'amount': '1.125'}
+        ])
+
+        self.assertEqual(sorted(frame.columns), ['amount', 'currency'])
+        self.assertEqual(frame['amount'].tolist(), [1000, 1125])
+        self.assertEqual(frame.sumBy()[('KWD',)], Decimal('1.125'))
+
+    def test_empty(self):
+
+        frame = ReceiptFrame.fromRecords([])
+
+        self.assertEqual(len(frame), 0)
+        self.assertEqual(frame.sumBy(), {})
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_to_pandas(self):
+
+        dataFrame = ReceiptFrame.fromRecords(self.receipts).toPandas()
+
+        self.assertEqual(list(dataFrame['currency']), ['USD', 'JPY', 'USD', 'USD'])
+        self.assertEqual(dataFrame['amount'].sum(), 1725)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_to_arrow(self):
+
+        table = ReceiptFrame.fromRecords(self.receipts).toArrow()
+
+        self.assertEqual(table.num_rows, 4)
+        self.assertEqual(table.column('currency').to_pylist(), ['USD', 'JPY', 'USD', 'USD'])
+        self.assertEqual(table.column('amount').to_pylist(), [1050, 1000, -525, 200])
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class ArrayTest(unittest.TestCase):
+
+    def test_to_minor_units_array(self):
+
+        receipts = [
+            Receipt({'amount': '10.50', 'currency': 'USD'}),
+            {'amount': '1000', 'currency': 'JPY'},
+            Receipt({'currency': 'USD'})
+        ]
+        units = toMinorUnitsArray(receipts)
+
+        self.assertEqual(units.dtype, numpy.int64)
+        self.assertEqual(units.tolist(), [1050, 1000, 0])
+
+    def test_to_minor_units_array_currency_fields(self):
+
+        transfers = [
+            Transfer({'sourceAmount': '10.50', 'sourceCurrency': 'USD', 'destinationAmount': '1500', 'destinationCurrency': 'JPY'}),
+            Transfer({'sourceAmount': '1.125', 'sourceCurrency': 'BHD', 'destinationAmount': '3.00', 'destinationCurrency': 'USD'})
+        ]
+
+        self.assertEqual(toMinorUnitsArray(transfers, 'sourceAmount').tolist(), [1050, 1125])
+        self.assertEqual(toMinorUnitsArray(transfers, 'destinationAmount').tolist(), [1500, 300])
+        self.assertEqual(toMinorUnitsArray([x._raw_json for x in transfers], 'sourceAmount', 'sourceCurrency').tolist(), [1050, 1125])
+
+    def test_to_minor_units_array_too_many_decimals(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toMinorUnitsArray([{'amount': '1.5', 'currency': 'JPY'}])
+
+        self.assertEqual(exc.exception.message, 'Amount 1.5 has too many decimals for currency JPY')
+
+    def test_to_datetime_array(self):
+
+        dates = toDatetimeArray([
+            Receipt({'createdOn': '2017-10-31T22:32:57'}),
+            {'createdOn': '2017-10-31T17:32:57.500-05:00'},
+            {'createdOn': '2017-10-31T22:32:57Z'},
+            {}
+        ])
+
+        self.assertEqual(dates.dtype, numpy.dtype('datetime64[s]'))
+        self.assertEqual(
+            dates[:3].tolist(),
+            [datetime.datetime(2017, 10, 31, 22, 32, 57)] * 3
+        )
+        self.assertTrue(numpy.isnat(dates[3]))
+
+    def test_to_datetime_array_unit(self):
+
+        dates = toDatetimeArray([{'expiresOn': '2017-10-31T22:32:57.250'}], 'expiresOn', 'ms')
+
+        self.assertEqual(dates.tolist(), [datetime.datetime(2017, 10, 31, 22, 32, 57, 250000)])
+
+    def test_empty_arrays(self):
+
+        self.assertEqual(len(toMinorUnitsArray([])), 0)
+        self.assertEqual(len(toDatetimeArray([])), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
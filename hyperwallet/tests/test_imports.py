@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+
+HEAVY_MODULES = ['requests', 'requests_toolbelt', 'urllib3', 'jwcrypto', 'cryptography', 'numpy', 'pandas', 'pyarrow']
+
+SCRIPT = '''
+import json
+import sys
+import time
+
+baseline = set(sys.modules)
+started = time.time()
+
+import hyperwallet
+
+imported = time.time()
+afterImport = set(sys.modules)
+
+hyperwallet.Api('username', 'password', 'programToken')
+
+constructed = time.time()
+afterConstruction = set(sys.modules)
+
+print(json.dumps({
+    'importSeconds': imported - started,
+    'constructionSeconds': constructed - imported,
+    'importModules': sorted(afterImport - baseline),
+    'constructionModules': sorted(afterConstruction - afterImport)
+}))
+'''
+
+
+class ImportsTest(unittest.TestCase):
+
+    # Budgets are generous so slow machines do not fail, loading the HTTP and
+    # JOSE stacks alone exceeds the module budget.
+    MODULE_BUDGET = 60
+    IMPORT_SECONDS_BUDGET = 1.0
+    CONSTRUCTION_SECONDS_BUDGET = 0.1
+
+    @classmethod
+    def setUpClass(cls):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        output = subprocess.check_output([sys.executable, '-c', SCRIPT], cwd=root)
+        cls.report = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    def __heavy(self, modules):
+        return [x for x in modules if x.split('.')[0] in HEAVY_MODULES]
+
+    def test_import_does_not_load_heavy_dependencies(self):
+        self.assertEqual(self.__heavy(self.report.get('importModules')), [])
+
+    def test_api_construction_does_not_load_heavy_dependencies(self):
+        self.assertEqual(self.__heavy(self.report.get('constructionModules')), [])
+
+    def test_import_module_budget(self):
+        self.assertLessEqual(len(self.report.get('importModules')), self.MODULE_BUDGET)
+
+    def test_import_time_budget(self):
+        self.assertLess(self.report.get('importSeconds'), self.IMPORT_SECONDS_BUDGET)
+
+    def test_api_construction_time_budget(self):
+        self.assertLess(self.report.get('constructionSeconds'), self.CONSTRUCTION_SECONDS_BUDGET)
+
+    def test_encryption_does_not_require_six(self):
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+        # six is not a declared dependency, importing it must fail the script.
+        subprocess.check_call([sys.executable, '-c', (
+            'import sys\n'
+            'sys.modules["six"] = None\n'
+            'from hyperwallet.utils.encryption import Encryption\n'
+            'from hyperwallet.utils import ApiClient\n'
+            'ApiClient("username", "password", "https://localhost", {"clientPrivateKeySetLocation": "a", "hyperwalletKeySetLocation": "b"})\n'
+        )], cwd=root)
+
+
+if __name__ == '__main__':
+    unittest.main()
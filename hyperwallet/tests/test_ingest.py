@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+
+import json
+import mock
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from hyperwallet import Payment
+from hyperwallet.exceptions import HyperwalletException, HyperwalletAPIException
+from hyperwallet.ingest import PaymentIngest, readRows, toPaymentData, getFileFormat
+
+
+CSV_CONTENT = (
+    b'\xef\xbb\xbfclientPaymentId,amount,currency,destinationToken,notes\r\n'
+    b'1,10.00,USD,usr-1,plain\r\n'
+    b'\r\n'
+    b'2,20.00,usd,usr-2,"two\r\nlines"\r\n'
+    b'3,30.001,USD,usr-3,\r\n'
+    b'4,40.00,USD,usr-4,"quoted, comma"\r\n'
+)
+
+
+# Runs an ingest whose process is killed right after the 150th Payment is
+# created, every created clientPaymentId is appended to the created file.
+KILLED_SCRIPT = '''
+import os
+import sys
+import threading
+
+from hyperwallet import Payment
+from hyperwallet.ingest import PaymentIngest
+
+(path, resultsPath, createdPath) = sys.argv[1:]
+lock = threading.Lock()
+created = []
+
+
+class Api(object):
+
+    programToken = 'prg-1'
+
+    def createPayment(self, data):
+        with lock:
+            created.append(data['clientPaymentId'])
+
+            with open(createdPath, 'a') as f:
+                f.write(data['clientPaymentId'] + '\\n')
+
+            if len(created) == 150:
+                os._exit(1)
+
+        return Payment({'token': 'pmt-' + data['clientPaymentId']})
+
+
+PaymentIngest(Api(), path, resultsPath, concurrency=2).run()
+'''
+
+
+class IngestTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.mkdtemp()
+        self.csvPath = os.path.join(self.directory, 'payments.csv')
+        self.resultsPath = os.path.join(self.directory, 'results.jsonl')
+
+        with open(self.csvPath, 'wb') as f:
+            f.write(CSV_CONTENT)
+
+        self.api = mock.MagicMock(programToken='prg-1')
+        self.api.createPayment.side_effect = lambda data: Payment({'token': 'pmt-' + data['clientPaymentId']})
+
+    def tearDown(self):
+
+        shutil.rmtree(self.directory)
+
+    def __results(self):
+
+        results = []
+
+        with open(self.resultsPath) as f:
+            for line in f:
+                try:
+                    results.append(json.loads(line))
+                except ValueError:
+                    pass
+
+        return sorted(results, key=lambda x: x['offset'])
+
+    def __checkpoint(self):
+
+        with open(self.resultsPath + '.checkpoint') as f:
+            return json.load(f)['offset']
+
+    def test_get_file_format(self):
+
+        self.assertEqual(getFileFormat('a.CSV'), 'csv')
+        self.assertEqual(getFileFormat('a.ndjson'), 'jsonl')
+
+        with self.assertRaises(HyperwalletException) as exc:
+            getFileFormat('a.xlsx')
+
+        self.assertEqual(exc.exception.message, 'Unsupported file format = .xlsx')
+
+    def test_read_rows_csv(self):
+
+        rows = list(readRows(self.csvPath))
+
+        self.assertEqual([x[2]['clientPaymentId'] for x in rows], ['1', '2', '3', '4'])
+        self.assertEqual(rows[1][2]['notes'], 'two\r\nlines')
+        self.assertEqual(rows[3][2]['notes'], 'quoted, comma')
+        self.assertEqual(rows[-1][1], len(CSV_CONTENT))
+
+        for (row, nextRow) in zip(rows, rows[1:]):
+            self.assertEqual(row[1], nextRow[0])
+
+    def test_read_rows_from_offset(self):
+
+        rows = list(readRows(self.csvPath))
+        resumed = list(readRows(self.csvPath, offset=rows[2][0]))
+
+        self.assertEqual(resumed, rows[2:])
+
+    def test_read_rows_jsonl_invalid_row(self):
+
+        path = os.path.join(self.directory, 'payments.jsonl')
+
+        with open(path, 'wb') as f:
+            f.write(b'{"clientPaymentId": "1"}\n[1, 2]\n{broken\n')
+
+        rows = list(readRows(path))
+
+        self.assertEqual(rows[0][2], {'clientPaymentId': '1'})
+        self.assertIsInstance(rows[1][2], HyperwalletException)
+        self.assertIsInstance(rows[2][2], ValueError)
+
+    def test_to_payment_data(self):
+
+        data = toPaymentData(
+            {'clientPaymentId': '1', 'amount': '10.5', 'currency': 'usd', 'destinationToken': 'usr-1', 'memo': ''},
+            {'programToken': 'prg-1', 'purpose': 'OTHER'}
+        )
+
+        self.assertEqual(data, {
+            'clientPaymentId': '1',
+            'amount': '10.5',
+            'currency': 'USD',
+            'destinationToken': 'usr-1',
+            'programToken': 'prg-1',
+            'purpose': 'OTHER'
+        })
+
+    def test_to_payment_data_fail_need_destination_token(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toPaymentData({'clientPaymentId': '1', 'amount': '10', 'currency': 'USD'})
+
+        self.assertEqual(exc.exception.message, 'destinationToken is required')
+
+    def test_to_payment_data_fail_invalid_amount(self):
+
+        record = {'clientPaymentId': '1', 'currency': 'JPY', 'destinationToken': 'usr-1'}
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toPaymentData(dict(record, amount='-1'))
+
+        self.assertEqual(exc.exception.message, 'Invalid amount = -1')
+
+        with self.assertRaises(HyperwalletException) as exc:
+            toPaymentData(dict(record, amount='1.5'))
+
+        self.assertEqual(exc.exception.message, 'Amount 1.5 has too many decimals for currency JPY')
+
+    def test_run(self):
+
+        self.api.createPayment.side_effect = [
+            Payment({'token': 'pmt-1'}),
+            HyperwalletAPIException({'errors': [{'code': 'CONSTRAINT_VIOLATIONS'}]}),
+            Payment({'token': 'pmt-4'})
+        ]
+        progress = []
+
+        counts = PaymentIngest(self.api, self.csvPath, self.resultsPath, concurrency=1).run(progress.append)
+
+        self.assertEqual(counts, {'SUCCEEDED': 2, 'FAILED': 1, 'INVALID': 1, 'SKIPPED': 0})
+        self.assertEqual(progress[-1], counts)
+        self.assertEqual(
+            [(x['clientPaymentId'], x['status']) for x in self.__results()],
+            [('1', 'SUCCEEDED'), ('2', 'FAILED'), ('3', 'INVALID'), ('4', 'SUCCEEDED')]
+        )
+        self.assertEqual(self.__results()[0]['token'], 'pmt-1')
+        self.assertEqual(self.__results()[1]['error'], {'errors': [{'code': 'CONSTRAINT_VIOLATIONS'}]})
+        self.assertEqual(self.__results()[2]['error'], 'Amount 30.001 has too many decimals for currency USD')
+        self.assertEqual(self.__checkpoint(), len(CSV_CONTENT))
+        self.assertEqual(self.api.createPayment.call_args_list[0][0][0]['programToken'], 'prg-1')
+
+    def test_run_concurrently(self):
+
+        path = os.path.join(self.directory, 'payments.jsonl')
+
+        with open(path, 'w') as f:
+            for i in range(200):
+                f.write(json.dumps({
+                    'clientPaymentId': str(i),
+                    'amount': '1.00',
+                    'currency': 'USD',
+                    'destinationToken': 'usr-1'
+                }) + '\n')
+
+        counts = PaymentIngest(self.api, path, self.resultsPath, concurrency=8, checkpointInterval=10).run()
+
+        self.assertEqual(counts['SUCCEEDED'], 200)
+        self.assertEqual(len(self.__results()), 200)
+        self.assertEqual(self.__checkpoint(), os.path.getsize(path))
+
+    def test_run_resumes_after_crash(self):
+
+        rows = list(readRows(self.csvPath))
+
+        # Row 2 completed before row 1 when the run stopped, the last result
+        # line was only partly written.
+        with open(self.resultsPath + '.checkpoint', 'w') as f:
+            json.dump({'offset': rows[0][0]}, f)
+
+        with open(self.resultsPath, 'w') as f:
+            f.write(json.dumps({'offset': rows[1][0], 'clientPaymentId': '2', 'status': 'SUCCEEDED'}) + '\n')
+            f.write('{"offset": ')
+
+        counts = PaymentIngest(self.api, self.csvPath, self.resultsPath).run()
+
+        self.assertEqual(counts, {'SUCCEEDED': 2, 'FAILED': 0, 'INVALID': 1, 'SKIPPED': 1})
+        self.assertEqual(sorted(x[0][0]['clientPaymentId'] for x in self.api.createPayment.call_args_list), ['1', '4'])
+        self.assertEqual([x['clientPaymentId'] for x in self.__results()], ['1', '2', '3', '4'])
+        self.assertEqual(self.__checkpoint(), len(CSV_CONTENT))
+
+    def test_run_looks_up_rows_in_flight_after_crash(self):
+
+        rows = list(readRows(self.csvPath))
+        self.api.listPayments.side_effect = lambda params: [Payment({'token': 'pmt-1'})] if params['clientPaymentId'] == '1' else []
+
+        # Rows 1 and 3 were in flight when the run stopped, row 1 was created.
+        with open(self.resultsPath + '.checkpoint', 'w') as f:
+            json.dump({'offset': rows[0][0], 'maxUnrecorded': 2}, f)
+
+        with open(self.resultsPath, 'w') as f:
+            f.write(json.dumps({'offset': rows[1][0], 'clientPaymentId': '2', 'status': 'SUCCEEDED'}) + '\n')
+
+        counts = PaymentIngest(self.api, self.csvPath, self.resultsPath).run()
+
+        self.assertEqual(counts, {'SUCCEEDED': 2, 'FAILED': 0, 'INVALID': 1, 'SKIPPED': 1})
+        self.api.listPayments.assert_called_once_with({'clientPaymentId': '1'})
+        self.assertEqual([x[0][0]['clientPaymentId'] for x in self.api.createPayment.call_args_list], ['4'])
+        self.assertEqual(self.__results()[0]['token'], 'pmt-1')
+
+    def test_run_resumes_after_process_is_killed(self):
+
+        path = os.path.join(self.directory, 'payments.jsonl')
+        createdPath = os.path.join(self.directory, 'created.txt')
+
+        with open(path, 'w') as f:
+            for i in range(300):
+                f.write(json.dumps({
+                    'clientPaymentId': str(i),
+                    'amount': '1.00',
+                    'currency': 'USD',
+                    'destinationToken': 'usr-1'
+                }) + '\n')
+
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+        code = subprocess.call([sys.executable, '-c', KILLED_SCRIPT, path, self.resultsPath, createdPath], cwd=root)
+
+        self.assertEqual(code, 1)
+
+        with open(createdPath) as f:
+            created = set(f.read().split())
+
+        lock = threading.Lock()
+        resent = []
+
+        def createPayment(data):
+            with lock:
+                resent.append(data['clientPaymentId'])
+
+            return Payment({'token': 'pmt-' + data['clientPaymentId']})
+
+        self.api.createPayment.side_effect = createPayment
+        self.api.listPayments.side_effect = lambda params: (
+            [Payment({'token': 'pmt-' + params['clientPaymentId']})] if params['clientPaymentId'] in created else []
+        )
+
+        PaymentIngest(self.api, path, self.resultsPath, concurrency=2).run()
+
+        self.assertEqual(len(created), 150)
+        self.assertEqual(set(resent) & created, set())
+        self.assertEqual(set(resent) | created, set(str(i) for i in range(300)))
+        self.assertEqual(sorted(x['clientPaymentId'] for x in self.__results()), sorted(str(i) for i in range(300)))
+
+    def test_run_completed_file_sends_nothing(self):
+
+        PaymentIngest(self.api, self.csvPath, self.resultsPath).run()
+        self.api.createPayment.reset_mock()
+
+        counts = PaymentIngest(self.api, self.csvPath, self.resultsPath).run()
+
+        self.assertEqual(counts, {'SUCCEEDED': 0, 'FAILED': 0, 'INVALID': 0, 'SKIPPED': 0})
+        self.assertEqual(self.api.createPayment.call_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
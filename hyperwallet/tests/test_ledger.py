@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from hyperwallet.exceptions import HyperwalletException, HyperwalletAPIException, HyperwalletInProgressException
+from hyperwallet.ledger import IdempotencyLedger, isAmbiguousError, PENDING, SUCCEEDED, FAILED
+
+
+class IdempotencyLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.ledger = IdempotencyLedger()
+
+    def tearDown(self):
+
+        self.ledger.close()
+
+    def test_begin_fail_need_client_id(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.ledger.begin('payments', None)
+
+        self.assertEqual(exc.exception.message, 'clientId is required')
+
+    def test_begin_claims_new_request(self):
+
+        entry = self.ledger.begin('payments', 'payment-1')
+
+        self.assertEqual(entry.state, PENDING)
+        self.assertTrue(entry.claimed)
+        self.assertFalse(entry.ambiguous)
+        self.assertEqual(self.ledger.get('payments', 'payment-1').state, PENDING)
+
+    def test_begin_rejects_request_in_progress(self):
+
+        self.ledger.begin('payments', 'payment-1')
+
+        with self.assertRaises(HyperwalletInProgressException) as exc:
+            self.ledger.begin('payments', 'payment-1')
+
+        self.assertEqual(exc.exception.message, 'payments payment-1 is already in progress')
+        self.assertIsInstance(exc.exception, HyperwalletException)
+        self.assertEqual(exc.exception.kind, 'payments')
+        self.assertEqual(exc.exception.clientId, 'payment-1')
+        self.assertEqual(exc.exception.leaseExpiresOn, self.ledger.get('payments', 'payment-1').leaseExpiresOn)
+
+    def test_purge_completed_requests(self):
+
+        self.ledger.begin('payments', 'payment-1')
+        self.ledger.succeed('payments', 'payment-1', {'token': 'pmt-1'})
+        self.ledger.begin('payments', 'payment-2')
+        self.ledger.fail('payments', 'payment-2', {'code': 'INVALID'})
+        self.ledger.begin('payments', 'payment-3')
+
+        self.assertEqual(self.ledger.purge(time.time() - 60), 0)
+        self.assertEqual(self.ledger.purge(time.time() + 1), 2)
+
+        self.assertIsNone(self.ledger.get('payments', 'payment-1'))
+        self.assertIsNone(self.ledger.get('payments', 'payment-2'))
+        self.assertEqual(self.ledger.get('payments', 'payment-3').state, PENDING)
+
+    def test_begin_separates_kinds(self):
+
+        self.ledger.begin('payments', 'id-1')
+
+        self.assertTrue(self.ledger.begin('transfers', 'id-1').claimed)
+
+    def test_begin_returns_succeeded_response(self):
+
+        self.ledger.begin('payments', 'payment-1')
+        self.ledger.succeed('payments', 'payment-1', {'token': 'pmt-1'})
+
+        entry = self.ledger.begin('payments', 'payment-1')
+
+        self.assertEqual(entry.state, SUCCEEDED)
+        self.assertFalse(entry.claimed)
+        self.assertEqual(entry.response, {'token': 'pmt-1'})
+
+    def test_begin_reclaims_failed_request(self):
+
+        self.ledger.begin('payments', 'payment-1')
+        self.ledger.fail('payments', 'payment-1', {'errors': [{'code': 'INVALID'}]})
+
+        self.assertEqual(self.ledger.get('payments', 'payment-1').state, FAILED)
+        self.assertEqual(self.ledger.get('payments', 'payment-1').error, {'errors': [{'code': 'INVALID'}]})
+
+        entry = self.ledger.begin('payments', 'payment-1')
+
+        self.assertTrue(entry.claimed)
+        self.assertFalse(entry.ambiguous)
+
+    def test_begin_marks_abandoned_request_ambiguous(self):
+
+        self.ledger.begin('payments', 'payment-1')
+        self.ledger.abandon('payments', 'payment-1')
+
+        entry = self.ledger.begin('payments', 'payment-1')
+
+        self.assertTrue(entry.claimed)
+        self.assertTrue(entry.ambiguous)
+
+    def test_begin_marks_expired_lease_ambiguous(self):
+
+        ledger = IdempotencyLedger(leaseSeconds=-1)
+        ledger.begin('payments', 'payment-1')
+
+        entry = ledger.begin('payments', 'payment-1')
+
+        self.assertTrue(entry.ambiguous)
+        ledger.close()
+
+    def test_is_ambiguous_error(self):
+
+        self.assertTrue(isAmbiguousError(ValueError('timeout')))
+        self.assertTrue(isAmbiguousError(HyperwalletAPIException({'errors': [{'code': 'COMMUNICATION_ERROR'}]})))
+        self.assertTrue(isAmbiguousError(HyperwalletAPIException('Invalid Content-Type specified in Response Header', 502)))
+        self.assertTrue(isAmbiguousError(HyperwalletAPIException({'errors': [{'code': 'SERVER_ERROR'}]}, 500)))
+        self.assertTrue(isAmbiguousError(HyperwalletAPIException({'errors': []}, 400)))
+        self.assertFalse(isAmbiguousError(HyperwalletAPIException({'errors': [{'code': 'CONSTRAINT_VIOLATIONS'}]}, 400)))
+        self.assertFalse(isAmbiguousError(HyperwalletAPIException({'errors': [{'code': 'CONSTRAINT_VIOLATIONS'}]})))
+
+    def test_get_unknown_request(self):
+
+        self.assertIsNone(self.ledger.get('payments', 'payment-1'))
+
+    def test_ledgers_share_database_file(self):
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'ledger.db')
+
+        try:
+            ledger1 = IdempotencyLedger(path)
+            ledger2 = IdempotencyLedger(path)
+
+            ledger1.begin('payments', 'payment-1')
+
+            with self.assertRaises(HyperwalletException):
+                ledger2.begin('payments', 'payment-1')
+
+            ledger1.succeed('payments', 'payment-1', {'token': 'pmt-1'})
+
+            self.assertEqual(ledger2.begin('payments', 'payment-1').response, {'token': 'pmt-1'})
+
+            ledger1.close()
+            ledger2.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,12 @@
 #!/usr/bin/env python
 
+import datetime
 import json
+import mock
 import unittest
 
+from decimal import Decimal
+
 from hyperwallet import (
     HyperwalletModel,
     User,
@@ -22,9 +26,13 @@ from hyperwallet import (
     Account,
     StatusTransition,
     TransferMethodConfiguration,
+    TransferMethodConfigurationList,
     Webhook,
     TransferRefunds
 )
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.models import WEBHOOK_OBJECT_TYPES, getWebhookObjectType
+from hyperwallet.utils.currencies import toDecimal
 
 
 class ModelTest(unittest.TestCase):
@@ -122,6 +130,175 @@ class ModelTest(unittest.TestCase):
             json.dumps(test_hyperwallet.asDict(), sort_keys=True)
         )
 
+    def test_hyperwallet_model_asDict_drops_empty_values(self):
+
+        test_hyperwallet = HyperwalletModel({'key': 'value', 'empty': '', 'none': None, 'tuple': ('a',), 'list': []})
+
+        self.assertEqual(test_hyperwallet.asDict(), {'key': 'value', 'tuple': ['a'], 'list': []})
+
+    def test_hyperwallet_model_asDict_copies_lists(self):
+
+        test_hyperwallet = HyperwalletModel(self.simple_data)
+        data = test_hyperwallet.asDict()
+        data['list'].append('other')
+        data['key'] = 'other'
+
+        self.assertEqual(test_hyperwallet.asDict(), self.simple_data)
+        self.assertIsNot(test_hyperwallet.asDict(), test_hyperwallet.asDict())
+
+    def test_hyperwallet_model_asDict_view(self):
+
+        test_hyperwallet = HyperwalletModel(self.simple_data)
+        view = test_hyperwallet.asDict(view=True)
+
+        self.assertEqual(dict(view), self.simple_data)
+        self.assertIs(view, test_hyperwallet.asDict(view=True))
+
+        with self.assertRaises(TypeError):
+            view['key'] = 'other'
+
+    def test_hyperwallet_model_asJsonString_compact(self):
+
+        test_hyperwallet = HyperwalletModel(self.simple_data)
+
+        self.assertEqual(
+            json.dumps(self.simple_data, sort_keys=True, separators=(',', ':')),
+            test_hyperwallet.asJsonString(compact=True)
+        )
+
+    def test_hyperwallet_model_asJsonString_cached(self):
+
+        test_hyperwallet = HyperwalletModel(self.simple_data)
+
+        with mock.patch('hyperwallet.models.json.dumps', wraps=json.dumps) as dumps:
+            self.assertIs(test_hyperwallet.asJsonString(), str(test_hyperwallet))
+
+        self.assertEqual(dumps.call_count, 1)
+
+    def test_hyperwallet_model_cache_invalidated_on_new_data(self):
+
+        test_hyperwallet = HyperwalletModel({'key': 'value'})
+        view = test_hyperwallet.asDict(view=True)
+
+        self.assertEqual(test_hyperwallet.asJsonString(compact=True), '{"key":"value"}')
+
+        test_hyperwallet._raw_json = {'key': 'other'}
+
+        self.assertEqual(test_hyperwallet.asJsonString(compact=True), '{"key":"other"}')
+        self.assertEqual(dict(test_hyperwallet.asDict(view=True)), {'key': 'other'})
+        self.assertEqual(dict(view), {'key': 'value'})
+
+    def test_hyperwallet_model_getDecimal(self):
+
+        test_payment = Payment({'amount': '10.50', 'currency': 'USD'})
+
+        self.assertEqual(test_payment.getDecimal('amount'), Decimal('10.50'))
+        self.assertIsNone(test_payment.getDecimal('memo'))
+        self.assertIsNone(Payment({'amount': ''}).getDecimal('amount'))
+
+        with self.assertRaises(HyperwalletException) as exc:
+            Payment({'amount': 'abc'}).getDecimal('amount')
+
+        self.assertEqual(exc.exception.message, 'Invalid amount = abc')
+
+    def test_hyperwallet_model_getDecimal_cached(self):
+
+        test_receipt = Receipt({'amount': '10.50', 'fee': '1.00', 'currency': 'USD'})
+
+        with mock.patch('hyperwallet.utils.currencies.toDecimal', wraps=toDecimal) as decode:
+            self.assertIs(test_receipt.getDecimal('amount'), test_receipt.getDecimal('amount'))
+            self.assertEqual(test_receipt.getDecimal('fee'), Decimal('1.00'))
+
+            test_receipt.amount = '11.00'
+
+            self.assertEqual(test_receipt.getDecimal('amount'), Decimal('11.00'))
+
+        self.assertEqual(decode.call_count, 3)
+
+    def test_hyperwallet_model_getMinorUnits(self):
+
+        self.assertEqual(Payment({'amount': '10.50', 'currency': 'USD'}).getMinorUnits('amount'), 1050)
+        self.assertEqual(Balance({'amount': '-1000', 'currency': 'JPY'}).getMinorUnits('amount'), -1000)
+        self.assertEqual(Receipt({'amount': '1.125', 'fee': '0.5', 'currency': 'BHD'}).getMinorUnits('fee'), 500)
+        self.assertIsNone(Payment({'currency': 'USD'}).getMinorUnits('amount'))
+
+    def test_hyperwallet_model_getMinorUnits_currency_fields(self):
+
+        data = {
+            'sourceAmount': '10.50',
+            'sourceFeeAmount': '1.25',
+            'sourceCurrency': 'USD',
+            'destinationAmount': '1500',
+            'destinationFeeAmount': '5',
+            'destinationCurrency': 'JPY'
+        }
+
+        for test_transfer in (Transfer(data), TransferRefunds(data)):
+            self.assertEqual(test_transfer.getMinorUnits('sourceAmount'), 1050)
+            self.assertEqual(test_transfer.getMinorUnits('sourceFeeAmount'), 125)
+            self.assertEqual(test_transfer.getMinorUnits('destinationAmount'), 1500)
+            self.assertEqual(test_transfer.getMinorUnits('destinationFeeAmount'), 5)
+
+    def test_hyperwallet_model_getMinorUnits_cached_per_currency(self):
+
+        test_payment = Payment({'amount': '10', 'currency': 'USD'})
+
+        self.assertEqual(test_payment.getMinorUnits('amount'), 1000)
+
+        test_payment.currency = 'JPY'
+
+        self.assertEqual(test_payment.getMinorUnits('amount'), 10)
+
+    def test_hyperwallet_model_getMinorUnits_without_currency(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            Transfer({'sourceAmount': '10.00', 'currency': 'USD'}).getMinorUnits('sourceAmount')
+
+        self.assertEqual(exc.exception.message, 'sourceCurrency is required to decode sourceAmount')
+
+    def test_hyperwallet_model_getMinorUnits_too_many_decimals(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            Payment({'amount': '10.50', 'currency': 'JPY'}).getMinorUnits('amount')
+
+        self.assertEqual(exc.exception.message, 'Amount 10.50 has too many decimals for currency JPY')
+
+    def test_hyperwallet_model_getDatetime(self):
+
+        test_payment = Payment({
+            'createdOn': '2017-10-31T22:32:57',
+            'expiresOn': '2018-04-29T17:00:00.123Z'
+        })
+
+        self.assertEqual(test_payment.getDatetime(), datetime.datetime(2017, 10, 31, 22, 32, 57, tzinfo=datetime.timezone.utc))
+        self.assertEqual(
+            test_payment.getDatetime('expiresOn'),
+            datetime.datetime(2018, 4, 29, 17, 0, 0, 123000, tzinfo=datetime.timezone.utc)
+        )
+        self.assertIs(test_payment.getDatetime(), test_payment.getDatetime())
+        self.assertIsNone(test_payment.getDatetime('releaseOn'))
+
+    def test_hyperwallet_model_getDatetime_offset(self):
+
+        test_webhook = Webhook({'createdOn': '2017-10-31T17:32:57-05:00'})
+
+        self.assertEqual(test_webhook.getDatetime().isoformat(), '2017-10-31T22:32:57+00:00')
+
+    def test_hyperwallet_model_getDatetime_invalid(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            User({'createdOn': 'yesterday'}).getDatetime()
+
+        self.assertEqual(exc.exception.message, 'Invalid timestamp = yesterday')
+
+    def test_hyperwallet_model_decoded_values_reset_on_new_data(self):
+
+        test_payment = Payment({'amount': '10.50', 'currency': 'USD'})
+        test_payment.getDecimal('amount')
+        test_payment._raw_json = {}
+
+        self.assertEqual(test_payment._decoded, {})
+
     '''
 
     User
@@ -466,6 +643,90 @@ class ModelTest(unittest.TestCase):
 
     '''
 
+    def test_transfer_method_configuration_list(self):
+
+        configurations = TransferMethodConfigurationList([
+            {
+                'countries': ['US', 'CA'],
+                'currencies': ['USD'],
+                'profileType': 'INDIVIDUAL',
+                'type': 'BANK_ACCOUNT'
+            },
+            {
+                'countries': [],
+                'currencies': ['USD'],
+                'profileType': 'INDIVIDUAL',
+                'type': 'PAPER_CHECK'
+            },
+            {
+                'countries': ['US'],
+                'currencies': ['USD', 'EUR'],
+                'profileType': 'INDIVIDUAL',
+                'type': 'BANK_CARD'
+            }
+        ])
+
+        self.assertEqual(len(configurations), 4)
+        self.assertEqual(configurations[2].type, 'BANK_CARD')
+        self.assertEqual(configurations[3].currency, 'EUR')
+        self.assertEqual([x.type for x in configurations[:2]], ['BANK_ACCOUNT', 'BANK_ACCOUNT'])
+        self.assertEqual(configurations.collections[0]['countries'], ['US', 'CA'])
+
+        with self.assertRaises(IndexError):
+            configurations[4]
+
+    def test_transfer_method_configuration_list_index(self):
+
+        configurations = TransferMethodConfigurationList([
+            {
+                'countries': ['US', 'CA'],
+                'currencies': ['USD', 'CAD'],
+                'profileType': 'INDIVIDUAL',
+                'type': 'BANK_ACCOUNT'
+            },
+            {
+                'countries': ['US'],
+                'currencies': ['USD'],
+                'profileType': 'INDIVIDUAL',
+                'type': 'PAPER_CHECK'
+            },
+            {
+                'countries': ['US'],
+                'currencies': ['USD'],
+                'profileType': 'BUSINESS',
+                'type': 'WIRE_ACCOUNT'
+            }
+        ])
+
+        self.assertEqual(
+            configurations.getTransferMethodTypes('US', 'USD', 'INDIVIDUAL'),
+            frozenset(['BANK_ACCOUNT', 'PAPER_CHECK'])
+        )
+        self.assertEqual(
+            configurations.getTransferMethodTypes('CA', 'USD', 'INDIVIDUAL'),
+            frozenset(['BANK_ACCOUNT'])
+        )
+        self.assertEqual(configurations.getTransferMethodTypes('CA', 'USD', 'BUSINESS'), frozenset())
+
+        found = configurations.find('US', 'USD', 'BUSINESS')
+        self.assertEqual([(x.type, x.country, x.currency) for x in found], [('WIRE_ACCOUNT', 'US', 'USD')])
+        self.assertEqual(configurations.find('US', 'USD', 'INDIVIDUAL', 'PAPER_CHECK')[0].type, 'PAPER_CHECK')
+
+    def test_transfer_method_configuration_list_empty(self):
+
+        self.assertEqual(TransferMethodConfigurationList([]), [])
+
+    def test_transfer_method_configuration_list_equality(self):
+
+        data = [{'countries': ['US'], 'currencies': ['USD'], 'profileType': 'INDIVIDUAL', 'type': 'BANK_ACCOUNT'}]
+        configurations = TransferMethodConfigurationList(data)
+
+        self.assertTrue(configurations == configurations)
+        self.assertTrue(TransferMethodConfigurationList(data) == TransferMethodConfigurationList(list(data)))
+        self.assertFalse(configurations != TransferMethodConfigurationList(data))
+        self.assertNotEqual(configurations, TransferMethodConfigurationList([]))
+        self.assertNotEqual(configurations, [])
+
     def test_webhook_model(self):
 
         webhook_data = {
@@ -644,6 +905,61 @@ class ModelTest(unittest.TestCase):
 
         self.assertEqual(test_webhook.object, webhook_data.get('object'))
 
+    def test_webhook_model_single_segment_type(self):
+
+        webhook_data = {
+            'token': 'wbh-12345',
+            'type': 'USERS',
+            'object': self.user_data
+        }
+
+        test_webhook = Webhook(webhook_data)
+
+        self.assertEqual(test_webhook.object, webhook_data.get('object'))
+
+    def test_webhook_model_object_is_lazy_and_cached(self):
+
+        webhook_data = {
+            'token': 'wbh-12345',
+            'type': 'USERS.CREATED',
+            'object': self.user_data
+        }
+
+        model = mock.MagicMock(side_effect=User)
+
+        with mock.patch.dict(WEBHOOK_OBJECT_TYPES, {'USERS': model}):
+            with mock.patch.dict('hyperwallet.models._webhookDispatch', clear=True):
+                test_webhook = Webhook(webhook_data)
+
+                self.assertEqual(model.call_count, 0)
+                self.assertIs(test_webhook.object, test_webhook.object)
+                self.assertEqual(model.call_count, 1)
+
+        self.assertIsInstance(test_webhook.object, User)
+
+    def test_webhook_model_object_setter(self):
+
+        test_webhook = Webhook({'type': 'USERS.CREATED', 'object': self.user_data})
+
+        self.assertIsInstance(test_webhook.object, User)
+
+        test_webhook.object = self.transfer_method_data
+
+        self.assertIsInstance(test_webhook.object, User)
+        self.assertEqual(test_webhook.object.token, self.transfer_method_data.get('token'))
+
+        test_webhook.object = None
+
+        self.assertIsNone(test_webhook.object)
+
+    def test_get_webhook_object_type(self):
+
+        self.assertIs(getWebhookObjectType('USERS.BANK_ACCOUNTS.CREATED'), BankAccount)
+        self.assertIs(getWebhookObjectType('PAYMENTS.UPDATED.STATUS.COMPLETED'), Payment)
+        self.assertIs(getWebhookObjectType('TRANSFERS.REFUND.CREATED'), TransferRefunds)
+        self.assertIsNone(getWebhookObjectType('USER.PAYMENT'))
+        self.assertIsNone(getWebhookObjectType(None))
+
     '''
 
     Transfer Refunds
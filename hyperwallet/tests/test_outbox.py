@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+
+import mock
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from hyperwallet import Payment
+from hyperwallet.exceptions import HyperwalletException, HyperwalletAPIException, HyperwalletInProgressException
+from hyperwallet.outbox import PaymentOutbox, QUEUED, SUCCEEDED, FAILED
+
+
+def communicationError():
+    return HyperwalletAPIException({'errors': [{'code': 'COMMUNICATION_ERROR', 'message': 'timeout'}]})
+
+
+class PaymentOutboxTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.api = mock.MagicMock()
+        self.api.createPayment.side_effect = lambda data: Payment({'token': 'pmt-' + data['clientPaymentId']})
+
+    def test_fail_need_path(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            PaymentOutbox(self.api)
+
+        self.assertEqual(exc.exception.message, 'path is required')
+
+    def test_enqueue_fail_need_data(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            PaymentOutbox(self.api, ':memory:').enqueue()
+
+        self.assertEqual(exc.exception.message, 'data is required')
+
+    def test_enqueue_fail_need_client_payment_id(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            PaymentOutbox(self.api, ':memory:').enqueue({'amount': '10.00'})
+
+        self.assertEqual(exc.exception.message, 'clientPaymentId is required')
+
+    def test_enqueue_stores_client_payment_id_once(self):
+
+        outbox = PaymentOutbox(self.api, ':memory:')
+
+        outbox.enqueue({'clientPaymentId': '1', 'amount': '10.00'})
+        entry = outbox.enqueue({'clientPaymentId': '1', 'amount': '20.00'})
+
+        self.assertEqual(entry.state, QUEUED)
+        self.assertEqual(entry.data['amount'], '10.00')
+        self.assertEqual(outbox.counts()[QUEUED], 1)
+
+    def test_enqueue_waits_while_full(self):
+
+        outbox = PaymentOutbox(self.api, ':memory:', maxQueued=1)
+        outbox.enqueue({'clientPaymentId': '1'})
+
+        with self.assertRaises(HyperwalletException) as exc:
+            outbox.enqueue({'clientPaymentId': '2'}, timeout=0.01)
+
+        self.assertEqual(exc.exception.message, 'Outbox is full')
+
+        outbox.start()
+        outbox.enqueue({'clientPaymentId': '2'}, timeout=5)
+
+        self.assertTrue(outbox.drain(5))
+        self.assertEqual(outbox.counts()[SUCCEEDED], 2)
+        outbox.close()
+
+    def test_workers_send_payments(self):
+
+        succeeded = []
+        lock = threading.Lock()
+
+        def onSuccess(entry, payment):
+            with lock:
+                succeeded.append((entry.clientPaymentId, payment.token))
+
+        with PaymentOutbox(self.api, ':memory:', workers=3, batchSize=4, onSuccess=onSuccess) as outbox:
+            for i in range(20):
+                outbox.enqueue({'clientPaymentId': str(i)})
+
+            self.assertTrue(outbox.drain(5))
+
+            entry = outbox.status('7')
+
+        self.assertEqual(sorted(succeeded), sorted((str(i), 'pmt-{}'.format(i)) for i in range(20)))
+        self.assertEqual(entry.state, SUCCEEDED)
+        self.assertEqual(entry.attempts, 1)
+        self.assertEqual(entry.response, {'token': 'pmt-7'})
+        self.assertEqual(self.api.createPayment.call_count, 20)
+
+    def test_status_unknown_request(self):
+
+        self.assertIsNone(PaymentOutbox(self.api, ':memory:').status('1'))
+
+    def test_retry_communication_error(self):
+
+        self.api.createPayment.side_effect = [communicationError(), Payment({'token': 'pmt-1'})]
+
+        with PaymentOutbox(self.api, ':memory:', retryDelay=0) as outbox:
+            outbox.enqueue({'clientPaymentId': '1'})
+            self.assertTrue(outbox.drain(5))
+
+            entry = outbox.status('1')
+
+        self.assertEqual(entry.state, SUCCEEDED)
+        self.assertEqual(entry.attempts, 2)
+
+    def test_retry_server_error(self):
+
+        self.api.createPayment.side_effect = [
+            HyperwalletAPIException('Invalid Content-Type specified in Response Header', 504),
+            Payment({'token': 'pmt-1'})
+        ]
+
+        with PaymentOutbox(self.api, ':memory:', retryDelay=0) as outbox:
+            outbox.enqueue({'clientPaymentId': '1'})
+            self.assertTrue(outbox.drain(5))
+
+            entry = outbox.status('1')
+
+        self.assertEqual(entry.state, SUCCEEDED)
+        self.assertEqual(entry.attempts, 2)
+
+    def test_fail_after_retries(self):
+
+        failed = []
+        self.api.createPayment.side_effect = communicationError()
+
+        with PaymentOutbox(self.api, ':memory:', maxRetries=2, retryDelay=0, onFailure=failed.append) as outbox:
+            outbox.enqueue({'clientPaymentId': '1'})
+            self.assertTrue(outbox.drain(5))
+
+            entry = outbox.status('1')
+
+        self.assertEqual(entry.state, FAILED)
+        self.assertEqual(entry.attempts, 3)
+        self.assertEqual(entry.error['errors'][0]['code'], 'COMMUNICATION_ERROR')
+        self.assertEqual([x.clientPaymentId for x in failed], ['1'])
+
+    def test_fail_rejected_request_without_retry(self):
+
+        self.api.createPayment.side_effect = HyperwalletAPIException({'errors': [{'code': 'CONSTRAINT_VIOLATIONS'}]})
+
+        with PaymentOutbox(self.api, ':memory:', retryDelay=0) as outbox:
+            outbox.enqueue({'clientPaymentId': '1'})
+            self.assertTrue(outbox.drain(5))
+
+            entry = outbox.status('1')
+
+        self.assertEqual(entry.state, FAILED)
+        self.assertEqual(entry.attempts, 1)
+
+    def test_retry_in_progress_after_lease_expires(self):
+
+        leaseExpiresOn = time.time() + 0.2
+        self.api.createPayment.side_effect = [
+            HyperwalletInProgressException('payments', '1', leaseExpiresOn),
+            Payment({'token': 'pmt-1'})
+        ]
+
+        with PaymentOutbox(self.api, ':memory:', maxRetries=0, retryDelay=0) as outbox:
+            outbox.enqueue({'clientPaymentId': '1'})
+            self.assertTrue(outbox.drain(5))
+
+            entry = outbox.status('1')
+
+        self.assertGreaterEqual(time.time(), leaseExpiresOn)
+        self.assertEqual(entry.state, SUCCEEDED)
+        self.assertEqual(entry.attempts, 1)
+
+    def test_callback_error_does_not_stop_worker(self):
+
+        def onSuccess(entry, payment):
+            raise RuntimeError('callback')
+
+        with PaymentOutbox(self.api, ':memory:', workers=1, onSuccess=onSuccess) as outbox:
+            outbox.enqueue({'clientPaymentId': '1'})
+            outbox.enqueue({'clientPaymentId': '2'})
+
+            self.assertTrue(outbox.drain(5))
+            self.assertEqual(outbox.counts()[SUCCEEDED], 2)
+
+    def test_drain_timeout(self):
+
+        outbox = PaymentOutbox(self.api, ':memory:')
+        outbox.enqueue({'clientPaymentId': '1'})
+
+        self.assertFalse(outbox.drain(0.01))
+
+    def test_requests_survive_restart(self):
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'outbox.db')
+
+        try:
+            outbox = PaymentOutbox(self.api, path)
+            outbox.enqueue({'clientPaymentId': '1'})
+            outbox.enqueue({'clientPaymentId': '2'})
+            outbox.close()
+
+            self.assertEqual(self.api.createPayment.call_count, 0)
+
+            with PaymentOutbox(self.api, path) as outbox:
+                self.assertTrue(outbox.drain(5))
+                self.assertEqual(outbox.status('2').state, SUCCEEDED)
+
+            self.assertEqual(self.api.createPayment.call_count, 2)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_database_used_by_another_outbox(self):
+
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'outbox.db')
+
+        try:
+            outbox = PaymentOutbox(self.api, path)
+
+            with self.assertRaises(HyperwalletException) as exc:
+                PaymentOutbox(self.api, path, timeout=0)
+
+            self.assertEqual(exc.exception.message, 'Outbox database {} is used by another outbox'.format(path))
+
+            outbox.close()
+            PaymentOutbox(self.api, path, timeout=0).close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+
+import mock
+import unittest
+
+from hyperwallet.utils.paging import iterPages, iterItems
+
+
+class PagingTest(unittest.TestCase):
+
+    def test_iter_pages(self):
+
+        listFunction = mock.MagicMock(side_effect=[[1, 2], [3, 4], [5]])
+
+        self.assertEqual(list(iterPages(listFunction, params={'status': 'ACTIVATED'}, limit=2)), [[1, 2], [3, 4], [5]])
+        listFunction.assert_has_calls([
+            mock.call({'status': 'ACTIVATED', 'offset': 0, 'limit': 2}),
+            mock.call({'status': 'ACTIVATED', 'offset': 2, 'limit': 2}),
+            mock.call({'status': 'ACTIVATED', 'offset': 4, 'limit': 2})
+        ])
+
+    def test_iter_pages_stops_on_empty_page(self):
+
+        listFunction = mock.MagicMock(side_effect=[[1, 2], []])
+
+        self.assertEqual(list(iterPages(listFunction, args=('usr-1',), limit=2)), [[1, 2]])
+        listFunction.assert_called_with('usr-1', {'offset': 2, 'limit': 2})
+
+    def test_iter_items(self):
+
+        listFunction = mock.MagicMock(side_effect=[[1, 2], [3]])
+
+        self.assertEqual(list(iterItems(listFunction, params={'offset': 10}, limit=2)), [1, 2, 3])
+        listFunction.assert_called_with({'offset': 12, 'limit': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
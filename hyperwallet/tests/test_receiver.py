@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+import asyncio
+import io
+import json
+import os.path
+import threading
+import unittest
+
+from hyperwallet import User, Webhook
+from hyperwallet.receiver import WebhookReceiver
+from hyperwallet.utils.encryption import Encryption
+
+
+def notification(i):
+    return json.dumps({
+        'token': 'wbh-{}'.format(i),
+        'type': 'USERS.CREATED',
+        'object': {'token': 'usr-{}'.format(i)}
+    }).encode('utf-8')
+
+
+class WebhookReceiverTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.webhooks = []
+        self.lock = threading.Lock()
+
+    def handler(self, webhook):
+
+        with self.lock:
+            self.webhooks.append(webhook)
+
+    def post(self, receiver, body, method='POST'):
+
+        responses = []
+        environ = {
+            'REQUEST_METHOD': method,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body)
+        }
+
+        result = receiver(environ, lambda status, headers: responses.append((status, dict(headers))))
+
+        self.assertEqual(b''.join(result), b'')
+
+        return responses[0]
+
+    def test_wsgi_dispatches_webhooks(self):
+
+        with WebhookReceiver(self.handler, workers=3, batchSize=4) as receiver:
+            for i in range(50):
+                self.assertEqual(self.post(receiver, notification(i))[0], '202 Accepted')
+
+            self.assertTrue(receiver.drain(5))
+
+        self.assertEqual(sorted(x.token for x in self.webhooks), sorted('wbh-{}'.format(i) for i in range(50)))
+        self.assertIsInstance(self.webhooks[0], Webhook)
+        self.assertIsInstance(self.webhooks[0].object, User)
+        self.assertEqual(receiver.received, 50)
+        self.assertEqual(receiver.processed, 50)
+
+    def test_wsgi_rejects_other_methods(self):
+
+        receiver = WebhookReceiver(self.handler)
+
+        self.assertEqual(self.post(receiver, b'', 'GET')[0], '405 Method Not Allowed')
+
+    def test_wsgi_reads_chunked_delivery(self):
+
+        responses = []
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'wsgi.input': io.BytesIO(notification(1)),
+            'wsgi.input_terminated': True
+        }
+
+        with WebhookReceiver(self.handler) as receiver:
+            receiver(environ, lambda status, headers: responses.append(status))
+            self.assertTrue(receiver.drain(5))
+
+        self.assertEqual(responses, ['202 Accepted'])
+        self.assertEqual([x.token for x in self.webhooks], ['wbh-1'])
+
+    def test_wsgi_rejects_delivery_without_length(self):
+
+        responses = []
+        receiver = WebhookReceiver(self.handler)
+
+        receiver({'REQUEST_METHOD': 'POST', 'wsgi.input': io.BytesIO(notification(1))},
+                 lambda status, headers: responses.append(status))
+
+        self.assertEqual(responses, ['411 Length Required'])
+        self.assertEqual(receiver.received, 0)
+
+    def test_wsgi_rejects_empty_delivery(self):
+
+        receiver = WebhookReceiver(self.handler)
+
+        self.assertEqual(self.post(receiver, b'')[0], '400 Bad Request')
+        self.assertEqual(receiver.received, 0)
+
+    def test_wsgi_rejects_delivery_when_queue_is_full(self):
+
+        receiver = WebhookReceiver(self.handler, maxQueued=1)
+
+        self.assertEqual(self.post(receiver, notification(1))[0], '202 Accepted')
+
+        (status, headers) = self.post(receiver, notification(2))
+
+        self.assertEqual(status, '503 Service Unavailable')
+        self.assertEqual(headers['Retry-After'], '1')
+        self.assertEqual(receiver.rejected, 1)
+
+        receiver.start()
+        receiver.stop()
+
+        self.assertEqual([x.token for x in self.webhooks], ['wbh-1'])
+
+    def test_invalid_delivery_reported(self):
+
+        errors = []
+
+        with WebhookReceiver(self.handler, onError=lambda body, error: errors.append((body, error))) as receiver:
+            receiver.accept(b'not json')
+            receiver.accept(notification(1))
+            self.assertTrue(receiver.drain(5))
+
+        self.assertEqual(errors[0][0], b'not json')
+        self.assertIsInstance(errors[0][1], ValueError)
+        self.assertEqual(receiver.failed, 1)
+        self.assertEqual(receiver.processed, 1)
+
+    def test_handler_error_reported(self):
+
+        errors = []
+
+        def handler(webhook):
+            raise RuntimeError('handler')
+
+        with WebhookReceiver(handler, onError=lambda body, error: errors.append(error)) as receiver:
+            receiver.accept(notification(1))
+            self.assertTrue(receiver.drain(5))
+
+        self.assertEqual(str(errors[0]), 'handler')
+
+    def test_encrypted_delivery(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        encryptionData = {
+            'clientPrivateKeySetLocation': os.path.join(localDir, 'resources', 'private-jwkset1'),
+            'hyperwalletKeySetLocation': os.path.join(localDir, 'resources', 'public-jwkset1')
+        }
+        encryption = Encryption(**encryptionData)
+        errors = []
+
+        with WebhookReceiver(self.handler, encryptionData, onError=lambda body, error: errors.append(error)) as receiver:
+            receiver.accept(encryption.encrypt(notification(1).decode('utf-8')).encode('ascii'))
+            receiver.accept(notification(2))
+            self.assertTrue(receiver.drain(5))
+
+        self.assertEqual([x.token for x in self.webhooks], ['wbh-1'])
+        self.assertEqual(len(errors), 1)
+
+    def test_asgi_dispatches_webhooks(self):
+
+        receiver = WebhookReceiver(self.handler)
+        body = notification(1)
+        messages = [
+            {'type': 'http.request', 'body': body[:10], 'more_body': True},
+            {'type': 'http.request', 'body': body[10:], 'more_body': False}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(receiver.asgi({'type': 'http', 'method': 'POST'}, receive, send))
+
+        self.assertEqual(sent[0]['status'], 202)
+        self.assertEqual(sent[1], {'type': 'http.response.body', 'body': b''})
+
+        receiver.start()
+        receiver.stop()
+
+        self.assertEqual([x.token for x in self.webhooks], ['wbh-1'])
+
+    def test_asgi_rejects_empty_delivery(self):
+
+        receiver = WebhookReceiver(self.handler)
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(receiver.asgi({'type': 'http', 'method': 'POST'}, receive, send))
+
+        self.assertEqual(sent[0]['status'], 400)
+        self.assertEqual(receiver.received, 0)
+
+    def test_asgi_rejects_other_methods(self):
+
+        receiver = WebhookReceiver(self.handler)
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(receiver.asgi({'type': 'http', 'method': 'GET'}, None, send))
+
+        self.assertEqual(sent[0]['status'], 405)
+
+
+if __name__ == '__main__':
+    unittest.main()
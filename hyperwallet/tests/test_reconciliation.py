@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+import mock
+import unittest
+
+from hyperwallet import Payment, Receipt, Transfer
+from hyperwallet.reconciliation import (
+    Reconciler,
+    MATCHED,
+    AMOUNT_MISMATCH,
+    UNMATCHED_RECEIPT,
+    UNMATCHED_RECORD
+)
+
+
+class ReconcilerTest(unittest.TestCase):
+
+    def receipt(self, clientPaymentId, amount, currency='USD', type='PAYMENT'):
+
+        return Receipt({
+            'journalId': 'j-' + str(clientPaymentId),
+            'type': type,
+            'amount': amount,
+            'currency': currency,
+            'details': {'clientPaymentId': clientPaymentId} if clientPaymentId else {}
+        })
+
+    def payment(self, clientPaymentId, amount, currency='USD'):
+
+        return Payment({
+            'token': 'pmt-' + clientPaymentId,
+            'clientPaymentId': clientPaymentId,
+            'amount': amount,
+            'currency': currency
+        })
+
+    def test_add_receipt_then_record(self):
+
+        reconciler = Reconciler()
+
+        self.assertEqual(reconciler.addReceipt(self.receipt('p1', '-10.00')), [])
+        self.assertEqual(reconciler.outstanding, 1)
+
+        results = reconciler.addRecord(self.payment('p1', '10.00'))
+
+        self.assertEqual(results[0].status, MATCHED)
+        self.assertEqual(results[0].key, 'p1')
+        self.assertEqual(results[0].record.token, 'pmt-p1')
+        self.assertEqual(reconciler.outstanding, 0)
+
+    def test_amount_and_currency_mismatch(self):
+
+        reconciler = Reconciler()
+        reconciler.addRecord(self.payment('p1', '10.00'))
+        reconciler.addRecord(self.payment('p2', '10.00'))
+
+        self.assertEqual(reconciler.addReceipt(self.receipt('p1', '9.99'))[0].status, AMOUNT_MISMATCH)
+        self.assertEqual(reconciler.addReceipt(self.receipt('p2', '10.00', 'CAD'))[0].status, AMOUNT_MISMATCH)
+
+    def test_reconcile_streams(self):
+
+        reconciler = Reconciler()
+        receipts = [
+            self.receipt('p1', '10.00'),
+            self.receipt('p2', '20.00'),
+            self.receipt(None, '1.00'),
+            self.receipt('p4', '5.00')
+        ]
+        records = [
+            self.payment('p2', '20.00'),
+            self.payment('p1', '11.00'),
+            self.payment('p3', '30.00')
+        ]
+
+        results = list(reconciler.reconcile(iter(receipts), iter(records)))
+
+        self.assertEqual(sorted((x.status, str(x.key)) for x in results), [
+            (AMOUNT_MISMATCH, 'p1'),
+            (MATCHED, 'p2'),
+            (UNMATCHED_RECEIPT, 'None'),
+            (UNMATCHED_RECEIPT, 'p4'),
+            (UNMATCHED_RECORD, 'p3')
+        ])
+        self.assertEqual(reconciler.counts, {
+            MATCHED: 1,
+            AMOUNT_MISMATCH: 1,
+            UNMATCHED_RECEIPT: 2,
+            UNMATCHED_RECORD: 1
+        })
+        self.assertEqual(reconciler.outstanding, 0)
+
+    def test_receipt_types_filter(self):
+
+        reconciler = Reconciler(receiptTypes={'PAYMENT'})
+
+        self.assertEqual(reconciler.addReceipt(self.receipt('p1', '1.00', type='TRANSFER_FEE')), [])
+        self.assertEqual(reconciler.outstanding, 0)
+
+    def test_transfers(self):
+
+        reconciler = Reconciler()
+        transfer = Transfer({
+            'clientTransferId': 't1',
+            'sourceAmount': '15.00',
+            'sourceCurrency': 'USD'
+        })
+        receipt = Receipt({
+            'amount': '-15.00',
+            'currency': 'USD',
+            'details': {'clientTransferId': 't1'}
+        })
+
+        reconciler.addRecord(transfer)
+
+        self.assertEqual(reconciler.addReceipt(receipt)[0].status, MATCHED)
+
+    def test_reconcile_account(self):
+
+        api = mock.MagicMock()
+        api.listReceiptsForAccount.side_effect = [[self.receipt('p1', '10.00')]]
+        api.listPayments.side_effect = [[self.payment('p1', '10.00')]]
+        api.listTransfers.side_effect = [[Transfer({'clientTransferId': 't1', 'sourceAmount': '1', 'sourceCurrency': 'USD'})]]
+
+        results = list(Reconciler().reconcileAccount(api, 'prg-1', 'act-1', includeTransfers=True))
+
+        self.assertEqual(sorted(x.status for x in results), [MATCHED, UNMATCHED_RECORD])
+        api.listReceiptsForAccount.assert_called_once_with('prg-1', 'act-1', {'offset': 0, 'limit': 100})
+
+
+if __name__ == '__main__':
+    unittest.main()
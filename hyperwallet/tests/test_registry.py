@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+
+import mock
+import os.path
+import unittest
+
+from hyperwallet import Api, User
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.registry import ClientRegistry
+
+
+class ClientRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.registry = ClientRegistry()
+
+    def test_get_client_fail_need_username(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.registry.getClient(password='test-pass')
+
+        self.assertEqual(exc.exception.message, 'username is required')
+
+    def test_get_api_fail_need_program_token(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            self.registry.getApi('test-user', 'test-pass')
+
+        self.assertEqual(exc.exception.message, 'programToken is required')
+
+    def test_get_api_shares_client_between_programs(self):
+
+        api1 = self.registry.getApi('test-user', 'test-pass', 'prg-1')
+        api2 = self.registry.getApi('test-user', 'test-pass', 'prg-2')
+
+        self.assertIsInstance(api1, Api)
+        self.assertEqual(api1.programToken, 'prg-1')
+        self.assertEqual(api2.programToken, 'prg-2')
+        self.assertIs(api1.apiClient, api2.apiClient)
+        self.assertEqual(len(self.registry), 1)
+
+    def test_get_api_separates_credentials_and_servers(self):
+
+        api1 = self.registry.getApi('test-user', 'test-pass', 'prg-1')
+        api2 = self.registry.getApi('other-user', 'test-pass', 'prg-1')
+        api3 = self.registry.getApi('test-user', 'test-pass', 'prg-1', 'https://api.paylution.com')
+
+        self.assertIsNot(api1.apiClient, api2.apiClient)
+        self.assertIsNot(api1.apiClient, api3.apiClient)
+        self.assertEqual(api3.apiClient.server, 'https://api.paylution.com')
+        self.assertEqual(len(self.registry), 3)
+
+    def test_get_api_separates_key_sets(self):
+
+        localDir = os.path.abspath(os.path.dirname(__file__))
+        encryptionData1 = {
+            'clientPrivateKeySetLocation': os.path.join(localDir, 'resources', 'private-jwkset1'),
+            'hyperwalletKeySetLocation': os.path.join(localDir, 'resources', 'public-jwkset1')
+        }
+        encryptionData2 = {
+            'clientPrivateKeySetLocation': os.path.join(localDir, 'resources', 'private-jwkset2'),
+            'hyperwalletKeySetLocation': os.path.join(localDir, 'resources', 'public-jwkset2')
+        }
+
+        api1 = self.registry.getApi('test-user', 'test-pass', 'prg-1', encryptionData=encryptionData1)
+        api2 = self.registry.getApi('test-user', 'test-pass', 'prg-2', encryptionData=dict(encryptionData1))
+        api3 = self.registry.getApi('test-user', 'test-pass', 'prg-3', encryptionData=encryptionData2)
+        api4 = self.registry.getApi('test-user', 'test-pass', 'prg-4')
+
+        self.assertIs(api1.apiClient, api2.apiClient)
+        self.assertIs(api1.apiClient.encryption, api2.apiClient.encryption)
+        self.assertIsNot(api1.apiClient, api3.apiClient)
+        self.assertIsNot(api1.apiClient, api4.apiClient)
+        self.assertFalse(api4.apiClient.encrypted)
+
+    def test_get_api_configuration_cache_per_program(self):
+
+        api1 = self.registry.getApi('test-user', 'test-pass', 'prg-1', configurationCacheData={'ttl': 60})
+        api2 = self.registry.getApi('test-user', 'test-pass', 'prg-2')
+
+        self.assertIsNotNone(api1.configurationCache)
+        self.assertIsNone(api2.configurationCache)
+
+    @mock.patch('hyperwallet.utils.ApiClient._makeRequest')
+    def test_shared_client_serves_every_program(self, mock_request):
+
+        mock_request.return_value = {'token': 'usr-1'}
+        api1 = self.registry.getApi('test-user', 'test-pass', 'prg-1')
+        api2 = self.registry.getApi('test-user', 'test-pass', 'prg-2')
+
+        self.assertIsInstance(api1.getUser('usr-1'), User)
+        self.assertIsInstance(api2.getUser('usr-1'), User)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_close_closes_sessions(self):
+
+        client = self.registry.getClient('test-user', 'test-pass')
+        session = mock.MagicMock()
+        client.session = session
+
+        self.registry.close()
+
+        session.close.assert_called_once_with()
+        self.assertEqual(len(self.registry), 0)
+        self.assertIsNot(self.registry.getClient('test-user', 'test-pass'), client)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import threading
+import time
+import unittest
+
+from hyperwallet import Webhook
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.router import WebhookRouter, getPartitionKey
+
+
+def webhook(i, webhookType='USERS.UPDATED', objectToken=None):
+    return Webhook({
+        'token': 'wbh-{}'.format(i),
+        'type': webhookType,
+        'object': {'token': objectToken or 'usr-{}'.format(i)}
+    })
+
+
+class WebhookRouterTest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def handler(self, webhook):
+
+        with self.lock:
+            self.calls.append(webhook.token)
+
+    def test_getPartitionKey_uses_object_token(self):
+
+        item = webhook(1)
+
+        self.assertEqual(getPartitionKey(item), 'usr-1')
+        self.assertIsNone(item._object)
+
+    def test_getPartitionKey_falls_back_to_webhook_token(self):
+
+        self.assertEqual(getPartitionKey(Webhook({'token': 'wbh-1', 'type': 'USERS.UPDATED'})), 'wbh-1')
+
+    def test_register_requires_pattern(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            WebhookRouter().register('', self.handler)
+
+        self.assertEqual(exc.exception.message, 'pattern is required')
+
+    def test_workers_must_be_positive(self):
+
+        with self.assertRaises(ValueError):
+            WebhookRouter(workers=0)
+
+    def test_match_patterns_in_registration_order(self):
+
+        router = WebhookRouter()
+
+        def payments(webhook):
+            pass
+
+        def all(webhook):
+            pass
+
+        router.register('PAYMENTS.*', payments)
+        router.on('*')(all)
+        router.register('USERS.UPDATED', self.handler)
+
+        self.assertEqual([x[1] for x in router.match('PAYMENTS.UPDATED.STATUS.COMPLETED')], [payments, all])
+        self.assertEqual([x[1] for x in router.match('USERS.UPDATED')], [all, self.handler])
+        self.assertEqual([x[1] for x in router.match('users.updated')], [all])
+
+    def test_register_invalidates_matches(self):
+
+        router = WebhookRouter()
+        router.register('USERS.*', self.handler)
+
+        self.assertEqual(len(router.match('USERS.UPDATED')), 1)
+
+        router.register('USERS.UPDATED', self.handler)
+
+        self.assertEqual(len(router.match('USERS.UPDATED')), 2)
+
+    def test_dispatch_counts_unhandled(self):
+
+        router = WebhookRouter()
+        router.dispatch(webhook(1))
+
+        self.assertEqual(router.metrics()['unhandled'], 1)
+
+    def test_dispatch_records_errors(self):
+
+        errors = []
+        router = WebhookRouter(onError=lambda *args: errors.append(args))
+
+        def failing(webhook):
+            raise ValueError('failed')
+
+        router.register('USERS.*', failing)
+        router.register('USERS.*', self.handler)
+        router.dispatch(webhook(1))
+
+        metrics = router.metrics()['handlers']
+
+        self.assertEqual(metrics['USERS.*:failing']['calls'], 1)
+        self.assertEqual(metrics['USERS.*:failing']['errors'], 1)
+        self.assertEqual(metrics['USERS.*:handler']['errors'], 0)
+        self.assertEqual(self.calls, ['wbh-1'])
+        self.assertEqual(errors[0][1], failing)
+        self.assertIsInstance(errors[0][2], ValueError)
+
+    def test_dispatch_ignores_onError_failure(self):
+
+        def onError(*args):
+            raise ValueError('failed')
+
+        def failing(webhook):
+            raise ValueError('failed')
+
+        router = WebhookRouter(onError=onError)
+        router.register('*', failing)
+        router.dispatch(webhook(1))
+
+        self.assertEqual(router.metrics()['handlers']['*:failing']['errors'], 1)
+
+    def test_route_keeps_order_per_object(self):
+
+        events = {}
+
+        def record(webhook):
+            time.sleep(0.0005)
+
+            with self.lock:
+                events.setdefault(webhook.object.token, []).append(int(webhook.token.split('-')[1]))
+
+        with WebhookRouter(workers=4) as router:
+            router.register('USERS.*', record)
+
+            for i in range(200):
+                router.route(webhook(i, objectToken='usr-{}'.format(i % 7)))
+
+            self.assertTrue(router.drain(5))
+
+        self.assertEqual(len(events), 7)
+
+        for (token, order) in events.items():
+            self.assertEqual(order, sorted(order))
+
+        metrics = router.metrics()
+
+        self.assertEqual(metrics['routed'], 200)
+        self.assertEqual(metrics['queueDepths'], [0, 0, 0, 0])
+        self.assertEqual(metrics['handlers']['USERS.*:record']['calls'], 200)
+        self.assertGreater(metrics['handlers']['USERS.*:record']['maxSeconds'], 0)
+        self.assertGreater(metrics['handlers']['USERS.*:record']['averageSeconds'], 0)
+
+    def test_route_applies_backpressure(self):
+
+        router = WebhookRouter(workers=1, maxQueued=2)
+        router.register('*', self.handler)
+
+        router.route(webhook(1))
+        router.route(webhook(2))
+
+        self.assertEqual(router.metrics()['queueDepths'], [2])
+
+        with self.assertRaises(HyperwalletException) as exc:
+            router.route(webhook(3), timeout=0.01)
+
+        self.assertEqual(exc.exception.message, 'Partition 0 is full')
+
+        router.start()
+        router.route(webhook(3), timeout=5)
+        router.stop()
+
+        self.assertEqual(self.calls, ['wbh-1', 'wbh-2', 'wbh-3'])
+        self.assertEqual(router.metrics()['routed'], 3)
+
+    def test_drain_timeout(self):
+
+        router = WebhookRouter(workers=1)
+        router.route(webhook(1))
+
+        self.assertFalse(router.drain(0.01))
+
+        router.start()
+
+        self.assertTrue(router.drain(5))
+
+        router.stop()
+
+    def test_stop_without_start(self):
+
+        router = WebhookRouter()
+        router.stop()
+
+        self.assertEqual(router.metrics()['queueDepths'], [0, 0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+
+import json
+import pickle
+import unittest
+
+import mock
+
+from hyperwallet import (
+    HyperwalletVerificationDocument,
+    HyperwalletVerificationDocumentReason,
+    Receipt,
+    RejectReason,
+    TransferMethodConfiguration,
+    User
+)
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.utils import serialization
+from hyperwallet.utils.serialization import CODEC_JSON, CODEC_MSGPACK, dumps, fromBytes, getCodec, loads, toBytes
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def userWithDocuments():
+    return User({
+        'token': 'usr-1',
+        'createdOn': '2017-10-31T22:32:57',
+        'verificationStatus': 'REQUIRED',
+        'documents': [HyperwalletVerificationDocument({
+            'category': 'IDENTIFICATION',
+            'type': 'DRIVERS_LICENSE',
+            'status': 'INVALID',
+            'reasons': [HyperwalletVerificationDocumentReason({
+                'name': RejectReason.DOCUMENT_EXPIRED,
+                'description': 'Document has expired'
+            })]
+        })]
+    })
+
+
+class SerializationTest(object):
+
+    codec = None
+
+    def setUp(self):
+
+        # Decoded as a page returned by the API.
+        self.receipts = [Receipt(x) for x in json.loads(json.dumps([{
+            'journalId': str(i),
+            'type': 'PAYMENT',
+            'entry': 'CREDIT',
+            'amount': '{}.50'.format(i),
+            'fee': '0.00',
+            'currency': 'USD',
+            'details': {'clientPaymentId': 'pmt-{}'.format(i), 'payeeName': u'José'},
+            'createdOn': '2017-10-31T22:32:57'
+        } for i in range(10)]))]
+
+    def assertSameModel(self, first, second):
+
+        self.assertIs(type(first), type(second))
+        self.assertEqual(first._raw_json, second._raw_json)
+
+    def test_round_trip(self):
+
+        model = fromBytes(toBytes(self.receipts[0], self.codec))
+
+        self.assertSameModel(model, self.receipts[0])
+        self.assertEqual(model.amount, '0.50')
+        self.assertEqual(model.details['payeeName'], u'José')
+
+    def test_model_methods(self):
+
+        data = self.receipts[0].toBytes(self.codec)
+
+        self.assertSameModel(Receipt.fromBytes(data), self.receipts[0])
+
+        with self.assertRaises(HyperwalletException) as exc:
+            User.fromBytes(data)
+
+        self.assertEqual(exc.exception.message, 'Expected User, found Receipt')
+
+    def test_derived_attributes(self):
+
+        configuration = TransferMethodConfiguration({'countries': ['CA'], 'currencies': ['CAD'], 'type': 'BANK_ACCOUNT'})
+        model = fromBytes(toBytes(configuration, self.codec))
+
+        self.assertEqual(model.country, 'CA')
+        self.assertEqual(model.currency, 'CAD')
+
+    def test_nested_models_and_reject_reasons(self):
+
+        model = fromBytes(toBytes(userWithDocuments(), self.codec))
+        document = model.documents[0]
+        reason = document.reasons[0]
+
+        self.assertIsInstance(document, HyperwalletVerificationDocument)
+        self.assertEqual(document.type, 'DRIVERS_LICENSE')
+        self.assertIsInstance(reason, HyperwalletVerificationDocumentReason)
+        self.assertIs(reason.name, RejectReason.DOCUMENT_EXPIRED)
+
+    def test_batch(self):
+
+        models = loads(dumps(self.receipts, self.codec))
+
+        self.assertEqual(len(models), 10)
+
+        for (model, receipt) in zip(models, self.receipts):
+            self.assertSameModel(model, receipt)
+
+    def test_batch_mixed_models(self):
+
+        user = User({'token': 'usr-1'})
+        models = loads(dumps([user, self.receipts[0]], self.codec))
+
+        self.assertSameModel(models[0], user)
+        self.assertSameModel(models[1], self.receipts[0])
+
+    def test_batch_different_attributes(self):
+
+        receipts = [Receipt({'journalId': '1', 'amount': '1.00'}), Receipt({'amount': '2.00', 'journalId': '2', 'fee': None})]
+        models = loads(dumps(receipts, self.codec))
+
+        self.assertEqual([x._raw_json for x in models], [x._raw_json for x in receipts])
+        self.assertEqual(list(models[1]._raw_json), ['amount', 'journalId', 'fee'])
+
+    def test_batch_empty(self):
+
+        self.assertEqual(loads(dumps([], self.codec)), [])
+
+    def test_smaller_than_pickle(self):
+
+        self.assertLess(len(toBytes(self.receipts[0], self.codec)), len(pickle.dumps(self.receipts[0])) / 2)
+        self.assertLess(len(dumps(self.receipts, self.codec)), len(pickle.dumps(self.receipts)))
+
+    def test_unserializable_value(self):
+
+        with self.assertRaises(TypeError):
+            toBytes(User({'token': object()}), self.codec)
+
+
+class JsonSerializationTest(SerializationTest, unittest.TestCase):
+
+    codec = 'json'
+
+    def test_header(self):
+
+        data = toBytes(User({'token': 'usr-1'}), self.codec)
+
+        self.assertEqual(data, b'HWM\x01\x00["User",{"token":"usr-1"}]')
+
+    def test_plain_dictionaries_are_kept(self):
+
+        user = User({'token': 'usr-1', 'metadata': {'$model': 'User'}})
+
+        self.assertEqual(fromBytes(toBytes(user, self.codec))._raw_json, user._raw_json)
+
+
+@unittest.skipIf(msgpack is None, 'msgpack is not installed')
+class MsgpackSerializationTest(SerializationTest, unittest.TestCase):
+
+    codec = 'msgpack'
+
+    def test_header(self):
+
+        self.assertEqual(toBytes(User({'token': 'usr-1'}), self.codec)[:5], b'HWM\x01\x01')
+
+    def test_smaller_than_json(self):
+
+        self.assertLess(len(dumps(self.receipts, self.codec)), len(dumps(self.receipts, 'json')))
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_default_codec(self):
+
+        self.assertEqual(getCodec(), CODEC_JSON if msgpack is None else CODEC_MSGPACK)
+
+    def test_default_codec_without_msgpack(self):
+
+        with mock.patch.object(serialization, '_msgpack', None), mock.patch.dict('sys.modules', {'msgpack': None}):
+            self.assertEqual(getCodec(), CODEC_JSON)
+
+            with self.assertRaises(HyperwalletException) as exc:
+                getCodec('msgpack')
+
+        self.assertEqual(exc.exception.message, 'msgpack is required for this feature, install it with: pip install msgpack')
+
+    def test_unsupported_codec(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            getCodec('pickle')
+
+        self.assertEqual(exc.exception.message, 'Unsupported codec = pickle')
+
+    def test_invalid_data(self):
+
+        for data in (b'', b'XYZ\x01\x00[]', b'HWM'):
+            with self.assertRaises(HyperwalletException) as exc:
+                fromBytes(data)
+
+            self.assertEqual(exc.exception.message, 'Invalid serialized model')
+
+    def test_unsupported_version(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            fromBytes(b'HWM\x02\x00[]')
+
+        self.assertEqual(exc.exception.message, 'Unsupported serialization version = 2')
+
+    def test_unsupported_codec_in_header(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            fromBytes(b'HWM\x01\x09[]')
+
+        self.assertEqual(exc.exception.message, 'Unsupported codec = 9')
+
+    def test_unknown_model(self):
+
+        with self.assertRaises(HyperwalletException) as exc:
+            fromBytes(b'HWM\x01\x00["Unknown",{}]')
+
+        self.assertEqual(exc.exception.message, 'Unknown model = Unknown')
+
+    def test_subclass_defined_later(self):
+
+        class CustomUser(User):
+            pass
+
+        model = fromBytes(toBytes(CustomUser({'token': 'usr-1'}), 'json'))
+
+        self.assertIsInstance(model, CustomUser)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+import threading
+import unittest
+
+from hyperwallet.utils.singleflight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def run_concurrently(self, group, key, function, count=5, copy=None):
+
+        results = []
+        errors = []
+
+        def target():
+            try:
+                results.append(group.do(key, function, copy))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+
+        return threads, results, errors
+
+    def test_sequential_calls_are_not_shared(self):
+
+        group = SingleFlight()
+
+        self.assertEqual(group.do('key', lambda: 1), (1, False))
+        self.assertEqual(group.do('key', lambda: 2), (2, False))
+        self.assertEqual(group.executions, 2)
+
+    def test_concurrent_calls_are_coalesced(self):
+
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def function():
+            calls.append(1)
+            release.wait(5)
+            return 'value'
+
+        threads, results, errors = self.run_concurrently(group, 'key', function)
+
+        while group.executions + group.coalesced < 5:
+            pass
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('value', False)] + [('value', True)] * 4)
+        self.assertEqual(group.coalesced, 4)
+
+    def test_errors_are_shared(self):
+
+        group = SingleFlight()
+        release = threading.Event()
+
+        def function():
+            release.wait(5)
+            raise ValueError('failed')
+
+        threads, results, errors = self.run_concurrently(group, 'key', function, 3)
+
+        while group.executions + group.coalesced < 3:
+            pass
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [])
+        self.assertEqual([str(e) for e in errors], ['failed'] * 3)
+        self.assertEqual(group.do('key', lambda: 'next'), ('next', False))
+
+    def test_copy_result_for_every_caller(self):
+
+        group = SingleFlight()
+        release = threading.Event()
+        shared = {'token': 'usr-1'}
+
+        def function():
+            release.wait(5)
+            return shared
+
+        threads, results, errors = self.run_concurrently(group, 'key', function, 3, copy=dict)
+
+        while group.executions + group.coalesced < 3:
+            pass
+
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(x[1] for x in results), [False, True, True])
+        self.assertEqual([x[0] for x in results], [shared] * 3)
+        self.assertEqual(len(set(id(x[0]) for x in results) | set([id(shared)])), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,13 @@
 #!/usr/bin/env python
 
-import ssl
+import copy
 import json
-import requests
+import threading
 import uuid
 
 from hyperwallet.exceptions import HyperwalletAPIException
-from requests_toolbelt.adapters.ssl import SSLAdapter
 from hyperwallet import __version__
-from hyperwallet.utils.encryption import Encryption
+from hyperwallet.utils.singleflight import SingleFlight
 try:
     from urllib.parse import urljoin
 except ImportError:
@@ -27,16 +26,26 @@ class ApiClient(object):
         The base URL of the API. **REQUIRED**
     :param encryptionData:
         Array with params for encrypted requests(Fields: clientPrivateKeySetLocation, hyperwalletKeySetLocation).
+    :param coalesceRequests:
+        Collapse identical concurrent GET requests into a single API call.
+    :param poolSize:
+        The maximum number of pooled connections, should be at least the number of concurrent requests.
     '''
 
-    def __init__(self, username, password, server, encryptionData=None):
+    def __init__(self, username, password, server, encryptionData=None, coalesceRequests=False, poolSize=10):
         '''
         Create an instance of the API client.
         This client is used to make the calls to the Hyperwallet API.
         '''
 
-        # Setup encryption for request/responses.
-        self.encryption = Encryption(**encryptionData) if encryptionData is not None else None
+        # Setup encryption for request/responses, the JOSE libraries are only
+        # loaded when encryption is enabled.
+        if encryptionData is not None:
+            from hyperwallet.utils.encryption import Encryption
+
+            self.encryption = Encryption(**encryptionData)
+        else:
+            self.encryption = None
 
         # Base headers and the custom User-Agent to identify this client as the
         # Hyperwallet SDK.
@@ -52,17 +61,53 @@ class ApiClient(object):
         self.username = username
         self.password = password
         self.server = server
+        self.poolSize = poolSize
 
         # The complete base URL of the API.
         self.baseUrl = urljoin(self.server, '/rest/v3/')
 
-        # The default connection to persist authentication and SSL settings.
-        defaultSession = requests.Session()
-        defaultSession.mount(self.server, SSLAdapter())
-        defaultSession.auth = (self.username, self.password)
-        defaultSession.headers = self.baseHeaders
+        # The HTTP session is created by the first request.
+        self.__session = None
+        self.__sessionLock = threading.Lock()
+
+        # Identical GET requests in flight at the same time share one call.
+        self.singleFlight = SingleFlight() if coalesceRequests else None
+
+    @property
+    def session(self):
+        '''
+        The default connection to persist authentication and SSL settings.
+        '''
+
+        if self.__session is None:
+            with self.__sessionLock:
+                if self.__session is None:
+                    import requests
+                    from requests_toolbelt.adapters.ssl import SSLAdapter
+
+                    defaultSession = requests.Session()
+                    defaultSession.mount(self.server, SSLAdapter(pool_maxsize=self.poolSize))
+                    defaultSession.auth = (self.username, self.password)
+                    defaultSession.headers = self.baseHeaders
 
-        self.session = defaultSession
+                    self.__session = defaultSession
+
+        return self.__session
+
+    @session.setter
+    def session(self, session):
+        self.__session = session
+
+    def close(self):
+        '''
+        Close the pooled connections, a new session is created by the next request.
+        '''
+
+        with self.__sessionLock:
+            session, self.__session = self.__session, None
+
+        if session is not None:
+            session.close()
 
     @property
     def encrypted(self):
@@ -74,7 +119,8 @@ class ApiClient(object):
                      data=None,
                      headers=None,
                      params=None,
-                     files=None):
+                     files=None,
+                     encrypt=True):
         '''
         Process an API response to ensure a JSON object is returned always.
 
@@ -88,6 +134,10 @@ class ApiClient(object):
             A dictionary containing additional request headers.
         :param params:
             A dictionary containing query parameters.
+        :param files:
+            A dictionary of files for multipart encoding upload.
+        :param encrypt:
+            Encrypt the request data when encryption is enabled, streamed bodies are sent as is.
         :returns:
             A JSON object containing the response data or an error object.
 
@@ -99,7 +149,7 @@ class ApiClient(object):
             response = self.session.request(
                 method=method,
                 url=urljoin(self.baseUrl, url),
-                data=self.__getRequestData(data),
+                data=self.__getRequestData(data) if encrypt else data,
                 headers=headers,
                 params=params,
                 files=files
@@ -121,11 +171,15 @@ class ApiClient(object):
 
         self.__checkResponseHeaderContentType(response)
 
+        # json.loads parses the raw bytes of the body directly, the body is
+        # only decoded for the JOSE parser which requires text.
         content = response.content
-        if hasattr(content, 'decode'):  # Python 2
-            content = content.decode('utf-8')
 
-        content = self.encryption.decrypt(content) if self.encrypted else content
+        if self.encrypted:
+            if isinstance(content, bytes):
+                content = content.decode('ascii', 'replace')
+
+            content = self.encryption.decrypt(content)
 
         try:
             json_body = json.loads(content)
@@ -134,13 +188,15 @@ class ApiClient(object):
             raise HyperwalletAPIException({
                 'errors': [{
                     'code': 'GARBAGE_RESPONSE',
-                    'message': 'Invalid response: {}'.format(e.args[0])
+                    'message': 'Invalid response: {}'.format(
+                        str(e) if isinstance(e, UnicodeDecodeError) else e.args[0]
+                    )
                 }]
-            })
+            }, response.status_code)
 
         if 'errors' in json_body:
             # The response is a valid JSON error object
-            raise HyperwalletAPIException(json_body)
+            raise HyperwalletAPIException(json_body, response.status_code)
 
         return json_body
 
@@ -156,11 +212,23 @@ class ApiClient(object):
             The API response.
         '''
 
-        return self._makeRequest(
+        if self.singleFlight is None:
+            return self._makeRequest(
+                method='GET',
+                url=partialUrl,
+                params=params
+            )
+
+        key = (partialUrl, json.dumps(params, sort_keys=True, default=str))
+
+        # Callers may modify the response, every caller gets its own copy.
+        (response, shared) = self.singleFlight.do(key, lambda: self._makeRequest(
             method='GET',
             url=partialUrl,
             params=params
-        )
+        ), copy=copy.deepcopy)
+
+        return response
 
     def doPost(self, partialUrl, data, headers={}):
         '''
@@ -213,7 +281,7 @@ class ApiClient(object):
         expectedContentType = 'application/jose+json' if self.encrypted else 'application/json'
         invalidContentType = response.status_code != 204 and contentType is not None and expectedContentType not in contentType
         if (invalidContentType):
-            raise HyperwalletAPIException('Invalid Content-Type specified in Response Header')
+            raise HyperwalletAPIException('Invalid Content-Type specified in Response Header', response.status_code)
 
     def __getRequestData(self, data):
         '''
@@ -227,24 +295,29 @@ class ApiClient(object):
 
         return (data if data is None else self.encryption.encrypt(data)) if self.encrypted else data
 
-    def putDocument(self, partialUrl, data, files):
+    def putDocument(self, partialUrl, data, files, onProgress=None):
         '''
-        Submit a PUT to the API.
+        Submit a PUT to the API with a streamed multipart body.
 
         :param partialUrl:
             A partial URL to specify the API endpoint. **REQUIRED**
         :param data:
             A dictionary containing data for the input documents. **REQUIRED**
         :param files: Dictionary of ``'filename': file-like-objects``
-            for multipart encoding upload. **REQUIRED**
+            (or paths) for multipart encoding upload. **REQUIRED**
+        :param onProgress:
+            Called with an UploadProgress (bytesSent, totalBytes, bytesPerSecond) while the body is sent.
         :returns:
             The API response.
         '''
 
-        return self._makeRequest(
-            method='PUT',
-            url=partialUrl,
-            data=data,
-            headers='',
-            files=files
-        )
+        from hyperwallet.utils.multipart import MultipartBody
+
+        with MultipartBody(data, files, onProgress) as body:
+            return self._makeRequest(
+                method='PUT',
+                url=partialUrl,
+                data=body.monitor,
+                headers={'Content-Type': body.contentType},
+                encrypt=False
+            )
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+import time
+import threading
+
+from collections import OrderedDict
+
+
+class TTLCache(object):
+    '''
+    A thread safe LRU cache whose entries expire after a fixed time.
+
+    :param maxSize:
+        The maximum number of entries kept in the cache.
+    :param ttl:
+        Time in seconds an entry stays valid after it was stored.
+    '''
+
+    def __init__(self, maxSize=256, ttl=300):
+        '''
+        Create an empty cache.
+        '''
+
+        if maxSize < 1:
+            raise ValueError('maxSize must be a positive integer')
+
+        self.maxSize = maxSize
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key, default=None):
+        '''
+        Retrieve a cached value.
+
+        :param key:
+            A hashable key identifying the entry. **REQUIRED**
+        :param default:
+            The value returned when the key is missing or expired.
+        :returns:
+            The cached value or the default.
+        '''
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is not None and entry[0] > time.time():
+                self.__entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self.__entries[key]
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        '''
+        Store a value, evicting the least recently used entry when full.
+
+        :param key:
+            A hashable key identifying the entry. **REQUIRED**
+        :param value:
+            The value to cache. **REQUIRED**
+        '''
+
+        with self.__lock:
+            self.__entries[key] = (time.time() + self.ttl, value)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.maxSize:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        '''
+        Drop every entry and reset the statistics.
+        '''
+
+        with self.__lock:
+            self.__entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        '''
+        Return the cache statistics.
+
+        :returns:
+            A dictionary with hits, misses, evictions, size and hitRate.
+        '''
+
+        with self.__lock:
+            lookups = self.hits + self.misses
+
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.__entries),
+                'hitRate': float(self.hits) / lookups if lookups else 0.0
+            }
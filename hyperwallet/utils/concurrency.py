@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+
+def boundedMap(function, items, concurrency=8, maxPending=None):
+    '''
+    Call a function for every item on a thread pool, keeping a bounded number
+    of calls in flight, and yield the outcomes as they complete.
+
+    Items are pulled from the iterable only when there is room for them, so
+    arbitrarily long (or lazy) iterables are consumed with constant memory.
+
+    :param function:
+        A callable taking a single item. **REQUIRED**
+    :param items:
+        An iterable of items. **REQUIRED**
+    :param concurrency:
+        The number of worker threads.
+    :param maxPending:
+        The maximum number of submitted but unconsumed calls, defaults to twice the concurrency.
+    :returns:
+        A generator of ``(item, result, error)`` tuples, error is None on success.
+    '''
+
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    if concurrency < 1:
+        raise ValueError('concurrency must be a positive integer')
+
+    maxPending = max(maxPending or concurrency * 2, 1)
+    iterator = iter(items)
+    exhausted = False
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            while not exhausted and len(pending) < maxPending:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                pending[executor.submit(function, item)] = item
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                item = pending.pop(future)
+                error = future.exception()
+
+                yield (item, None if error is not None else future.result(), error)
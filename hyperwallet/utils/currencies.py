@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+from decimal import Decimal, InvalidOperation
+
+from hyperwallet.exceptions import HyperwalletException
+
+
+# Number of minor unit digits of the currencies which do not use two (ISO 4217).
+CURRENCY_DIGITS = {
+    'BIF': 0, 'CLP': 0, 'DJF': 0, 'GNF': 0, 'ISK': 0, 'JPY': 0, 'KMF': 0,
+    'KRW': 0, 'PYG': 0, 'RWF': 0, 'UGX': 0, 'UYI': 0, 'VND': 0, 'VUV': 0,
+    'XAF': 0, 'XOF': 0, 'XPF': 0,
+    'BHD': 3, 'IQD': 3, 'JOD': 3, 'KWD': 3, 'LYD': 3, 'OMR': 3, 'TND': 3,
+    'CLF': 4, 'UYW': 4
+}
+
+
+def getCurrencyDigits(currency):
+    '''
+    Retrieve the number of minor unit digits of a currency.
+
+    :param currency:
+        An ISO 4217-1 code identifying the currency. **REQUIRED**
+    :returns:
+        The number of digits after the decimal separator.
+    '''
+
+    return CURRENCY_DIGITS.get(currency, 2)
+
+
+def toDecimal(amount):
+    '''
+    Convert an amount returned by the API to a Decimal.
+
+    :param amount:
+        The amount as a string or number. **REQUIRED**
+    :returns:
+        A Decimal.
+    '''
+
+    try:
+        return Decimal(amount if isinstance(amount, str) else str(amount))
+    except (InvalidOperation, ValueError):
+        raise HyperwalletException('Invalid amount = {}'.format(amount))
+
+
+def toMinorUnits(amount, currency):
+    '''
+    Convert an amount to an integer number of minor units of its currency.
+
+    :param amount:
+        The amount as a string, number or Decimal. **REQUIRED**
+    :param currency:
+        An ISO 4217-1 code identifying the currency. **REQUIRED**
+    :returns:
+        An integer, e.g. 1050 for 10.50 USD.
+    '''
+
+    digits = getCurrencyDigits(currency)
+
+    if isinstance(amount, str):
+        # Plain decimal strings, as returned by the API, are converted without Decimal.
+        (whole, point, fraction) = amount.strip().partition('.')
+        unsigned = whole[1:] if whole[:1] in ('-', '+') else whole
+
+        if unsigned.isdecimal() and (fraction.isdecimal() or not point) and not fraction[digits:].strip('0'):
+            return int(whole + fraction[:digits].ljust(digits, '0'))
+
+    value = toDecimal(amount).scaleb(digits)
+
+    if value != value.to_integral_value():
+        raise HyperwalletException('Amount {} has too many decimals for currency {}'.format(amount, currency))
+
+    return int(value)
+
+
+def fromMinorUnits(units, currency):
+    '''
+    Convert an integer number of minor units to a Decimal amount.
+
+    :param units:
+        The number of minor units. **REQUIRED**
+    :param currency:
+        An ISO 4217-1 code identifying the currency. **REQUIRED**
+    :returns:
+        A Decimal, e.g. Decimal('10.50') for 1050 USD.
+    '''
+
+    return Decimal(int(units)).scaleb(-getCurrencyDigits(currency))
@@ -2,17 +2,19 @@
 
 import os
 import json
-import requests
 import time
 import sys
 
 from jwcrypto import jwk, jws as cryptoJWS, jwe
 from jwcrypto.common import json_encode, json_decode
 from jwcrypto.common import base64url_decode, base64url_encode
-from jose import jws
+from jwcrypto.jwa import JWA
 
 from hyperwallet.exceptions import HyperwalletException
-from six.moves.urllib.parse import urlparse
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse  # Python 2
 
 
 class Encryption(object):
@@ -52,6 +54,10 @@ class Encryption(object):
         self.jwsExpirationMinutes = jwsExpirationMinutes
         self.integer_types = (int, long,) if sys.version_info < (3,) else (int,)
 
+        # Key sets and imported keys are loaded once per location and algorithm.
+        self.keySets = {}
+        self.keys = {}
+
     def encrypt(self, body):
         '''
         :param body:
@@ -60,9 +66,7 @@ class Encryption(object):
             String as a result of signature and encryption of input message body
         '''
 
-        jwsKeySet = self.__getJwkKeySet(location=self.clientPrivateKeySetLocation)
-        jwkSignKey = self.__findJwkKeyByAlgorithm(jwkKeySet=jwsKeySet, algorithm=self.signAlgorithm)
-        privateKeyToSign = jwk.JWK(**jwkSignKey)
+        (jwkSignKey, privateKeyToSign) = self.__getKey(self.clientPrivateKeySetLocation, self.signAlgorithm)
         jwsToken = cryptoJWS.JWS(body.encode('utf-8'))
         jwsToken.add_signature(privateKeyToSign, None, json_encode({
             "alg": self.signAlgorithm,
@@ -71,9 +75,7 @@ class Encryption(object):
         }))
         signedBody = jwsToken.serialize(True)
 
-        jweKeySet = self.__getJwkKeySet(location=self.hyperwalletKeySetLocation)
-        jwkEncryptKey = self.__findJwkKeyByAlgorithm(jwkKeySet=jweKeySet, algorithm=self.encryptionAlgorithm)
-        publicKeyToEncrypt = jwk.JWK(**jwkEncryptKey)
+        (jwkEncryptKey, publicKeyToEncrypt) = self.__getKey(self.hyperwalletKeySetLocation, self.encryptionAlgorithm)
         protected_header = {
             "alg": self.encryptionAlgorithm,
             "enc": self.encryptionMethod,
@@ -91,23 +93,97 @@ class Encryption(object):
             Decrypted body message
         '''
 
-        jweKeySet = self.__getJwkKeySet(location=self.clientPrivateKeySetLocation)
-        jwkDecryptKey = self.__findJwkKeyByAlgorithm(jwkKeySet=jweKeySet, algorithm=self.encryptionAlgorithm)
-        privateKeyToDecrypt = jwk.JWK(**jwkDecryptKey)
+        privateKeyToDecrypt = self.__getKey(self.clientPrivateKeySetLocation, self.encryptionAlgorithm)[1]
         jweToken = jwe.JWE()
         try:
             jweToken.deserialize(body, key=privateKeyToDecrypt)
         except Exception as e:
             raise HyperwalletException(str(e))
-        payload = jweToken.payload
 
-        self.checkJwsExpiration(payload)
-        jwsKeySet = self.__getJwkKeySet(location=self.hyperwalletKeySetLocation)
-        jwkCheckSignKey = self.__findJwkKeyByAlgorithm(jwkKeySet=jwsKeySet, algorithm=self.signAlgorithm)
+        # The signed payload is parsed once, the same parts are used to check
+        # the expiration and to verify the signature.
+        (header, signingInput, payload, signature) = self.__parseJws(jweToken.payload)
+
+        self.__checkJwsExpirationHeader(header)
+
+        if not header.get('alg'):
+            raise HyperwalletException('No algorithm was specified in the JWS header.')
+
+        if header['alg'] != self.signAlgorithm:
+            raise HyperwalletException('The specified alg value is not allowed')
+
+        publicKeyToVerify = self.__getKey(self.hyperwalletKeySetLocation, self.signAlgorithm)[1]
         try:
-            return jws.verify(payload, json.dumps(jwkCheckSignKey), algorithms=self.signAlgorithm)
-        except Exception as e:
-            raise HyperwalletException(str(e))
+            JWA.signing_alg(self.signAlgorithm).verify(publicKeyToVerify, signingInput, signature)
+        except Exception:
+            raise HyperwalletException('Signature verification failed.')
+
+        return payload
+
+    def __getKey(self, location, algorithm):
+        '''
+        Retrieves the JWK key with given algorithm from the key set at given location.
+
+        :param location:
+            Location(can be a URL or path to file) of JWK key data. **REQUIRED**
+        :param algorithm:
+            Algorithm of the JWK key to be found in key set. **REQUIRED**
+        :returns:
+            A tuple of the JSON representation of the key and the imported key.
+        '''
+
+        key = self.keys.get((location, algorithm))
+
+        if key is None:
+            keySet = self.keySets.get(location)
+
+            if keySet is None:
+                keySet = self.__getJwkKeySet(location=location)
+
+            jwkKey = self.__findJwkKeyByAlgorithm(jwkKeySet=keySet, algorithm=algorithm)
+            self.keySets[location] = keySet
+
+            key = (jwkKey, jwk.JWK(**jwkKey))
+            self.keys[(location, algorithm)] = key
+
+        return key
+
+    def __parseJws(self, payload):
+        '''
+        Splits a JWS in compact serialization.
+
+        :param payload:
+            The JWS to be parsed. **REQUIRED**
+        :returns:
+            A tuple of the decoded header, signing input, decoded payload and decoded signature.
+        '''
+
+        if not isinstance(payload, bytes):
+            payload = payload.encode('utf-8')
+
+        try:
+            (signingInput, encodedSignature) = payload.rsplit(b'.', 1)
+            (encodedHeader, encodedPayload) = signingInput.split(b'.', 1)
+        except ValueError:
+            raise HyperwalletException('Not enough segments')
+
+        try:
+            header = json.loads(base64url_decode(encodedHeader.decode('ascii')).decode('utf-8'))
+        except Exception:
+            raise HyperwalletException('Invalid header string')
+
+        if not isinstance(header, dict):
+            raise HyperwalletException('Invalid header string: must be a json object')
+
+        try:
+            return (
+                header,
+                signingInput,
+                base64url_decode(encodedPayload.decode('ascii')),
+                base64url_decode(encodedSignature.decode('ascii'))
+            )
+        except Exception:
+            raise HyperwalletException('Invalid payload padding')
 
     def __getJwkKeySet(self, location):
         '''
@@ -121,6 +197,8 @@ class Encryption(object):
         try:
             url = urlparse(location)
             if url.scheme and url.netloc and url.path:
+                import requests
+
                 return requests.get(location).text
             raise HyperwalletException('Failed to parse url from string = ' + location)
         except Exception as e:
@@ -169,7 +247,15 @@ class Encryption(object):
         Check if JWS signature has not expired.
         '''
 
-        header = jws.get_unverified_header(payload)
+        self.__checkJwsExpirationHeader(self.__parseJws(payload)[0])
+
+    def __checkJwsExpirationHeader(self, header):
+        '''
+        Check the [exp] parameter of a decoded JWS header.
+
+        :param header:
+            The decoded JWS header. **REQUIRED**
+        '''
 
         if 'exp' not in header:
             raise HyperwalletException('While trying to verify JWS signature no [exp] header is found')
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+import os
+import time
+
+from requests_toolbelt.multipart.encoder import MultipartEncoder, MultipartEncoderMonitor
+
+
+class UploadProgress(object):
+    '''
+    Progress and throughput of a streamed multipart upload.
+
+    :param totalBytes:
+        The size of the complete multipart body.
+    '''
+
+    def __init__(self, totalBytes):
+        '''
+        Create a new UploadProgress.
+        '''
+
+        self.totalBytes = totalBytes
+        self.bytesSent = 0
+        self.startedOn = time.time()
+        self.updatedOn = self.startedOn
+
+    @property
+    def elapsed(self):
+        '''
+        Seconds between the start of the upload and the last update.
+        '''
+
+        return self.updatedOn - self.startedOn
+
+    @property
+    def bytesPerSecond(self):
+        '''
+        The average upload rate so far.
+        '''
+
+        return self.bytesSent / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def done(self):
+        return self.bytesSent >= self.totalBytes
+
+    def __repr__(self):
+        return "UploadProgress({bytesSent}/{totalBytes}, {rate:.0f} B/s)".format(
+            bytesSent=self.bytesSent,
+            totalBytes=self.totalBytes,
+            rate=self.bytesPerSecond
+        )
+
+
+class MultipartBody(object):
+    '''
+    A streaming multipart body built from form data and files.
+
+    Files may be given as open binary file objects, paths, or
+    ``(filename, fileobj[, contentType])`` tuples. Paths are opened when the
+    body is created and closed by close(). The body is read in chunks while
+    it is sent, it is never copied in memory as a whole.
+
+    :param data:
+        A dictionary of form field name to value or list of values.
+    :param files:
+        A dictionary of form field name to file.
+    :param onProgress:
+        Called with an UploadProgress every time a chunk is read.
+    '''
+
+    def __init__(self, data=None, files=None, onProgress=None):
+        '''
+        Create a new MultipartBody.
+        '''
+
+        self.openedFiles = []
+
+        try:
+            fields = self.__buildFields(data, files)
+            encoder = MultipartEncoder(fields)
+        except Exception:
+            self.close()
+            raise
+
+        self.progress = UploadProgress(encoder.len)
+        self.onProgress = onProgress
+        self.monitor = MultipartEncoderMonitor(encoder, self.__update)
+
+    @property
+    def contentType(self):
+        return self.monitor.content_type
+
+    def close(self):
+        '''
+        Close the files opened from paths.
+        '''
+
+        for fileobj in self.openedFiles:
+            fileobj.close()
+
+        self.openedFiles = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __update(self, monitor):
+        self.progress.bytesSent = monitor.bytes_read
+        self.progress.updatedOn = time.time()
+
+        if self.onProgress is not None:
+            self.onProgress(self.progress)
+
+    def __buildFields(self, data, files):
+        fields = []
+
+        for (name, value) in (data or {}).items():
+            for item in (value if isinstance(value, (list, tuple)) else [value]):
+                fields.append((name, item if isinstance(item, (str, bytes)) else str(item)))
+
+        for (name, value) in (files or {}).items():
+            if isinstance(value, (list, tuple)):
+                fields.append((name, tuple(value)))
+                continue
+
+            if isinstance(value, str):
+                value = open(value, 'rb')
+                self.openedFiles.append(value)
+
+            filename = getattr(value, 'name', None)
+            filename = os.path.basename(filename) if isinstance(filename, str) else name
+            fields.append((name, (filename, value)))
+
+        return fields
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+
+def iterPages(listFunction, args=(), params=None, limit=100):
+    '''
+    Walk a list endpoint page by page using offset and limit.
+
+    :param listFunction:
+        An Api list method, e.g. ``api.listUsers``. **REQUIRED**
+    :param args:
+        Positional arguments passed before the query parameters, e.g. a User token.
+    :param params:
+        A dictionary containing additional query parameters.
+    :param limit:
+        The page size.
+    :returns:
+        A generator of lists of models, one per page.
+    '''
+
+    query = dict(params or {})
+    offset = int(query.pop('offset', 0))
+
+    while True:
+        query['offset'] = offset
+        query['limit'] = limit
+
+        page = listFunction(*(tuple(args) + (dict(query),)))
+
+        if page:
+            yield page
+
+        if len(page) < limit:
+            return
+
+        offset += len(page)
+
+
+def iterItems(listFunction, args=(), params=None, limit=100):
+    '''
+    Walk a list endpoint item by item using offset and limit.
+
+    :param listFunction:
+        An Api list method, e.g. ``api.listUsers``. **REQUIRED**
+    :param args:
+        Positional arguments passed before the query parameters, e.g. a User token.
+    :param params:
+        A dictionary containing additional query parameters.
+    :param limit:
+        The page size.
+    :returns:
+        A generator of models.
+    '''
+
+    for page in iterPages(listFunction, args, params, limit):
+        for item in page:
+            yield item
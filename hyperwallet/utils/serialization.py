@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+
+import json
+import struct
+
+from hyperwallet.exceptions import HyperwalletException
+from hyperwallet.models import HyperwalletModel, RejectReason
+
+
+MAGIC = b'HWM'
+VERSION = 1
+
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+CODECS = {'json': CODEC_JSON, 'msgpack': CODEC_MSGPACK}
+
+HEADER = struct.Struct('>3sBB')
+
+# msgpack extension types of nested models and enums.
+_EXT_MODEL = 1
+_EXT_ENUM = 2
+
+_ENUM_TYPES = {'RejectReason': RejectReason}
+
+_modelTypes = {}
+_msgpack = None
+
+
+def getCodec(codec=None):
+    '''
+    Select the codec used to serialize models.
+
+    :param codec:
+        'msgpack' or 'json', msgpack if it is installed and JSON otherwise if not provided.
+    :returns:
+        The codec identifier written in the header.
+    '''
+
+    if codec is None:
+        return CODEC_MSGPACK if _getMsgpack(False) is not None else CODEC_JSON
+
+    if codec not in CODECS:
+        raise HyperwalletException('Unsupported codec = {}'.format(codec))
+
+    if CODECS[codec] == CODEC_MSGPACK:
+        _getMsgpack(True)
+
+    return CODECS[codec]
+
+
+def toBytes(model, codec=None):
+    '''
+    Serialize a model to its compact binary form.
+
+    Only the data of the model is stored, the model is built again from it
+    by fromBytes. Nested models and RejectReason values are kept.
+
+    :param model:
+        A HyperwalletModel. **REQUIRED**
+    :param codec:
+        'msgpack' or 'json', msgpack if it is installed and JSON otherwise if not provided.
+    :returns:
+        The bytes of the model.
+    '''
+
+    codec = getCodec(codec)
+
+    return HEADER.pack(MAGIC, VERSION, codec) + _encode([type(model).__name__, model._raw_json], codec)
+
+
+def fromBytes(data):
+    '''
+    Build a model from its compact binary form.
+
+    :param data:
+        The bytes returned by toBytes. **REQUIRED**
+    :returns:
+        A HyperwalletModel.
+    '''
+
+    (name, raw) = _decode(data)
+
+    return _getModelType(name)(raw)
+
+
+def dumps(models, codec=None):
+    '''
+    Serialize an array of models to a single compact binary payload.
+
+    Class names and attribute names are stored once for the batch, each
+    model is stored as the array of its values.
+
+    :param models:
+        An iterable of HyperwalletModels. **REQUIRED**
+    :param codec:
+        'msgpack' or 'json', msgpack if it is installed and JSON otherwise if not provided.
+    :returns:
+        The bytes of the models.
+    '''
+
+    codec = getCodec(codec)
+
+    names = {}
+    schemas = {}
+    rows = []
+
+    for model in models:
+        raw = model._raw_json
+        name = names.setdefault(type(model).__name__, len(names))
+        schema = schemas.setdefault(tuple(raw), len(schemas))
+
+        rows.append([name, schema] + list(raw.values()))
+
+    return HEADER.pack(MAGIC, VERSION, codec) + _encode([list(names), [list(x) for x in schemas], rows], codec)
+
+
+def loads(data):
+    '''
+    Build the array of models serialized by dumps.
+
+    :param data:
+        The bytes returned by dumps. **REQUIRED**
+    :returns:
+        An array of HyperwalletModels.
+    '''
+
+    (names, schemas, rows) = _decode(data)
+    models = [_getModelType(name) for name in names]
+
+    return [models[row[0]](dict(zip(schemas[row[1]], row[2:]))) for row in rows]
+
+
+def _getMsgpack(required):
+    global _msgpack
+
+    if _msgpack is None:
+        try:
+            import msgpack
+        except ImportError:
+            if required:
+                raise HyperwalletException('msgpack is required for this feature, install it with: pip install msgpack')
+
+            return None
+
+        _msgpack = msgpack
+
+    return _msgpack
+
+
+def _getModelType(name):
+    model = _modelTypes.get(name)
+
+    if model is None:
+        # Models are looked up again when an unknown name is found, to include subclasses defined later.
+        pending = [HyperwalletModel]
+
+        while pending:
+            cls = pending.pop()
+            _modelTypes.setdefault(cls.__name__, cls)
+            pending.extend(cls.__subclasses__())
+
+        model = _modelTypes.get(name)
+
+        if model is None:
+            raise HyperwalletException('Unknown model = {}'.format(name))
+
+    return model
+
+
+def _getEnumType(name):
+    if name not in _ENUM_TYPES:
+        raise HyperwalletException('Unknown enum = {}'.format(name))
+
+    return _ENUM_TYPES[name]
+
+
+def _encode(payload, codec):
+    if codec == CODEC_MSGPACK:
+        return _getMsgpack(True).packb(payload, default=_toExtType, use_bin_type=True)
+
+    return json.dumps(payload, default=_toJson, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _decode(data):
+    if len(data) < HEADER.size:
+        raise HyperwalletException('Invalid serialized model')
+
+    (magic, version, codec) = HEADER.unpack_from(data)
+
+    if magic != MAGIC:
+        raise HyperwalletException('Invalid serialized model')
+
+    if version != VERSION:
+        raise HyperwalletException('Unsupported serialization version = {}'.format(version))
+
+    body = data[HEADER.size:]
+
+    if codec == CODEC_MSGPACK:
+        return _getMsgpack(True).unpackb(body, ext_hook=_fromExtType, raw=False, strict_map_key=False)
+
+    if codec == CODEC_JSON:
+        return json.loads(body.decode('utf-8'), object_hook=_fromJson)
+
+    raise HyperwalletException('Unsupported codec = {}'.format(codec))
+
+
+def _toExtType(value):
+    msgpack = _getMsgpack(True)
+
+    if isinstance(value, HyperwalletModel):
+        return msgpack.ExtType(_EXT_MODEL, msgpack.packb(
+            [type(value).__name__, value._raw_json], default=_toExtType, use_bin_type=True
+        ))
+
+    if isinstance(value, tuple(_ENUM_TYPES.values())):
+        return msgpack.ExtType(_EXT_ENUM, msgpack.packb([type(value).__name__, value.name], use_bin_type=True))
+
+    raise TypeError('Object of type {} cannot be serialized'.format(type(value).__name__))
+
+
+def _fromExtType(code, data):
+    msgpack = _getMsgpack(True)
+
+    if code not in (_EXT_MODEL, _EXT_ENUM):
+        return msgpack.ExtType(code, data)
+
+    (name, value) = msgpack.unpackb(data, ext_hook=_fromExtType, raw=False, strict_map_key=False)
+
+    if code == _EXT_MODEL:
+        return _getModelType(name)(value)
+
+    return _getEnumType(name)[value]
+
+
+def _toJson(value):
+    if isinstance(value, HyperwalletModel):
+        return {'$model': type(value).__name__, 'data': value._raw_json}
+
+    if isinstance(value, tuple(_ENUM_TYPES.values())):
+        return {'$enum': type(value).__name__, 'name': value.name}
+
+    raise TypeError('Object of type {} cannot be serialized'.format(type(value).__name__))
+
+
+def _fromJson(value):
+    if len(value) == 2:
+        if '$model' in value and 'data' in value:
+            return _getModelType(value['$model'])(value['data'])
+
+        if '$enum' in value and 'name' in value:
+            return _getEnumType(value['$enum'])[value['name']]
+
+    return value
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+import threading
+
+
+class _Call(object):
+    '''
+    An in-flight call shared by every caller of the same key.
+    '''
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    '''
+    Collapse concurrent calls for the same key into a single execution.
+
+    The first caller of a key runs the function, callers arriving while it is
+    in flight wait for it and receive the same result or exception. A copy
+    function gives every caller, the first one included, its own copy of a
+    result that callers may modify.
+    '''
+
+    def __init__(self):
+        '''
+        Create a new SingleFlight group.
+        '''
+
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, function, copy=None):
+        '''
+        Run the function once for all concurrent callers of a key.
+
+        :param key:
+            A hashable key identifying the call. **REQUIRED**
+        :param function:
+            A callable without arguments. **REQUIRED**
+        :param copy:
+            Callable returning a copy of the result for each caller, the result is returned as is if not provided.
+        :returns:
+            A tuple of the result and whether it was shared from another caller.
+        '''
+
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = _Call()
+                self.__calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return (copy(call.result) if copy is not None else call.result, True)
+
+        try:
+            call.result = function()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+            call.done.set()
+
+        # The result kept for the waiters is never returned, so no caller can
+        # modify it while another one copies it.
+        return (copy(call.result) if copy is not None else call.result, False)
@@ -35,7 +35,12 @@ setup(
     maintainer = extract_metaitem('author'),
     maintainer_email = extract_metaitem('email'),
     packages = find_packages(exclude = ('tests', 'doc')),
-    install_requires = ['requests', 'requests-toolbelt', 'jwcrypto', 'python-jose'],
+    install_requires = ['requests', 'requests-toolbelt', 'jwcrypto'],
+    extras_require = {
+        'frames': ['numpy'],
+        'parquet': ['pyarrow'],
+        'msgpack': ['msgpack'],
+    },
     tests_require = [ 'mock', 'nose'],
     keywords='hyperwallet api',
     classifiers=[